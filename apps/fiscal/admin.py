@@ -17,7 +17,7 @@ class QuarterInline(TabularInline):
     extra = 0
     show_change_link = True
     fields = ("number", "closed", "closing_date")
-    readonly_fields = ("closing_date",)
+    readonly_fields = ("closed", "closing_date")
 
 
 @admin.register(FiscalYear)
@@ -32,7 +32,7 @@ class FiscalYearAdmin(ModelAdmin):
     list_filter = ("business_profile", "closed", "estimation_type")
     search_fields = ("year", "business_profile__name")
     inlines = [QuarterInline]
-    actions = ["close_fiscal_year", "create_quarters"]
+    actions = ["close_fiscal_year", "create_quarters", "recalculate_results"]
 
     fieldsets = (
         (None, {"fields": ("business_profile", "year", "estimation_type", "closed")}),
@@ -55,6 +55,18 @@ class FiscalYearAdmin(ModelAdmin):
             request, f"Trimestres creados para {queryset.count()} año(s)."
         )
 
+    @admin.action(description="Recalcular resultados trimestrales")
+    def recalculate_results(self, request: HttpRequest, queryset: QuerySet):
+        from apps.fiscal.services.recalculate import recalculate_results
+
+        # In-process: spawning a pool per request would tie up the web
+        # worker; large runs belong to the recalculate_fiscal_results command
+        written = recalculate_results(queryset.values_list("pk", flat=True), workers=0)
+        self.message_user(
+            request,
+            f"Recalculados {written} trimestre(s) de {queryset.count()} año(s).",
+        )
+
     @admin.action(description="Cerrar año fiscal")
     def close_fiscal_year(self, request: HttpRequest, queryset: QuerySet):
         from django.contrib import messages
@@ -95,7 +107,15 @@ class QuarterAdmin(ModelAdmin):
     )
     list_filter = ("fiscal_year__business_profile", "fiscal_year", "number", "closed")
     search_fields = ("fiscal_year__year", "fiscal_year__business_profile__name")
-    actions = ["calculate_and_save_result", "close_quarter"]
+    actions = [
+        "calculate_and_save_result",
+        "close_quarter",
+        "reopen_quarter",
+        "recompute_snapshot",
+    ]
+
+    # Closing freezes a snapshot and reopening drops it: use the actions
+    readonly_fields = ("closed", "closing_date")
 
     fieldsets = (
         (None, {"fields": ("fiscal_year", "number")}),
@@ -127,29 +147,24 @@ class QuarterAdmin(ModelAdmin):
 
     @admin.action(description="Calcular y guardar resultado (303 + 130)")
     def calculate_and_save_result(self, request: HttpRequest, queryset: QuerySet):
-        from apps.fiscal.services import calculate_modelo_130
-        from apps.fiscal.services import calculate_modelo_303
+        from apps.fiscal.services.recalculate import recalculate_results
 
-        for quarter in queryset:
-            result_303 = calculate_modelo_303(quarter)
-            result_130 = calculate_modelo_130(quarter)
-
-            QuarterlyResult.objects.update_or_create(
-                quarter=quarter,
-                defaults={
-                    "modelo_303_calculated": result_303["result"],
-                    "modelo_130_calculated": result_130["result"],
-                },
-            )
+        # Closed quarters keep their frozen figures (see recompute_snapshot)
+        written = recalculate_results(
+            set(queryset.values_list("fiscal_year_id", flat=True)),
+            quarter_ids=queryset.values_list("pk", flat=True),
+            workers=0,
+        )
         self.message_user(
             request,
-            f"Calculado resultado para {queryset.count()} trimestre(s).",
+            f"Calculado resultado para {written} trimestre(s).",
         )
 
     @admin.action(description="Cerrar trimestre")
     def close_quarter(self, request: HttpRequest, queryset: QuerySet):
         from django.contrib import messages
-        from django.utils import timezone
+
+        from apps.fiscal.services.snapshot import close_quarter
 
         closed = 0
         for quarter in queryset:
@@ -160,14 +175,32 @@ class QuarterAdmin(ModelAdmin):
                     messages.WARNING,
                 )
                 continue
-            quarter.closed = True
-            quarter.closing_date = timezone.now().date()
-            quarter.save()
+            close_quarter(quarter)
             closed += 1
 
         if closed:
             self.message_user(request, f"Cerrados {closed} trimestre(s).")
 
+    @admin.action(description="Reabrir trimestre")
+    def reopen_quarter(self, request: HttpRequest, queryset: QuerySet):
+        from apps.fiscal.services.snapshot import reopen_quarter
+
+        quarters = queryset.filter(closed=True, fiscal_year__closed=False)
+        for quarter in quarters:
+            reopen_quarter(quarter)
+        self.message_user(request, f"Reabiertos {len(quarters)} trimestre(s).")
+
+    @admin.action(description="Recalcular instantánea de cierre")
+    def recompute_snapshot(self, request: HttpRequest, queryset: QuerySet):
+        from apps.fiscal.services.snapshot import freeze_quarter
+
+        quarters = queryset.filter(closed=True)
+        for quarter in quarters:
+            freeze_quarter(quarter)
+        self.message_user(
+            request, f"Instantánea recalculada para {len(quarters)} trimestre(s)."
+        )
+
 
 @admin.register(Expense)
 class ExpenseAdmin(ModelAdmin):
@@ -5,3 +5,6 @@ class FiscalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.fiscal"
     verbose_name = "Gestión fiscal"
+
+    def ready(self):
+        import apps.fiscal.signals  # noqa: F401
@@ -1,9 +1,11 @@
 from apps.fiscal.forms.expense import ExpenseForm
 from apps.fiscal.forms.fiscal_year import FiscalYearForm
 from apps.fiscal.forms.quarterly_result import QuarterlyResultForm
+from apps.fiscal.forms.simulation import SimulationForm
 
 __all__ = [
     "ExpenseForm",
     "FiscalYearForm",
     "QuarterlyResultForm",
+    "SimulationForm",
 ]
@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+from django import forms
+
+from apps.fiscal.models.expense import VATType
+
+SLIDER_ATTRS = {
+    "type": "range",
+    "class": "w-full",
+    "min": "0",
+    "max": "20000",
+    "step": "50",
+    "oninput": "this.nextElementSibling.value = this.value + '€'",
+}
+
+
+class SimulationForm(forms.Form):
+    """Hypothetical invoice and expense added to a quarter."""
+
+    invoice_base = forms.DecimalField(
+        label="Base de la factura",
+        min_value=0,
+        max_digits=10,
+        decimal_places=2,
+        initial=Decimal("0"),
+        required=False,
+        widget=forms.NumberInput(attrs=SLIDER_ATTRS),
+    )
+    invoice_vat_rate = forms.TypedChoiceField(
+        label="IVA de la factura",
+        choices=VATType.choices,
+        coerce=int,
+        initial=VATType.GENERAL,
+        empty_value=VATType.GENERAL,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    invoice_withholding_rate = forms.DecimalField(
+        label="Retención IRPF (%)",
+        min_value=0,
+        max_value=100,
+        max_digits=5,
+        decimal_places=2,
+        initial=Decimal("15"),
+        required=False,
+        widget=forms.NumberInput(attrs={"class": "form-input", "step": "0.01"}),
+    )
+    expense_base = forms.DecimalField(
+        label="Base del gasto",
+        min_value=0,
+        max_digits=10,
+        decimal_places=2,
+        initial=Decimal("0"),
+        required=False,
+        widget=forms.NumberInput(attrs=SLIDER_ATTRS),
+    )
+    expense_vat_rate = forms.TypedChoiceField(
+        label="IVA del gasto",
+        choices=VATType.choices,
+        coerce=int,
+        initial=VATType.GENERAL,
+        empty_value=VATType.GENERAL,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    expense_irpf_deductible = forms.BooleanField(
+        label="Deducible IRPF",
+        initial=True,
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-checkbox"}),
+    )
+    expense_vat_deductible = forms.BooleanField(
+        label="Deducible IVA",
+        initial=True,
+        required=False,
+        widget=forms.CheckboxInput(attrs={"class": "form-checkbox"}),
+    )
+
+    def scenario(self):
+        """``(invoices, expenses)`` for ``QuarterSimulator.simulate``."""
+        data = self.cleaned_data
+        invoices = []
+        expenses = []
+        if data.get("invoice_base"):
+            invoices.append(
+                {
+                    "base": data["invoice_base"],
+                    "vat_rate": data["invoice_vat_rate"],
+                    "withholding_rate": data.get("invoice_withholding_rate")
+                    or Decimal("0"),
+                }
+            )
+        if data.get("expense_base"):
+            expenses.append(
+                {
+                    "base": data["expense_base"],
+                    "vat_rate": data["expense_vat_rate"],
+                    "irpf_deductible": data["expense_irpf_deductible"],
+                    "vat_deductible": data["expense_vat_deductible"],
+                }
+            )
+        return invoices, expenses
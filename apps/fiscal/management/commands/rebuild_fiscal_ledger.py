@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.fiscal.services.ledger import rebuild_ledger
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.services.cache import bump_data_version
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el libro fiscal a partir de las facturas y los gastos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            type=int,
+            help="ID de la empresa (por defecto, todas).",
+        )
+
+    def handle(self, *args, **options):
+        businesses = BusinessProfile.objects.order_by("pk")
+        if options["business"]:
+            businesses = businesses.filter(pk=options["business"])
+
+        count = 0
+        for business_id in businesses.values_list("pk", flat=True):
+            rebuild_ledger(business_id)
+            bump_data_version(business_id)
+            count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Libro fiscal reconstruido para {count} empresa(s).")
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.services.recalculate import recalculate_results
+
+
+class Command(BaseCommand):
+    help = "Recalcula en paralelo los resultados trimestrales (303 y 130)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            type=int,
+            action="append",
+            help="ID de la empresa (repetible; por defecto, todas).",
+        )
+        parser.add_argument(
+            "--year",
+            type=int,
+            action="append",
+            help="Año fiscal (repetible; por defecto, todos).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Procesos de cálculo (por defecto, uno por CPU; 0 = sin procesos).",
+        )
+        parser.add_argument(
+            "--include-closed",
+            action="store_true",
+            help="Recalcula también los trimestres cerrados y su instantánea.",
+        )
+
+    def handle(self, *args, **options):
+        fiscal_years = FiscalYear.objects.order_by("business_profile_id", "year")
+        if options["business"]:
+            fiscal_years = fiscal_years.filter(
+                business_profile_id__in=options["business"]
+            )
+        if options["year"]:
+            fiscal_years = fiscal_years.filter(year__in=options["year"])
+
+        def progress(done, total):
+            self.stdout.write(f"[{done}/{total}] años fiscales calculados")
+
+        written = recalculate_results(
+            fiscal_years.values_list("pk", flat=True),
+            include_closed=options["include_closed"],
+            workers=options["workers"],
+            progress=progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Guardados {written} resultados trimestrales.")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fiscal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quarterlyresult',
+            name='snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name='Instantánea al cierre'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:05
+
+import django.db.models.deletion
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_ledger(apps, schema_editor):
+    # Same figures as apps.fiscal.services.ledger, computed here so later
+    # changes to that module cannot break this migration
+    InvoiceLineItem = apps.get_model("invoicing", "InvoiceLineItem")
+    Expense = apps.get_model("fiscal", "Expense")
+    LedgerEntry = apps.get_model("fiscal", "LedgerEntry")
+    amounts = [
+        "income_base",
+        "output_vat",
+        "withholdings",
+        "deductible_expenses",
+        "input_vat",
+    ]
+    rows = defaultdict(lambda: dict.fromkeys(amounts, Decimal("0")))
+
+    lines = InvoiceLineItem.objects.filter(
+        invoice__status__in=["sent", "paid"]
+    ).values_list(
+        "invoice__business_profile_id",
+        "invoice__issue_date",
+        "quantity",
+        "unit_price",
+        "discount_percent",
+        "tax_rate",
+        "withholding_rate",
+    )
+    for business_id, day, quantity, price, discount, tax_rate, withholding_rate in (
+        lines.iterator(chunk_size=2000)
+    ):
+        subtotal = quantity * price * (Decimal("100") - discount) / Decimal("100")
+        row = rows[business_id, day, Decimal(tax_rate)]
+        row["income_base"] += subtotal
+        row["output_vat"] += subtotal * tax_rate / Decimal("100")
+        row["withholdings"] += subtotal * withholding_rate / Decimal("100")
+
+    expenses = Expense.objects.values_list(
+        "business_profile_id",
+        "date",
+        "vat_type",
+        "taxable_base",
+        "input_vat",
+        "irpf_deductible",
+        "vat_deductible",
+    )
+    for business_id, day, vat_type, base, input_vat, irpf, vat in expenses.iterator(
+        chunk_size=2000
+    ):
+        row = rows[business_id, day, Decimal(vat_type)]
+        if irpf:
+            row["deductible_expenses"] += base
+        if vat:
+            row["input_vat"] += input_vat
+
+    LedgerEntry.objects.bulk_create(
+        (
+            LedgerEntry(
+                business_profile_id=business_id, date=day, vat_rate=vat_rate, **row
+            )
+            for (business_id, day, vat_rate), row in rows.items()
+            if any(row.values())
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fiscal', '0002_quarterlyresult_snapshot'),
+        ('invoicing', '0002_invoice_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('vat_rate', models.DecimalField(decimal_places=2, max_digits=5, verbose_name='Tipo de IVA')),
+                ('income_base', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='Base imponible de ingresos')),
+                ('output_vat', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='IVA devengado')),
+                ('withholdings', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='Retenciones IRPF')),
+                ('deductible_expenses', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='Gastos deducibles IRPF')),
+                ('input_vat', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=18, verbose_name='IVA soportado deducible')),
+                ('business_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='invoicing.businessprofile', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Apunte del libro fiscal',
+                'verbose_name_plural': 'Libro fiscal',
+                'ordering': ['date', 'vat_rate'],
+                'constraints': [models.UniqueConstraint(fields=('business_profile', 'date', 'vat_rate'), name='unique_ledger_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fiscal', '0003_ledgerentry'),
+        ('invoicing', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['business_profile', 'date'], name='expense_business_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['business_profile', 'supplier', 'date'], name='expense_supplier_date_idx'),
+        ),
+    ]
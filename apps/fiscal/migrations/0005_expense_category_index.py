@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fiscal', '0004_expense_indexes'),
+        ('invoicing', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['business_profile', 'category', 'date'], name='expense_category_date_idx'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from apps.fiscal.models.expense import ExpenseCategory
 from apps.fiscal.models.expense import VATType
 from apps.fiscal.models.fiscal_year import EstimationType
 from apps.fiscal.models.fiscal_year import FiscalYear
+from apps.fiscal.models.ledger import LedgerEntry
 from apps.fiscal.models.quarter import Quarter
 from apps.fiscal.models.quarter import QuarterNumber
 from apps.fiscal.models.quarterly_result import QuarterlyResult
@@ -12,6 +13,7 @@ __all__ = [
     "ExpenseCategory",
     "Expense",
     "FiscalYear",
+    "LedgerEntry",
     "Quarter",
     "QuarterNumber",
     "QuarterlyResult",
@@ -67,6 +67,19 @@ class Expense(models.Model):
         verbose_name = "Gasto"
         verbose_name_plural = "Gastos"
         ordering = ["-date"]
+        indexes = [
+            models.Index(
+                fields=["business_profile", "date"], name="expense_business_date_idx"
+            ),
+            models.Index(
+                fields=["business_profile", "category", "date"],
+                name="expense_category_date_idx",
+            ),
+            models.Index(
+                fields=["business_profile", "supplier", "date"],
+                name="expense_supplier_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.date} - {self.concept} ({self.taxable_base}€)"
@@ -0,0 +1,53 @@
+from decimal import Decimal
+
+from django.db import models
+
+
+def _amount(verbose_name):
+    # Six decimals keep line-level precision; figures are rounded when read
+    return models.DecimalField(
+        max_digits=18,
+        decimal_places=6,
+        default=Decimal("0"),
+        verbose_name=verbose_name,
+    )
+
+
+class LedgerEntry(models.Model):
+    """Daily fiscal totals of a business for one VAT rate.
+
+    Derived from sent/paid invoice lines and expenses, and kept up to date
+    by ``apps.fiscal.signals``. Never edit rows by hand: rebuild them with
+    ``apps.fiscal.services.ledger.rebuild_ledger``.
+    """
+
+    business_profile = models.ForeignKey(
+        "invoicing.BusinessProfile",
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+        verbose_name="Empresa",
+    )
+    date = models.DateField(verbose_name="Fecha")
+    vat_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, verbose_name="Tipo de IVA"
+    )
+
+    income_base = _amount("Base imponible de ingresos")
+    output_vat = _amount("IVA devengado")
+    withholdings = _amount("Retenciones IRPF")
+    deductible_expenses = _amount("Gastos deducibles IRPF")
+    input_vat = _amount("IVA soportado deducible")
+
+    class Meta:
+        verbose_name = "Apunte del libro fiscal"
+        verbose_name_plural = "Libro fiscal"
+        ordering = ["date", "vat_rate"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["business_profile", "date", "vat_rate"],
+                name="unique_ledger_entry",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.vat_rate}%"
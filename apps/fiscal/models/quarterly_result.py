@@ -41,6 +41,11 @@ class QuarterlyResult(models.Model):
         verbose_name="Modelo 130 presentado",
     )
 
+    # Full 303/130 breakdown frozen when the quarter is closed
+    snapshot = models.JSONField(
+        null=True, blank=True, editable=False, verbose_name="Instantánea al cierre"
+    )
+
     submission_date = models.DateField(
         null=True, blank=True, verbose_name="Fecha de presentación"
     )
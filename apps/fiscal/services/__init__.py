@@ -1,9 +1,19 @@
+from apps.fiscal.services.cached import get_modelo_130
+from apps.fiscal.services.cached import get_modelo_303
+from apps.fiscal.services.cached import get_modelo_347
+from apps.fiscal.services.cached import get_modelo_390
 from apps.fiscal.services.modelo_130 import calculate_modelo_130
 from apps.fiscal.services.modelo_303 import calculate_modelo_303
+from apps.fiscal.services.modelo_347 import calculate_modelo_347
 from apps.fiscal.services.modelo_390 import calculate_modelo_390
 
 __all__ = [
     "calculate_modelo_130",
     "calculate_modelo_303",
+    "calculate_modelo_347",
     "calculate_modelo_390",
+    "get_modelo_130",
+    "get_modelo_303",
+    "get_modelo_347",
+    "get_modelo_390",
 ]
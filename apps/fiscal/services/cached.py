@@ -0,0 +1,98 @@
+"""Modelo results cached under the business data version.
+
+See ``apps.invoicing.services.cache``: any write to invoices, expenses or
+fiscal records of the business bumps the version, so these never serve
+figures older than the data they were computed from. Closed quarters are
+served from their snapshot (``apps.fiscal.services.snapshot``) instead.
+
+The 303 and 130 of a quarter are kept under the ledger version, which
+saving a ``QuarterlyResult`` leaves alone, so saving a quarter's result
+does not discard the figures it was computed from. The only result the
+130 reads, the payments of the earlier quarters, is part of its key.
+"""
+
+from typing import TYPE_CHECKING
+
+from apps.fiscal.services.modelo_130 import calculate_modelo_130
+from apps.fiscal.services.modelo_130 import get_previous_payments
+from apps.fiscal.services.modelo_303 import calculate_modelo_303
+from apps.fiscal.services.modelo_347 import calculate_modelo_347
+from apps.fiscal.services.modelo_390 import calculate_modelo_390
+from apps.fiscal.services.modelo_390 import summarize_modelo_390
+from apps.fiscal.services.snapshot import get_snapshot
+from apps.invoicing.services.cache import get_or_compute
+
+if TYPE_CHECKING:
+    from apps.fiscal.models import FiscalYear
+    from apps.fiscal.models import Quarter
+
+
+def _modelo_key(modelo: str, quarter: "Quarter") -> str:
+    return f"modelo_{modelo}:{quarter.pk}"
+
+
+def get_modelo_303(quarter: "Quarter") -> dict:
+    snapshot = get_snapshot(quarter)
+    if snapshot:
+        return snapshot["modelo_303"]
+    return get_or_compute(
+        quarter.fiscal_year.business_profile_id,
+        _modelo_key("303", quarter),
+        lambda: calculate_modelo_303(quarter),
+        ledger=True,
+    )
+
+
+def get_modelo_130(quarter: "Quarter") -> dict:
+    snapshot = get_snapshot(quarter)
+    if snapshot:
+        return snapshot["modelo_130"]
+    previous_payments = get_previous_payments(quarter)
+    return get_or_compute(
+        quarter.fiscal_year.business_profile_id,
+        f"{_modelo_key('130', quarter)}:{previous_payments}",
+        lambda: calculate_modelo_130(quarter, previous_payments),
+        ledger=True,
+    )
+
+
+def get_modelo_390(fiscal_year: "FiscalYear") -> dict:
+    """Annual summary; closed quarters count with the 303 frozen when closed.
+
+    Later edits to a closed period must not change the figures already
+    filed, so the ledger is only read for the open quarters.
+    """
+    quarters = list(fiscal_year.quarters.select_related("result"))
+    snapshots = {quarter.number: get_snapshot(quarter) for quarter in quarters}
+    if not any(snapshots.values()):
+        return get_or_compute(
+            fiscal_year.business_profile_id,
+            f"modelo_390:{fiscal_year.pk}",
+            lambda: calculate_modelo_390(fiscal_year),
+        )
+
+    def summarize():
+        return summarize_modelo_390(
+            {
+                quarter.number: (
+                    snapshots[quarter.number]["modelo_303"]
+                    if snapshots[quarter.number]
+                    else calculate_modelo_303(quarter)
+                )
+                for quarter in quarters
+            }
+        )
+
+    if all(snapshots.values()):
+        return summarize()
+    return get_or_compute(
+        fiscal_year.business_profile_id, f"modelo_390:{fiscal_year.pk}", summarize
+    )
+
+
+def get_modelo_347(fiscal_year: "FiscalYear") -> dict:
+    return get_or_compute(
+        fiscal_year.business_profile_id,
+        f"modelo_347:{fiscal_year.pk}",
+        lambda: calculate_modelo_347(fiscal_year),
+    )
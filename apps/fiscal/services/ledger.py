@@ -0,0 +1,97 @@
+"""Maintenance of the fiscal ledger (``LedgerEntry``).
+
+The ledger holds one row per business, day and VAT rate with the income
+base, output VAT and withholdings of sent/paid invoices and the
+deductible expenses and input VAT of that day. Writes are incremental:
+signal receivers rebuild only the days touched by a change, from the raw
+documents of those days, so the ledger can never drift.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import models
+from django.db import transaction
+from django.db.models import Q
+from django.db.models import Sum
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import LedgerEntry
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.invoice import line_subtotal_expression
+from apps.invoicing.models.invoice import line_tax_expression
+from apps.invoicing.models.invoice import line_withholding_expression
+
+# Invoices that count for taxes (not draft or cancelled)
+INCOME_STATUSES = [Invoice.Status.SENT, Invoice.Status.PAID]
+
+LEDGER_AMOUNTS = [
+    "income_base",
+    "output_vat",
+    "withholdings",
+    "deductible_expenses",
+    "input_vat",
+]
+
+AMOUNT = models.DecimalField(max_digits=18, decimal_places=6)
+
+
+def _day_rows(business_id, dates):
+    lines = InvoiceLineItem.objects.filter(
+        invoice__business_profile_id=business_id,
+        invoice__status__in=INCOME_STATUSES,
+    )
+    expenses = Expense.objects.filter(business_profile_id=business_id)
+    if dates is not None:
+        lines = lines.filter(invoice__issue_date__in=dates)
+        expenses = expenses.filter(date__in=dates)
+
+    rows = defaultdict(lambda: dict.fromkeys(LEDGER_AMOUNTS, Decimal("0")))
+    for row in (
+        lines.order_by()
+        .values("invoice__issue_date", "tax_rate")
+        .annotate(
+            income_base=Sum(line_subtotal_expression(), output_field=AMOUNT),
+            output_vat=Sum(line_tax_expression(), output_field=AMOUNT),
+            withholdings=Sum(line_withholding_expression(), output_field=AMOUNT),
+        )
+    ):
+        amounts = rows[row["invoice__issue_date"], Decimal(row["tax_rate"])]
+        for field in ("income_base", "output_vat", "withholdings"):
+            amounts[field] += row[field]
+
+    for row in (
+        expenses.order_by()
+        .values("date", "vat_type")
+        .annotate(
+            deductible_expenses=Sum("taxable_base", filter=Q(irpf_deductible=True)),
+            input_vat=Sum("input_vat", filter=Q(vat_deductible=True)),
+        )
+    ):
+        amounts = rows[row["date"], Decimal(row["vat_type"])]
+        for field in ("deductible_expenses", "input_vat"):
+            amounts[field] += row[field] or Decimal("0")
+
+    return rows
+
+
+@transaction.atomic
+def rebuild_ledger(business_id, dates=None):
+    """Recompute the ledger rows of a business for ``dates`` (default: all)."""
+    entries = LedgerEntry.objects.filter(business_profile_id=business_id)
+    if dates is not None:
+        dates = {day for day in dates if day}
+        if not dates:
+            return
+        entries = entries.filter(date__in=dates)
+
+    rows = _day_rows(business_id, dates)
+    entries.delete()
+    LedgerEntry.objects.bulk_create(
+        LedgerEntry(
+            business_profile_id=business_id, date=day, vat_rate=vat_rate, **amounts
+        )
+        for (day, vat_rate), amounts in rows.items()
+        if any(amounts.values())
+    )
@@ -8,9 +8,17 @@ Calcula el pago fraccionado trimestral de IRPF:
 - Se restan retenciones y pagos de trimestres anteriores
 """
 
+from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Round
+
+from apps.invoicing.models.invoice import MONEY
+
 if TYPE_CHECKING:
     from apps.fiscal.models import Quarter
 
@@ -20,13 +28,40 @@ HARD_TO_JUSTIFY_RATE = Decimal("0.05")  # 5%
 IRPF_PAYMENT_RATE = Decimal("0.20")  # 20%
 
 
-def calculate_modelo_130(quarter: "Quarter") -> dict:
+def _money_sum(expression):
+    return Coalesce(
+        Round(Sum(expression, output_field=MONEY), 2),
+        Value(Decimal("0")),
+        output_field=MONEY,
+    )
+
+
+def get_previous_payments(quarter: "Quarter") -> Decimal:
+    """Pagos 130 de los trimestres anteriores del mismo año.
+
+    El importe presentado o, si no lo hay, el calculado.
+    """
+    from apps.fiscal.models import QuarterlyResult
+
+    return QuarterlyResult.objects.filter(
+        quarter__fiscal_year=quarter.fiscal_year_id,
+        quarter__number__lt=quarter.number,
+    ).aggregate(
+        total=_money_sum(Coalesce("modelo_130_submitted", "modelo_130_calculated"))
+    )["total"]
+
+
+def calculate_modelo_130(
+    quarter: "Quarter", previous_payments: Decimal | None = None
+) -> dict:
     """Calcula el modelo 130 (pago fraccionado IRPF).
 
     Es acumulativo: incluye T1..Tn del año.
 
     Args:
         quarter: Trimestre a calcular
+        previous_payments: Pagos de trimestres anteriores, si ya se conocen
+            (por defecto se leen de los resultados guardados)
 
     Returns:
         dict con:
@@ -39,47 +74,47 @@ def calculate_modelo_130(quarter: "Quarter") -> dict:
         - previous_payments: Decimal - Pagos 130 de trimestres anteriores
         - result: Decimal - A ingresar (mínimo 0)
     """
-    from apps.fiscal.models import Expense
-    from apps.invoicing.models import Invoice
+    from apps.fiscal.models import LedgerEntry
 
     fiscal_year = quarter.fiscal_year
     business_profile = fiscal_year.business_profile
-    is_simplified = fiscal_year.estimation_type == "simplified"
 
-    # Obtener todos los trimestres del año hasta el actual (inclusive)
-    quarters = fiscal_year.quarters.filter(number__lte=quarter.number).order_by(
-        "number"
+    # Acumulado desde el 1 de enero hasta el final del trimestre, leído del
+    # libro fiscal (ingresos de facturas enviadas/pagadas, gastos deducibles)
+    year_start = date(fiscal_year.year, 1, 1)
+    _, end_date = quarter.get_date_range()
+    accumulated = LedgerEntry.objects.filter(
+        business_profile=business_profile,
+        date__range=(year_start, end_date),
+    ).aggregate(
+        income=_money_sum("income_base"),
+        withholdings=_money_sum("withholdings"),
+        expenses=_money_sum("deductible_expenses"),
     )
 
-    # Acumular ingresos, retenciones y gastos
-    accumulated_income = Decimal("0")
-    accumulated_withholdings = Decimal("0")
-    accumulated_expenses = Decimal("0")
-
-    for q in quarters:
-        start_date, end_date = q.get_date_range()
-
-        # Income from invoices (only sent/paid)
-        invoices = Invoice.objects.filter(
-            business_profile=business_profile,
-            issue_date__range=(start_date, end_date),
-            status__in=[Invoice.Status.SENT, Invoice.Status.PAID],
-        ).prefetch_related("lines")
-
-        for invoice in invoices:
-            for line in invoice.lines.all():
-                accumulated_income += line.subtotal
-                accumulated_withholdings += line.withholding_amount
-
-        # Expenses (IRPF deductible)
-        expenses = Expense.objects.filter(
-            business_profile=business_profile,
-            date__range=(start_date, end_date),
-            irpf_deductible=True,
-        )
-        for expense in expenses:
-            accumulated_expenses += expense.taxable_base
+    if previous_payments is None:
+        previous_payments = get_previous_payments(quarter)
+
+    return build_modelo_130(
+        accumulated_income=accumulated["income"],
+        accumulated_expenses=accumulated["expenses"],
+        accumulated_withholdings=accumulated["withholdings"],
+        previous_payments=previous_payments,
+        is_simplified=fiscal_year.estimation_type == "simplified",
+    )
 
+
+def build_modelo_130(
+    accumulated_income: Decimal,
+    accumulated_expenses: Decimal,
+    accumulated_withholdings: Decimal,
+    previous_payments: Decimal,
+    is_simplified: bool,
+) -> dict:
+    """Modelo 130 a partir de los importes acumulados, sin consultas.
+
+    Returns the same dict as ``calculate_modelo_130``.
+    """
     # Gastos de difícil justificación (solo estimación simplificada)
     hard_to_justify_expenses = Decimal("0")
     if is_simplified:
@@ -94,15 +129,6 @@ def calculate_modelo_130(quarter: "Quarter") -> dict:
     # Pago bruto (20% del rendimiento neto)
     gross_payment = max(net_income * IRPF_PAYMENT_RATE, Decimal("0"))
 
-    # Pagos de trimestres anteriores del mismo año
-    previous_payments = Decimal("0")
-    previous_quarters = fiscal_year.quarters.filter(number__lt=quarter.number)
-    for prev_q in previous_quarters:
-        if hasattr(prev_q, "result") and prev_q.result.modelo_130_submitted is not None:
-            previous_payments += prev_q.result.modelo_130_submitted
-        elif hasattr(prev_q, "result"):
-            previous_payments += prev_q.result.modelo_130_calculated
-
     # Resultado final (a ingresar, mínimo 0)
     result = max(
         gross_payment - accumulated_withholdings - previous_payments, Decimal("0")
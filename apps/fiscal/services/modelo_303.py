@@ -1,6 +1,7 @@
 """Modelo 303 - Declaración trimestral de IVA.
 
-Calcula el IVA a ingresar o compensar para un trimestre:
+Calcula el IVA a ingresar o compensar para un trimestre a partir del libro
+fiscal (``LedgerEntry``), que agrega facturas y gastos por día y tipo:
 - IVA devengado (repercutido): suma del IVA cobrado en facturas emitidas
 - IVA soportado deducible: suma del IVA pagado en gastos con vat_deductible=True
 - Resultado = IVA devengado - IVA soportado (positivo = a ingresar)
@@ -10,10 +11,39 @@ from collections import defaultdict
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
+from django.db.models import Sum
+from django.db.models.functions import Round
+
+from apps.invoicing.models.invoice import MONEY
+
 if TYPE_CHECKING:
     from apps.fiscal.models import Quarter
 
 
+def ledger_rows(business_profile, start_date, end_date, **group_by):
+    """Importes del libro fiscal por ``vat_rate``: ``base``, ``vat`` e ``input_vat``.
+
+    Extra keyword expressions (e.g. the quarter of the date) are added to
+    the grouping. Each group is rounded to cents.
+    """
+    from apps.fiscal.models import LedgerEntry
+
+    return (
+        LedgerEntry.objects.filter(
+            business_profile=business_profile,
+            date__range=(start_date, end_date),
+        )
+        .order_by()
+        .annotate(**group_by)
+        .values("vat_rate", *group_by)
+        .annotate(
+            base=Round(Sum("income_base", output_field=MONEY), 2),
+            vat=Round(Sum("output_vat", output_field=MONEY), 2),
+            input_vat=Round(Sum("input_vat", output_field=MONEY), 2),
+        )
+    )
+
+
 def calculate_modelo_303(quarter: "Quarter") -> dict:
     """Calcula el modelo 303 (IVA trimestral).
 
@@ -28,41 +58,35 @@ def calculate_modelo_303(quarter: "Quarter") -> dict:
         - total_input_vat: Decimal - Total IVA soportado deducible
         - result: Decimal (positivo = a ingresar, negativo = a compensar)
     """
-    from apps.fiscal.models import Expense
-    from apps.invoicing.models import Invoice
-
     business_profile = quarter.fiscal_year.business_profile
     start_date, end_date = quarter.get_date_range()
 
-    # IVA devengado (de facturas)
+    # Una sola consulta agrupada por tipo sobre el libro fiscal
     output_vat_by_type: dict[int, Decimal] = defaultdict(Decimal)
     taxable_base_by_type: dict[int, Decimal] = defaultdict(Decimal)
-
-    # Only count sent or paid invoices (not draft or cancelled)
-    invoices = Invoice.objects.filter(
-        business_profile=business_profile,
-        issue_date__range=(start_date, end_date),
-        status__in=[Invoice.Status.SENT, Invoice.Status.PAID],
-    ).prefetch_related("lines")
-
-    for invoice in invoices:
-        for line in invoice.lines.all():
-            # Cast Decimal tax_rate to int for grouping (21.00 -> 21)
-            vat_type = int(line.tax_rate)
-            output_vat_by_type[vat_type] += line.tax_amount
-            taxable_base_by_type[vat_type] += line.subtotal
-
-    total_output_vat = sum(output_vat_by_type.values(), Decimal("0"))
-
-    # IVA soportado deducible (de gastos)
     total_input_vat = Decimal("0")
-    expenses = Expense.objects.filter(
-        business_profile=business_profile,
-        date__range=(start_date, end_date),
-        vat_deductible=True,
-    )
-    for expense in expenses:
-        total_input_vat += expense.input_vat
+    for row in ledger_rows(business_profile, start_date, end_date):
+        total_input_vat += row["input_vat"]
+        if not row["base"] and not row["vat"]:
+            continue  # rate used by expenses only
+        # Cast Decimal tax_rate to int for grouping (21.00 -> 21)
+        vat_type = int(row["vat_rate"])
+        output_vat_by_type[vat_type] += row["vat"]
+        taxable_base_by_type[vat_type] += row["base"]
+
+    return build_modelo_303(output_vat_by_type, taxable_base_by_type, total_input_vat)
+
+
+def build_modelo_303(
+    output_vat_by_type: dict[int, Decimal],
+    taxable_base_by_type: dict[int, Decimal],
+    total_input_vat: Decimal,
+) -> dict:
+    """Modelo 303 a partir de los importes por tipo, sin consultas.
+
+    Returns the same dict as ``calculate_modelo_303``.
+    """
+    total_output_vat = sum(output_vat_by_type.values(), Decimal("0"))
 
     # Resultado
     result = total_output_vat - total_input_vat
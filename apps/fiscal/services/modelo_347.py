@@ -0,0 +1,115 @@
+"""Modelo 347 - Declaración anual de operaciones con terceras personas.
+
+Declara, por cada tercero, las operaciones del año que en conjunto superan
+3.005,06€ (IVA incluido), con su desglose trimestral:
+- Clave B (ventas): facturas emitidas (enviadas/pagadas) a cada cliente
+- Clave A (compras): gastos registrados de cada proveedor
+
+Clients are matched by NIF, so duplicated ``Client`` records of the same
+company add up; clients without NIF are kept apart. Expenses only record
+the supplier's name, so suppliers are matched by name (case-insensitive).
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from django.db.models import F
+from django.db.models import Sum
+from django.db.models.functions import ExtractQuarter
+
+from apps.fiscal.services.ledger import INCOME_STATUSES
+from apps.invoicing.models.invoice import MONEY
+from apps.invoicing.models.invoice import Invoice
+
+if TYPE_CHECKING:
+    from apps.fiscal.models import FiscalYear
+
+# Importe anual a partir del cual hay que declarar al tercero
+THRESHOLD = Decimal("3005.06")
+
+
+def _declarable(counterparties: dict) -> list[dict]:
+    rows = []
+    for counterparty in counterparties.values():
+        counterparty["total"] = sum(counterparty["quarters"].values(), Decimal("0"))
+        if counterparty["total"] > THRESHOLD:
+            rows.append(counterparty)
+    rows.sort(key=lambda row: (-row["total"], row["name"]))
+    return rows
+
+
+def _counterparty(tax_id: str, name: str) -> dict:
+    return {
+        "tax_id": tax_id,
+        "name": name,
+        "quarters": dict.fromkeys(range(1, 5), Decimal("0")),
+    }
+
+
+def calculate_modelo_347(fiscal_year: "FiscalYear") -> dict:
+    """Calcula el modelo 347 (operaciones con terceros).
+
+    Una consulta agrupada por cliente y trimestre y otra por proveedor y
+    trimestre.
+
+    Returns:
+        dict con:
+        - sales: list[dict] - Clientes por encima del umbral (clave B)
+        - purchases: list[dict] - Proveedores por encima del umbral (clave A)
+        - threshold: Decimal - Umbral de declaración
+        Each counterparty has ``tax_id``, ``name``, ``quarters`` ({1..4:
+        Decimal}) and ``total``, sorted by total, largest first.
+    """
+    from apps.fiscal.models import Expense
+
+    business_profile = fiscal_year.business_profile
+    year_range = (date(fiscal_year.year, 1, 1), date(fiscal_year.year, 12, 31))
+
+    # Ventas: importe facturado (base + IVA) por cliente y trimestre
+    clients: dict[str, dict] = {}
+    invoice_rows = (
+        Invoice.objects.filter(
+            business_profile=business_profile,
+            issue_date__range=year_range,
+            status__in=INCOME_STATUSES,
+        )
+        .order_by()
+        .values(
+            "client_id",
+            "client__tax_id",
+            "client__name",
+            quarter=ExtractQuarter("issue_date"),
+        )
+        .annotate(amount=Sum(F("subtotal") + F("tax_total"), output_field=MONEY))
+    )
+    for row in invoice_rows:
+        tax_id = row["client__tax_id"].strip().upper()
+        key = tax_id or f"client:{row['client_id']}"
+        if key not in clients:
+            clients[key] = _counterparty(tax_id, row["client__name"])
+        clients[key]["quarters"][row["quarter"]] += row["amount"]
+
+    # Compras: importe de los gastos (base + IVA) por proveedor y trimestre
+    suppliers: dict[str, dict] = {}
+    expense_rows = (
+        Expense.objects.filter(
+            business_profile=business_profile, date__range=year_range
+        )
+        .exclude(supplier="")
+        .order_by()
+        .values("supplier", quarter=ExtractQuarter("date"))
+        .annotate(amount=Sum(F("taxable_base") + F("input_vat"), output_field=MONEY))
+    )
+    for row in expense_rows:
+        name = row["supplier"].strip()
+        key = name.casefold()
+        if key not in suppliers:
+            suppliers[key] = _counterparty("", name)
+        suppliers[key]["quarters"][row["quarter"]] += row["amount"]
+
+    return {
+        "sales": _declarable(clients),
+        "purchases": _declarable(suppliers),
+        "threshold": THRESHOLD,
+    }
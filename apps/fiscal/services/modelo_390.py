@@ -4,10 +4,13 @@ Resume la actividad de IVA de todo el año fiscal.
 """
 
 from collections import defaultdict
+from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
-from apps.fiscal.services.modelo_303 import calculate_modelo_303
+from django.db.models.functions import ExtractQuarter
+
+from apps.fiscal.services.modelo_303 import ledger_rows
 
 if TYPE_CHECKING:
     from apps.fiscal.models import FiscalYear
@@ -16,7 +19,7 @@ if TYPE_CHECKING:
 def calculate_modelo_390(fiscal_year: "FiscalYear") -> dict:
     """Calcula el modelo 390 (resumen anual IVA).
 
-    Suma de los 4 trimestres.
+    Desglose por trimestre y tipo de IVA calculado de una vez para todo el año.
 
     Args:
         fiscal_year: Año fiscal a calcular
@@ -29,31 +32,49 @@ def calculate_modelo_390(fiscal_year: "FiscalYear") -> dict:
         - vat_breakdown: list[dict] - Desglose por tipo de IVA
         - quarters_detail: list[dict] - Detalle por trimestre
     """
-    total_output_vat = Decimal("0")
-    total_input_vat = Decimal("0")
-    quarters_detail = []
+    business_profile = fiscal_year.business_profile
+    year_start = date(fiscal_year.year, 1, 1)
+    year_end = date(fiscal_year.year, 12, 31)
 
-    # Aggregate by VAT type across all quarters
+    # Libro fiscal agrupado por trimestre y tipo, en una sola consulta
+    output_vat_by_quarter: dict[int, Decimal] = defaultdict(Decimal)
+    input_vat_by_quarter: dict[int, Decimal] = defaultdict(Decimal)
     taxable_base_by_type: dict[int, Decimal] = defaultdict(Decimal)
     output_vat_by_type: dict[int, Decimal] = defaultdict(Decimal)
+    rows = ledger_rows(
+        business_profile,
+        year_start,
+        year_end,
+        quarter=ExtractQuarter("date"),
+    )
+    quarter_numbers = set(
+        fiscal_year.quarters.order_by().values_list("number", flat=True)
+    )
+    for row in rows:
+        if row["quarter"] not in quarter_numbers:
+            continue
+        input_vat_by_quarter[row["quarter"]] += row["input_vat"]
+        if not row["base"] and not row["vat"]:
+            continue  # rate used by expenses only
+        vat_type = int(row["vat_rate"])
+        output_vat_by_quarter[row["quarter"]] += row["vat"]
+        taxable_base_by_type[vat_type] += row["base"]
+        output_vat_by_type[vat_type] += row["vat"]
 
-    for quarter in fiscal_year.quarters.order_by("number"):
-        q_result = calculate_modelo_303(quarter)
-        total_output_vat += q_result["total_output_vat"]
-        total_input_vat += q_result["total_input_vat"]
-
-        # Aggregate VAT breakdown
-        for vat_type, base in q_result["taxable_base_by_type"].items():
-            taxable_base_by_type[vat_type] += base
-        for vat_type, vat in q_result["output_vat_by_type"].items():
-            output_vat_by_type[vat_type] += vat
-
+    total_output_vat = Decimal("0")
+    total_input_vat = Decimal("0")
+    quarters_detail = []
+    for number in sorted(quarter_numbers):
+        output_vat = output_vat_by_quarter[number]
+        input_vat = input_vat_by_quarter[number]
+        total_output_vat += output_vat
+        total_input_vat += input_vat
         quarters_detail.append(
             {
-                "quarter": quarter.number,
-                "output_vat": q_result["total_output_vat"],
-                "input_vat": q_result["total_input_vat"],
-                "result": q_result["result"],
+                "quarter": number,
+                "output_vat": output_vat,
+                "input_vat": input_vat,
+                "result": output_vat - input_vat,
             }
         )
 
@@ -75,3 +96,44 @@ def calculate_modelo_390(fiscal_year: "FiscalYear") -> dict:
         "vat_breakdown": vat_breakdown,
         "quarters_detail": quarters_detail,
     }
+
+
+def summarize_modelo_390(quarterly_303: dict[int, dict]) -> dict:
+    """Modelo 390 a partir de los 303 de cada trimestre ({número: resultado}).
+
+    Used for years with closed quarters, which count with their snapshots.
+    """
+    taxable_base_by_type: dict[int, Decimal] = defaultdict(Decimal)
+    output_vat_by_type: dict[int, Decimal] = defaultdict(Decimal)
+    quarters_detail = []
+    for number in sorted(quarterly_303):
+        q_result = quarterly_303[number]
+        for vat_type, base in q_result["taxable_base_by_type"].items():
+            taxable_base_by_type[vat_type] += base
+        for vat_type, vat in q_result["output_vat_by_type"].items():
+            output_vat_by_type[vat_type] += vat
+        quarters_detail.append(
+            {
+                "quarter": number,
+                "output_vat": q_result["total_output_vat"],
+                "input_vat": q_result["total_input_vat"],
+                "result": q_result["result"],
+            }
+        )
+
+    total_output_vat = sum((q["output_vat"] for q in quarters_detail), Decimal("0"))
+    total_input_vat = sum((q["input_vat"] for q in quarters_detail), Decimal("0"))
+    return {
+        "total_output_vat": total_output_vat,
+        "total_input_vat": total_input_vat,
+        "result": total_output_vat - total_input_vat,
+        "vat_breakdown": [
+            {
+                "type": vat_type,
+                "base": taxable_base_by_type[vat_type],
+                "vat": output_vat_by_type[vat_type],
+            }
+            for vat_type in sorted(taxable_base_by_type, reverse=True)
+        ],
+        "quarters_detail": quarters_detail,
+    }
@@ -0,0 +1,146 @@
+"""Bulk recalculation of ``QuarterlyResult`` across businesses and years.
+
+Each fiscal year is one task: its quarters are computed in order, since
+the 130 of a quarter subtracts the payments of the previous ones. Tasks
+run on a pool of spawned processes (each one sets Django up) and only
+return figures; the parent writes them with one upsert per batch.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from decimal import Decimal
+
+import django
+from django.db import connections
+from django.utils import timezone
+
+from apps.fiscal.services.snapshot import dump_snapshot
+from apps.invoicing.services.cache import bump_data_version
+
+# Results written per upsert
+WRITE_BATCH_SIZE = 500
+
+
+def recalculate_fiscal_year(fiscal_year_id, quarter_ids=None, include_closed=False):
+    """Compute the 303/130 results of a fiscal year without saving them.
+
+    Returns ``(business_id, [(quarter_id, closed, modelo_303, modelo_130)])``
+    with the full modelo dicts of the selected quarters (default: all).
+    Closed quarters keep their frozen figures unless ``include_closed``
+    is set, in which case their snapshot is recomputed too.
+    """
+    from apps.fiscal.models import FiscalYear
+    from apps.fiscal.services.modelo_130 import calculate_modelo_130
+    from apps.fiscal.services.modelo_303 import calculate_modelo_303
+
+    fiscal_year = FiscalYear.objects.select_related("business_profile").get(
+        pk=fiscal_year_id
+    )
+    results = []
+    previous_payments = Decimal("0")
+    for quarter in fiscal_year.quarters.select_related("result").order_by("number"):
+        stored = getattr(quarter, "result", None)
+        selected = quarter_ids is None or quarter.pk in quarter_ids
+        if selected and (include_closed or not quarter.closed):
+            modelo_303 = calculate_modelo_303(quarter)
+            modelo_130 = calculate_modelo_130(quarter, previous_payments)
+            results.append((quarter.pk, quarter.closed, modelo_303, modelo_130))
+            paid = modelo_130["result"]
+        else:
+            paid = stored.modelo_130_calculated if stored else Decimal("0")
+        if stored and stored.modelo_130_submitted is not None:
+            paid = stored.modelo_130_submitted
+        previous_payments += paid
+    return fiscal_year.business_profile_id, results
+
+
+def _write_results(rows):
+    from apps.fiscal.models import QuarterlyResult
+
+    now = timezone.now()
+    for closed in (False, True):
+        update_fields = ["modelo_303_calculated", "modelo_130_calculated", "updated_at"]
+        if closed:
+            update_fields.append("snapshot")
+        objs = [
+            QuarterlyResult(
+                quarter_id=quarter_id,
+                modelo_303_calculated=modelo_303["result"],
+                modelo_130_calculated=modelo_130["result"],
+                snapshot=(dump_snapshot(modelo_303, modelo_130) if is_closed else None),
+                created_at=now,
+                updated_at=now,
+            )
+            for quarter_id, is_closed, modelo_303, modelo_130 in rows
+            if is_closed == closed
+        ]
+        if objs:
+            QuarterlyResult.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=["quarter"],
+                update_fields=update_fields,
+            )
+
+
+def recalculate_results(
+    fiscal_year_ids,
+    quarter_ids=None,
+    include_closed=False,
+    workers=None,
+    progress=None,
+):
+    """Recompute and save the results of many fiscal years in parallel.
+
+    ``workers`` defaults to the number of CPUs; 0 computes in-process.
+    ``progress(done, total)`` is called after each fiscal year. Returns the
+    number of quarters written.
+    """
+    fiscal_year_ids = list(fiscal_year_ids)
+    if quarter_ids is not None:
+        quarter_ids = set(quarter_ids)
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(fiscal_year_ids))
+    args = [(pk, quarter_ids, include_closed) for pk in fiscal_year_ids]
+
+    pending = []
+    businesses = set()
+    written = 0
+
+    def collect(business_id, rows):
+        nonlocal written
+        businesses.add(business_id)
+        pending.extend(rows)
+        if len(pending) >= WRITE_BATCH_SIZE:
+            _write_results(pending)
+            written += len(pending)
+            pending.clear()
+
+    if workers == 0:
+        for done, task in enumerate(args, start=1):
+            collect(*recalculate_fiscal_year(*task))
+            if progress:
+                progress(done, len(args))
+    else:
+        # Workers open their own connections; never share the parent's
+        connections.close_all()
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            futures = [executor.submit(recalculate_fiscal_year, *task) for task in args]
+            for done, future in enumerate(as_completed(futures), start=1):
+                collect(*future.result())
+                if progress:
+                    progress(done, len(args))
+
+    if pending:
+        _write_results(pending)
+        written += len(pending)
+    # bulk_create skips the save signals that bump the data version
+    for business_id in businesses:
+        bump_data_version(business_id, ledger=False)
+    return written
@@ -0,0 +1,92 @@
+"""What-if simulation of Modelo 303 and 130 for a quarter.
+
+``QuarterSimulator`` loads the quarter's aggregated figures once (through
+the cached modelo getters) and then applies hypothetical invoices and
+expenses in memory, rebuilding the modelos with the same pure functions
+the real calculation uses. A scenario is a handful of Decimal operations
+and never touches the database, so it can run on every slider move.
+
+Hypothetical invoices are dicts with ``base``, ``vat_rate`` and
+optionally ``withholding_rate``; expenses have ``base``, ``vat_rate`` and
+optionally ``irpf_deductible`` / ``vat_deductible`` (both default True),
+mirroring the fields of ``InvoiceLineItem`` and ``Expense``.
+"""
+
+from decimal import ROUND_HALF_UP
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from apps.fiscal.services.cached import get_modelo_130
+from apps.fiscal.services.cached import get_modelo_303
+from apps.fiscal.services.modelo_130 import build_modelo_130
+from apps.fiscal.services.modelo_303 import build_modelo_303
+from apps.invoicing.models.invoice import CENT
+
+if TYPE_CHECKING:
+    from apps.fiscal.models import Quarter
+
+PERCENT = Decimal("100")
+
+
+def _percent(amount: Decimal, rate) -> Decimal:
+    return (amount * Decimal(rate) / PERCENT).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class QuarterSimulator:
+    def __init__(self, quarter: "Quarter"):
+        self.quarter = quarter
+        self.is_simplified = quarter.fiscal_year.estimation_type == "simplified"
+        self.modelo_303 = get_modelo_303(quarter)
+        self.modelo_130 = get_modelo_130(quarter)
+
+    def simulate(self, invoices=(), expenses=()) -> dict:
+        """Modelos del trimestre añadiendo facturas y gastos hipotéticos.
+
+        Returns ``modelo_303`` and ``modelo_130`` (same dicts as the real
+        calculation) plus ``difference_303`` / ``difference_130`` against
+        the current figures.
+        """
+        output_vat_by_type = dict(self.modelo_303["output_vat_by_type"])
+        taxable_base_by_type = dict(self.modelo_303["taxable_base_by_type"])
+        total_input_vat = self.modelo_303["total_input_vat"]
+        income = expenses_total = withholdings = Decimal("0")
+
+        for invoice in invoices:
+            base = Decimal(invoice["base"])
+            vat_rate = Decimal(invoice["vat_rate"])
+            # Keyed like calculate_modelo_303 keys the fiscal ledger rates
+            vat_type = int(vat_rate)
+            taxable_base_by_type[vat_type] = (
+                taxable_base_by_type.get(vat_type, Decimal("0")) + base
+            )
+            output_vat_by_type[vat_type] = output_vat_by_type.get(
+                vat_type, Decimal("0")
+            ) + _percent(base, vat_rate)
+            income += base
+            withholdings += _percent(base, invoice.get("withholding_rate", 0))
+
+        for expense in expenses:
+            base = Decimal(expense["base"])
+            if expense.get("vat_deductible", True):
+                total_input_vat += _percent(base, expense["vat_rate"])
+            if expense.get("irpf_deductible", True):
+                expenses_total += base
+
+        modelo_303 = build_modelo_303(
+            output_vat_by_type, taxable_base_by_type, total_input_vat
+        )
+        modelo_130 = build_modelo_130(
+            accumulated_income=self.modelo_130["accumulated_income"] + income,
+            accumulated_expenses=self.modelo_130["accumulated_expenses"]
+            + expenses_total,
+            accumulated_withholdings=self.modelo_130["accumulated_withholdings"]
+            + withholdings,
+            previous_payments=self.modelo_130["previous_payments"],
+            is_simplified=self.is_simplified,
+        )
+        return {
+            "modelo_303": modelo_303,
+            "modelo_130": modelo_130,
+            "difference_303": modelo_303["result"] - self.modelo_303["result"],
+            "difference_130": modelo_130["result"] - self.modelo_130["result"],
+        }
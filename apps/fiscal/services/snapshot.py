@@ -0,0 +1,103 @@
+"""Frozen modelo figures for closed quarters.
+
+Closing a quarter stores its full 303 and 130 breakdown in
+``QuarterlyResult.snapshot``; from then on the quarter is served from the
+snapshot and never rescanned. Reopening drops it, recomputing replaces it.
+
+Snapshots only hold numbers: Decimals are stored as strings and the
+integer VAT type keys come back as ints when loaded.
+"""
+
+from decimal import Decimal
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.fiscal.services.modelo_130 import calculate_modelo_130
+from apps.fiscal.services.modelo_303 import calculate_modelo_303
+
+if TYPE_CHECKING:
+    from apps.fiscal.models import Quarter
+
+
+def _dump(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, dict):
+        return {str(key): _dump(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return value
+
+
+def _load(value):
+    if isinstance(value, str):
+        return Decimal(value)
+    if isinstance(value, dict):
+        return {
+            int(key) if key.isdigit() else key: _load(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_load(item) for item in value]
+    return value
+
+
+def dump_snapshot(modelo_303: dict, modelo_130: dict) -> dict:
+    return _dump({"modelo_303": modelo_303, "modelo_130": modelo_130})
+
+
+def get_snapshot(quarter: "Quarter") -> dict | None:
+    """``{"modelo_303": ..., "modelo_130": ...}`` of a closed quarter, or None."""
+    from apps.fiscal.models import QuarterlyResult
+
+    if not quarter.closed:
+        return None
+    try:
+        snapshot = quarter.result.snapshot
+    except QuarterlyResult.DoesNotExist:
+        return None
+    return _load(snapshot) if snapshot else None
+
+
+def freeze_quarter(quarter: "Quarter"):
+    """Compute the modelos from the raw data and store them as the snapshot."""
+    from apps.fiscal.models import QuarterlyResult
+
+    modelo_303 = calculate_modelo_303(quarter)
+    modelo_130 = calculate_modelo_130(quarter)
+    result, _ = QuarterlyResult.objects.update_or_create(
+        quarter=quarter,
+        defaults={
+            "modelo_303_calculated": modelo_303["result"],
+            "modelo_130_calculated": modelo_130["result"],
+            "snapshot": dump_snapshot(modelo_303, modelo_130),
+        },
+    )
+    quarter.result = result
+    return result
+
+
+@transaction.atomic
+def close_quarter(quarter: "Quarter"):
+    freeze_quarter(quarter)
+    quarter.closed = True
+    quarter.closing_date = timezone.now().date()
+    quarter.save()
+
+
+@transaction.atomic
+def reopen_quarter(quarter: "Quarter"):
+    from apps.fiscal.models import QuarterlyResult
+
+    try:
+        result = quarter.result
+    except QuarterlyResult.DoesNotExist:
+        result = None
+    if result is not None:
+        result.snapshot = None
+        result.save()
+    quarter.closed = False
+    quarter.closing_date = None
+    quarter.save()
@@ -0,0 +1,107 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.models import Quarter
+from apps.fiscal.models import QuarterlyResult
+from apps.fiscal.services.ledger import INCOME_STATUSES
+from apps.fiscal.services.ledger import rebuild_ledger
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.services.cache import bump_data_version
+from apps.invoicing.signals import is_cascade
+
+
+def get_business_id(instance):
+    if isinstance(instance, QuarterlyResult):
+        instance = instance.quarter
+    if isinstance(instance, Quarter):
+        instance = instance.fiscal_year
+    return instance.business_profile_id
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=FiscalYear)
+@receiver(post_save, sender=Quarter)
+@receiver(post_save, sender=QuarterlyResult)
+def bump_version_on_save(sender, instance, **kwargs):
+    # Results are computed from the ledger, not part of it
+    ledger = sender is not QuarterlyResult
+    bump_data_version(get_business_id(instance), ledger=ledger)
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=FiscalYear)
+@receiver(post_delete, sender=Quarter)
+@receiver(post_delete, sender=QuarterlyResult)
+def bump_version_on_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, sender):
+        ledger = sender is not QuarterlyResult
+        bump_data_version(get_business_id(instance), ledger=ledger)
+
+
+# Fiscal ledger: rebuild the days touched by each write
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoice_ledger_state(sender, instance, **kwargs):
+    instance._ledger_state = (
+        Invoice.objects.filter(pk=instance.pk)
+        .values_list("issue_date", "status")
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Invoice)
+def update_ledger_on_invoice_save(sender, instance, created, **kwargs):
+    old = getattr(instance, "_ledger_state", None)
+    if created or old is None:
+        return  # no lines yet
+    old_date, old_status = old
+    counted = old_status in INCOME_STATUSES, instance.status in INCOME_STATUSES
+    if not any(counted):
+        return
+    if counted[0] != counted[1] or str(old_date) != str(instance.issue_date):
+        rebuild_ledger(instance.business_profile_id, {old_date, instance.issue_date})
+
+
+@receiver(post_delete, sender=Invoice)
+def update_ledger_on_invoice_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, Invoice) and instance.status in INCOME_STATUSES:
+        rebuild_ledger(instance.business_profile_id, {instance.issue_date})
+
+
+@receiver(post_save, sender=InvoiceLineItem)
+@receiver(post_delete, sender=InvoiceLineItem)
+def update_ledger_on_line_change(sender, instance, origin=None, **kwargs):
+    if origin is not None and is_cascade(origin, InvoiceLineItem):
+        return
+    invoice = instance.invoice
+    if invoice.status in INCOME_STATUSES:
+        rebuild_ledger(invoice.business_profile_id, {invoice.issue_date})
+
+
+@receiver(pre_save, sender=Expense)
+def remember_expense_date(sender, instance, **kwargs):
+    instance._ledger_date = (
+        Expense.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Expense)
+def update_ledger_on_expense_save(sender, instance, **kwargs):
+    dates = {instance.date, getattr(instance, "_ledger_date", None)}
+    rebuild_ledger(instance.business_profile_id, dates)
+
+
+@receiver(post_delete, sender=Expense)
+def update_ledger_on_expense_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, Expense):
+        rebuild_ledger(instance.business_profile_id, {instance.date})
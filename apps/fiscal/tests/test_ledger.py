@@ -0,0 +1,118 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import LedgerEntry
+from apps.fiscal.services.ledger import rebuild_ledger
+from apps.invoicing.models import BusinessProfile
+from apps.invoicing.models import Client
+from apps.invoicing.models import Invoice
+from apps.invoicing.models import InvoiceLineItem
+
+
+class LedgerTest(TestCase):
+    def setUp(self):
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        self.client = Client.objects.create(business_profile=self.business, name="C")
+        self.invoice = Invoice.objects.create(
+            business_profile=self.business,
+            client=self.client,
+            number="F-2026-001",
+            status=Invoice.Status.DRAFT,
+            issue_date=date(2026, 2, 15),
+        )
+        self.line = InvoiceLineItem.objects.create(
+            invoice=self.invoice,
+            description="Service",
+            unit_price=Decimal("1000.00"),
+            tax_rate=Decimal("21.00"),
+            withholding_rate=Decimal("15.00"),
+        )
+
+    def entries(self):
+        return {
+            (entry.date, entry.vat_rate): (
+                entry.income_base,
+                entry.output_vat,
+                entry.withholdings,
+                entry.deductible_expenses,
+                entry.input_vat,
+            )
+            for entry in LedgerEntry.objects.filter(business_profile=self.business)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.entries()
+        rebuild_ledger(self.business.pk)
+        self.assertEqual(incremental, self.entries())
+
+    def test_invoice_status_and_date_changes(self):
+        self.assertEqual(self.entries(), {})
+
+        self.invoice.status = Invoice.Status.SENT
+        self.invoice.save()
+        self.assertEqual(
+            self.entries()[date(2026, 2, 15), Decimal("21")][:3],
+            (Decimal("1000"), Decimal("210"), Decimal("150")),
+        )
+
+        self.invoice.issue_date = date(2026, 4, 1)
+        self.invoice.save()
+        self.assertEqual(list(self.entries()), [(date(2026, 4, 1), Decimal("21"))])
+
+        self.line.quantity = Decimal("2")
+        self.line.save()
+        self.assertMatchesRebuild()
+
+        self.invoice.status = Invoice.Status.CANCELLED
+        self.invoice.save()
+        self.assertEqual(self.entries(), {})
+
+    def test_invoice_delete(self):
+        self.invoice.status = Invoice.Status.PAID
+        self.invoice.save()
+        self.invoice.delete()
+        self.assertEqual(self.entries(), {})
+
+    def test_expenses(self):
+        self.invoice.status = Invoice.Status.SENT
+        self.invoice.save()
+        expense = Expense.objects.create(
+            business_profile=self.business,
+            date=date(2026, 2, 15),
+            concept="Software",
+            taxable_base=Decimal("100.00"),
+        )
+        Expense.objects.create(
+            business_profile=self.business,
+            date=date(2026, 2, 15),
+            concept="Lunch",
+            taxable_base=Decimal("50.00"),
+            vat_type=10,
+            irpf_deductible=False,
+            vat_deductible=False,
+        )
+        self.assertEqual(
+            self.entries()[date(2026, 2, 15), Decimal("21")][3:],
+            (Decimal("100"), Decimal("21")),
+        )
+        self.assertNotIn((date(2026, 2, 15), Decimal("10")), self.entries())
+
+        expense.date = date(2026, 3, 1)
+        expense.save()
+        self.assertMatchesRebuild()
+        expense.delete()
+        self.assertEqual(list(self.entries()), [(date(2026, 2, 15), Decimal("21"))])
+
+    def test_rebuild_command(self):
+        self.invoice.status = Invoice.Status.SENT
+        self.invoice.save()
+        expected = self.entries()
+        LedgerEntry.objects.all().delete()
+
+        call_command("rebuild_fiscal_ledger", stdout=io.StringIO())
+        self.assertEqual(self.entries(), expected)
@@ -0,0 +1,126 @@
+import io
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.models import QuarterlyResult
+from apps.fiscal.services import calculate_modelo_130
+from apps.fiscal.services import calculate_modelo_303
+from apps.fiscal.services.recalculate import recalculate_results
+from apps.fiscal.services.snapshot import close_quarter
+from apps.invoicing.models import BusinessProfile
+from apps.invoicing.models import Client
+from apps.invoicing.models import Invoice
+from apps.invoicing.models import InvoiceLineItem
+
+
+class RecalculateResultsTest(TestCase):
+    def setUp(self):
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        self.client = Client.objects.create(business_profile=self.business, name="C")
+        self.fy = FiscalYear.objects.create(business_profile=self.business, year=2026)
+        self.fy.create_quarters()
+        for month in (2, 5, 8):
+            self.add_invoice(date(2026, month, 1), Decimal("4000.00"))
+
+    def add_invoice(self, issue_date, price):
+        invoice = Invoice.objects.create(
+            business_profile=self.business,
+            client=self.client,
+            number=f"F-{issue_date}",
+            status=Invoice.Status.SENT,
+            issue_date=issue_date,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=price,
+            withholding_rate=Decimal("7.00"),
+        )
+
+    def serial_results(self):
+        """Reference: quarters saved one by one, in order."""
+        expected = {}
+        for quarter in self.fy.quarters.order_by("number"):
+            QuarterlyResult.objects.update_or_create(
+                quarter=quarter,
+                defaults={
+                    "modelo_303_calculated": calculate_modelo_303(quarter)["result"],
+                    "modelo_130_calculated": calculate_modelo_130(quarter)["result"],
+                },
+            )
+        for result in QuarterlyResult.objects.filter(quarter__fiscal_year=self.fy):
+            expected[result.quarter_id] = (
+                result.modelo_303_calculated,
+                result.modelo_130_calculated,
+            )
+        QuarterlyResult.objects.all().delete()
+        return expected
+
+    def stored_results(self):
+        return {
+            result.quarter_id: (
+                result.modelo_303_calculated,
+                result.modelo_130_calculated,
+            )
+            for result in QuarterlyResult.objects.filter(quarter__fiscal_year=self.fy)
+        }
+
+    def test_matches_serial_calculation(self):
+        expected = self.serial_results()
+        progress = []
+        written = recalculate_results(
+            [self.fy.pk], workers=0, progress=lambda *args: progress.append(args)
+        )
+        self.assertEqual(written, 4)
+        self.assertEqual(self.stored_results(), expected)
+        self.assertEqual(progress, [(1, 1)])
+
+    def test_closed_quarters_keep_frozen_figures(self):
+        q1 = self.fy.quarters.get(number=1)
+        close_quarter(q1)
+        frozen = q1.result.modelo_130_calculated
+        self.add_invoice(date(2026, 3, 1), Decimal("1000.00"))
+
+        recalculate_results([self.fy.pk], workers=0)
+        q1.result.refresh_from_db()
+        self.assertEqual(q1.result.modelo_130_calculated, frozen)
+
+        recalculate_results([self.fy.pk], workers=0, include_closed=True)
+        q1.result.refresh_from_db()
+        self.assertGreater(q1.result.modelo_130_calculated, frozen)
+        self.assertEqual(
+            Decimal(q1.result.snapshot["modelo_130"]["result"]),
+            q1.result.modelo_130_calculated,
+        )
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("recalculate_fiscal_results", workers=0, stdout=out)
+        self.assertIn("Guardados 4 resultados", out.getvalue())
+
+    def test_admin_actions_compute_in_process(self):
+        User.objects.create_superuser("admin", password="test")
+        browser = self.client_class()  # self.client is the invoiced client
+        browser.login(username="admin", password="test")
+        q1 = self.fy.quarters.get(number=1)
+        with mock.patch(
+            "apps.fiscal.services.recalculate.ProcessPoolExecutor",
+            side_effect=AssertionError("no process pool in a request"),
+        ):
+            browser.post(
+                "/room/fiscal/quarter/",
+                {"action": "calculate_and_save_result", "_selected_action": [q1.pk]},
+            )
+            browser.post(
+                "/room/fiscal/fiscalyear/",
+                {"action": "recalculate_results", "_selected_action": [self.fy.pk]},
+            )
+        self.assertEqual(
+            QuarterlyResult.objects.filter(quarter__fiscal_year=self.fy).count(), 4
+        )
@@ -7,9 +7,17 @@ from django.test import TestCase
 from apps.fiscal.models import Expense
 from apps.fiscal.models import ExpenseCategory
 from apps.fiscal.models import FiscalYear
+from apps.fiscal.models import QuarterlyResult
 from apps.fiscal.models import VATType
 from apps.fiscal.services import calculate_modelo_130
 from apps.fiscal.services import calculate_modelo_303
+from apps.fiscal.services import calculate_modelo_347
+from apps.fiscal.services import calculate_modelo_390
+from apps.fiscal.services import get_modelo_303
+from apps.fiscal.services import get_modelo_347
+from apps.fiscal.services import get_modelo_390
+from apps.fiscal.services.snapshot import close_quarter
+from apps.fiscal.services.snapshot import reopen_quarter
 from apps.invoicing.models import BusinessMembership
 from apps.invoicing.models import BusinessProfile
 from apps.invoicing.models import Client
@@ -100,6 +108,42 @@ class Modelo303Test(TestCase):
         result = calculate_modelo_303(self.q1)
         self.assertEqual(result["total_output_vat"], Decimal("0"))
 
+    def test_modelo_303_groups_by_rate_in_few_queries(self):
+        for n in range(3):
+            invoice = Invoice.objects.create(
+                business_profile=self.business,
+                client=self.client,
+                number=f"F-2026-00{n}",
+                status=Invoice.Status.PAID,
+                issue_date=date(2026, 3, 1),
+            )
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Service",
+                quantity=Decimal("3"),
+                unit_price=Decimal("33.33"),
+                discount_percent=Decimal("10"),
+                tax_rate=Decimal("21.00"),
+            )
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Books",
+                quantity=1,
+                unit_price=Decimal("50.00"),
+                tax_rate=Decimal("4.00"),
+            )
+
+        with self.assertNumQueries(1):
+            result = calculate_modelo_303(self.q1)
+        self.assertEqual(
+            result["taxable_base_by_type"],
+            {21: Decimal("269.97"), 4: Decimal("150.00")},
+        )
+        self.assertEqual(
+            result["output_vat_by_type"], {21: Decimal("56.69"), 4: Decimal("6.00")}
+        )
+        self.assertEqual([row["type"] for row in result["vat_breakdown"]], [21, 4])
+
 
 class Modelo130Test(TestCase):
     def setUp(self):
@@ -169,3 +213,270 @@ class Modelo130Test(TestCase):
         self.assertEqual(result["gross_payment"], Decimal("170.00"))
         # result = max(170 - 150, 0) = 20
         self.assertEqual(result["result"], Decimal("20.00"))
+
+    def test_modelo_130_accumulates_year_in_constant_queries(self):
+        for month, price in [(2, "1000.00"), (5, "2000.00"), (8, "3000.00")]:
+            invoice = Invoice.objects.create(
+                business_profile=self.business,
+                client=self.client,
+                number=f"F-2026-00{month}",
+                status=Invoice.Status.PAID,
+                issue_date=date(2026, month, 10),
+            )
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Service",
+                quantity=1,
+                unit_price=Decimal(price),
+                withholding_rate=Decimal("15.00"),
+            )
+        QuarterlyResult.objects.create(
+            quarter=self.q1,
+            modelo_130_calculated=Decimal("30.00"),
+            modelo_130_submitted=Decimal("40.00"),
+        )
+        QuarterlyResult.objects.create(
+            quarter=self.fy.quarters.get(number=2),
+            modelo_130_calculated=Decimal("60.00"),
+        )
+        q3 = self.fy.quarters.get(number=3)
+
+        with self.assertNumQueries(2):
+            result = calculate_modelo_130(q3)
+        self.assertEqual(result["accumulated_income"], Decimal("6000.00"))
+        self.assertEqual(result["accumulated_withholdings"], Decimal("900.00"))
+        self.assertEqual(result["previous_payments"], Decimal("100.00"))
+        # gross = (6000 - 300) * 0.20 = 1140; result = 1140 - 900 - 100
+        self.assertEqual(result["result"], Decimal("140.00"))
+
+
+class Modelo390Test(TestCase):
+    def setUp(self):
+        self.business = BusinessProfile.objects.create(
+            name="Test Business",
+            tax_id="B12345678",
+        )
+        self.client = Client.objects.create(
+            business_profile=self.business,
+            name="Test Client",
+        )
+        self.fy = FiscalYear.objects.create(business_profile=self.business, year=2026)
+        self.fy.create_quarters()
+        for n, (month, rate) in enumerate([(1, "21"), (2, "10"), (7, "21"), (11, "4")]):
+            invoice = Invoice.objects.create(
+                business_profile=self.business,
+                client=self.client,
+                number=f"F-2026-00{n}",
+                status=Invoice.Status.SENT,
+                issue_date=date(2026, month, 20),
+            )
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Service",
+                quantity=Decimal("1.5"),
+                unit_price=Decimal("99.99"),
+                tax_rate=Decimal(rate),
+            )
+        for month in (3, 8):
+            Expense.objects.create(
+                business_profile=self.business,
+                date=date(2026, month, 1),
+                concept="Software",
+                taxable_base=Decimal("40.00"),
+            )
+
+    def test_modelo_390_matches_quarterly_303(self):
+        with self.assertNumQueries(2):
+            result = calculate_modelo_390(self.fy)
+
+        quarterly = [calculate_modelo_303(q) for q in self.fy.quarters.all()]
+        self.assertEqual(
+            result["quarters_detail"],
+            [
+                {
+                    "quarter": number,
+                    "output_vat": q["total_output_vat"],
+                    "input_vat": q["total_input_vat"],
+                    "result": q["result"],
+                }
+                for number, q in enumerate(quarterly, start=1)
+            ],
+        )
+        self.assertEqual(
+            result["total_output_vat"],
+            sum(q["total_output_vat"] for q in quarterly),
+        )
+        self.assertEqual([row["type"] for row in result["vat_breakdown"]], [21, 10, 4])
+        self.assertEqual(result["vat_breakdown"][0]["base"], Decimal("299.98"))
+
+
+class Modelo347Test(TestCase):
+    def setUp(self):
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        self.fy = FiscalYear.objects.create(business_profile=self.business, year=2026)
+        self.fy.create_quarters()
+        self.acme = Client.objects.create(
+            business_profile=self.business, name="Acme", tax_id="A11111111"
+        )
+        self.small = Client.objects.create(
+            business_profile=self.business, name="Small", tax_id="A22222222"
+        )
+
+    def add_invoice(self, client, issue_date, price, status=Invoice.Status.SENT):
+        invoice = Invoice.objects.create(
+            business_profile=self.business,
+            client=client,
+            number=f"F-{Invoice.objects.count() + 1}",
+            status=status,
+            issue_date=issue_date,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=Decimal(price),
+            tax_rate=Decimal("21.00"),
+            withholding_rate=Decimal("15.00"),
+        )
+
+    def add_expense(self, supplier, expense_date, base):
+        Expense.objects.create(
+            business_profile=self.business,
+            date=expense_date,
+            concept="Compra",
+            supplier=supplier,
+            category=ExpenseCategory.SUPPLIES,
+            taxable_base=Decimal(base),
+        )
+
+    def test_modelo_347_groups_by_counterparty_and_quarter(self):
+        # Same NIF on a duplicated client record adds up
+        acme_copy = Client.objects.create(
+            business_profile=self.business, name="ACME S.L.", tax_id="a11111111 "
+        )
+        self.add_invoice(self.acme, date(2026, 2, 1), "2000.00")
+        self.add_invoice(acme_copy, date(2026, 11, 1), "1000.00")
+        self.add_invoice(self.acme, date(2026, 5, 1), "9000.00", Invoice.Status.DRAFT)
+        self.add_invoice(self.acme, date(2025, 5, 1), "9000.00")
+        self.add_invoice(self.small, date(2026, 3, 1), "2000.00")
+        self.add_expense("Tienda", date(2026, 4, 1), "2000.00")
+        self.add_expense("TIENDA ", date(2026, 8, 1), "1000.00")
+        self.add_expense("Otra", date(2026, 8, 1), "100.00")
+
+        with self.assertNumQueries(2):
+            result = calculate_modelo_347(self.fy)
+
+        [acme] = result["sales"]
+        self.assertEqual(acme["tax_id"], "A11111111")
+        # VAT included, withholdings not subtracted
+        self.assertEqual(acme["quarters"][1], Decimal("2420.00"))
+        self.assertEqual(acme["quarters"][4], Decimal("1210.00"))
+        self.assertEqual(acme["total"], Decimal("3630.00"))
+
+        [shop] = result["purchases"]
+        self.assertEqual(shop["quarters"][2], Decimal("2420.00"))
+        self.assertEqual(shop["quarters"][3], Decimal("1210.00"))
+        self.assertEqual(shop["total"], Decimal("3630.00"))
+
+    def test_cached_modelo_347_follows_client_changes(self):
+        self.add_invoice(self.acme, date(2026, 2, 1), "3000.00")
+        [acme] = get_modelo_347(self.fy)["sales"]
+        self.assertEqual((acme["tax_id"], acme["name"]), ("A11111111", "Acme"))
+
+        self.acme.name = "Acme Renamed SL"
+        self.acme.tax_id = "B12345678"
+        self.acme.save()
+        [acme] = get_modelo_347(self.fy)["sales"]
+        self.assertEqual(
+            (acme["tax_id"], acme["name"]), ("B12345678", "Acme Renamed SL")
+        )
+
+
+class QuarterSnapshotTest(TestCase):
+    def setUp(self):
+        self.business = BusinessProfile.objects.create(
+            name="Test Business",
+            tax_id="B12345678",
+        )
+        self.client = Client.objects.create(
+            business_profile=self.business,
+            name="Test Client",
+        )
+        self.fy = FiscalYear.objects.create(business_profile=self.business, year=2026)
+        self.fy.create_quarters()
+        self.q1 = self.fy.quarters.get(number=1)
+        self.add_invoice("F-2026-001", Decimal("1000.00"))
+
+    def add_invoice(self, number, price, issue_date=date(2026, 2, 15)):
+        invoice = Invoice.objects.create(
+            business_profile=self.business,
+            client=self.client,
+            number=number,
+            status=Invoice.Status.SENT,
+            issue_date=issue_date,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            quantity=1,
+            unit_price=price,
+            tax_rate=Decimal("21.00"),
+        )
+
+    def test_closed_quarter_is_served_from_snapshot(self):
+        expected = calculate_modelo_303(self.q1)
+        close_quarter(self.q1)
+        self.add_invoice("F-2026-002", Decimal("500.00"))
+
+        quarter = self.fy.quarters.select_related("result").get(number=1)
+        self.assertTrue(quarter.closed)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_modelo_303(quarter), expected)
+        self.assertEqual(quarter.result.modelo_303_calculated, Decimal("210.00"))
+
+        reopen_quarter(quarter)
+        self.assertIsNone(quarter.result.snapshot)
+        self.assertEqual(get_modelo_303(quarter)["total_output_vat"], Decimal("315.00"))
+
+    def test_admin_form_cannot_close_without_snapshot(self):
+        User.objects.create_superuser("admin", password="test")
+        browser = self.client_class()  # self.client is the invoiced client
+        browser.login(username="admin", password="test")
+        response = browser.post(
+            f"/room/fiscal/quarter/{self.q1.pk}/change/",
+            {
+                "fiscal_year": self.fy.pk,
+                "number": 1,
+                "closed": "on",
+                "closing_date": "2026-04-20",
+                "notes": "",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.q1.refresh_from_db()
+        self.assertFalse(self.q1.closed)
+        self.assertIsNone(self.q1.closing_date)
+
+    def test_closed_year_summary_comes_from_snapshots(self):
+        for quarter in self.fy.quarters.all():
+            close_quarter(quarter)
+        expected = calculate_modelo_390(self.fy)
+        self.add_invoice("F-2026-002", Decimal("500.00"))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_modelo_390(self.fy), expected)
+
+    def test_year_summary_keeps_closed_quarters_frozen(self):
+        for quarter in self.fy.quarters.exclude(number=4):
+            close_quarter(quarter)
+        self.add_invoice("F-2026-002", Decimal("500.00"))  # closed Q1
+        self.add_invoice("F-2026-003", Decimal("100.00"), date(2026, 11, 2))
+
+        modelo_390 = get_modelo_390(self.fy)
+        by_quarter = {q["quarter"]: q for q in modelo_390["quarters_detail"]}
+        self.assertEqual(by_quarter[1]["output_vat"], Decimal("210.00"))
+        self.assertEqual(by_quarter[4]["output_vat"], Decimal("21.00"))
+        self.assertEqual(modelo_390["total_output_vat"], Decimal("231.00"))
+        self.assertEqual(
+            modelo_390["vat_breakdown"],
+            [{"type": 21, "base": Decimal("1100.00"), "vat": Decimal("231.00")}],
+        )
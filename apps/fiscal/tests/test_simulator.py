@@ -0,0 +1,131 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import ExpenseCategory
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.services import calculate_modelo_130
+from apps.fiscal.services import calculate_modelo_303
+from apps.fiscal.services.simulator import QuarterSimulator
+from apps.invoicing.models import BusinessMembership
+from apps.invoicing.models import BusinessProfile
+from apps.invoicing.models import Client
+from apps.invoicing.models import Invoice
+from apps.invoicing.models import InvoiceLineItem
+
+
+class QuarterSimulatorTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", "owner@test.com", "test")
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        BusinessMembership.objects.create(
+            user=self.user,
+            business_profile=self.business,
+            role=BusinessMembership.Role.OWNER,
+        )
+        self.customer = Client.objects.create(business_profile=self.business, name="C")
+        self.fy = FiscalYear.objects.create(
+            business_profile=self.business,
+            year=2026,
+            estimation_type="simplified",
+        )
+        self.fy.create_quarters()
+        self.q1 = self.fy.quarters.get(number=1)
+        self.add_invoice("F-1", Decimal("2000.00"), Decimal("21.00"))
+
+    def add_invoice(self, number, price, tax_rate):
+        invoice = Invoice.objects.create(
+            business_profile=self.business,
+            client=self.customer,
+            number=number,
+            status=Invoice.Status.SENT,
+            issue_date=date(2026, 2, 1),
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=price,
+            tax_rate=tax_rate,
+            withholding_rate=Decimal("15.00"),
+        )
+
+    def test_simulation_matches_real_documents(self):
+        simulation = QuarterSimulator(self.q1).simulate(
+            invoices=[
+                {"base": "1500.00", "vat_rate": 10, "withholding_rate": "15.00"},
+            ],
+            expenses=[
+                {"base": "800.00", "vat_rate": 21},
+                {"base": "100.00", "vat_rate": 21, "irpf_deductible": False},
+            ],
+        )
+
+        self.add_invoice("F-2", Decimal("1500.00"), Decimal("10.00"))
+        for base, irpf_deductible in [("800.00", True), ("100.00", False)]:
+            Expense.objects.create(
+                business_profile=self.business,
+                date=date(2026, 3, 1),
+                concept="Equipo",
+                category=ExpenseCategory.SUPPLIES,
+                taxable_base=Decimal(base),
+                irpf_deductible=irpf_deductible,
+            )
+        modelo_303 = calculate_modelo_303(self.q1)
+        modelo_130 = calculate_modelo_130(self.q1)
+
+        self.assertEqual(simulation["modelo_303"]["result"], modelo_303["result"])
+        self.assertEqual(
+            simulation["modelo_303"]["vat_breakdown"], modelo_303["vat_breakdown"]
+        )
+        self.assertEqual(simulation["modelo_130"], modelo_130)
+        # 303: 420 + 150 output VAT - 189 input VAT, was 420
+        self.assertEqual(simulation["difference_303"], Decimal("-39.00"))
+
+    def test_decimal_vat_rates_match_real_documents(self):
+        simulation = QuarterSimulator(self.q1).simulate(
+            invoices=[
+                {"base": "1000.00", "vat_rate": "10.5"},
+                {"base": "500.00", "vat_rate": "21.0"},
+            ],
+        )
+
+        self.add_invoice("F-2", Decimal("1000.00"), Decimal("10.50"))
+        self.add_invoice("F-3", Decimal("500.00"), Decimal("21.00"))
+        modelo_303 = calculate_modelo_303(self.q1)
+
+        self.assertEqual(
+            simulation["modelo_303"]["vat_breakdown"], modelo_303["vat_breakdown"]
+        )
+        self.assertEqual(simulation["modelo_303"]["result"], modelo_303["result"])
+        # 420 + 105 + 105 output VAT, was 420
+        self.assertEqual(simulation["difference_303"], Decimal("210.00"))
+
+    def test_scenarios_do_not_query_the_database(self):
+        simulator = QuarterSimulator(self.q1)
+        with self.assertNumQueries(0):
+            for base in range(0, 20000, 500):
+                simulator.simulate(invoices=[{"base": base, "vat_rate": 21}])
+
+    def test_simulate_view_returns_fragment_for_htmx(self):
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.business.pk
+        session.save()
+        url = reverse("fiscal:quarter_simulate", args=[2026, 1])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "fiscal/quarter/simulate.html")
+
+        response = self.client.get(
+            url,
+            {"invoice_base": "1000", "invoice_vat_rate": "21", "expense_base": "0"},
+            headers={"HX-Request": "true"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateNotUsed(response, "fiscal/quarter/simulate.html")
+        self.assertEqual(response.context["simulation"]["difference_303"], 210)
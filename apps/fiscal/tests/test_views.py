@@ -0,0 +1,174 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import ExpenseCategory
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.services import cached
+from apps.invoicing.models import BusinessMembership
+from apps.invoicing.models import BusinessProfile
+
+
+class QuarterDetailViewTest(TestCase):
+    def setUp(self):
+        User.objects.create_user("owner", "owner@test.com", "test")
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        BusinessMembership.objects.create(
+            user=User.objects.get(username="owner"),
+            business_profile=self.business,
+            role=BusinessMembership.Role.OWNER,
+        )
+        fiscal_year = FiscalYear.objects.create(
+            business_profile=self.business, year=2026
+        )
+        fiscal_year.create_quarters()
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.business.pk
+        session.save()
+        self.detail_url = reverse("fiscal:quarter_detail", args=[2026, 1])
+        self.save_url = reverse("fiscal:quarter_save_result", args=[2026, 1])
+
+    def test_open_save_and_redisplay_computes_modelos_once(self):
+        with (
+            mock.patch.object(
+                cached, "calculate_modelo_303", wraps=cached.calculate_modelo_303
+            ) as modelo_303,
+            mock.patch.object(
+                cached, "calculate_modelo_130", wraps=cached.calculate_modelo_130
+            ) as modelo_130,
+        ):
+            self.client.get(self.detail_url)
+            self.client.get(self.save_url)
+            response = self.client.post(
+                self.save_url,
+                {"modelo_303_submitted": "", "modelo_130_submitted": "", "notes": "ok"},
+                follow=True,
+            )
+
+        self.assertContains(response, "ok")
+        self.assertEqual(modelo_303.call_count, 1)
+        self.assertEqual(modelo_130.call_count, 1)
+
+    def test_conditional_get(self):
+        response = self.client.get(self.detail_url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.detail_url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+        Expense.objects.create(
+            business_profile=self.business,
+            date=date(2026, 2, 1),
+            concept="Software",
+            category=ExpenseCategory.SOFTWARE,
+            taxable_base=Decimal("100.00"),
+        )
+        response = self.client.get(self.detail_url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_pending_message_is_not_answered_with_304(self):
+        self.client.get(self.detail_url)
+        self.client.post(reverse("fiscal:quarter_close", args=[2026, 1]))
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, "cerrado.")
+        self.assertFalse(response.has_header("ETag"))
+        etag = self.client.get(self.detail_url)["ETag"]
+
+        # Refused without writing anything: same data, but a message to show
+        self.client.post(self.save_url)
+        response = self.client.get(self.detail_url, headers={"If-None-Match": etag})
+        self.assertContains(response, "El trimestre está cerrado.")
+
+        response = self.client.get(self.detail_url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_modelo_347_page(self):
+        response = self.client.get(
+            reverse("fiscal:fiscal_year_modelo_347", args=[2026])
+        )
+        self.assertContains(response, "Ningún cliente supera el umbral.")
+
+
+class ExpenseListViewTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("owner", "owner@test.com", "test")
+        self.business = BusinessProfile.objects.create(name="Test", tax_id="B1")
+        BusinessMembership.objects.create(
+            user=user,
+            business_profile=self.business,
+            role=BusinessMembership.Role.OWNER,
+        )
+        # Several expenses share each date, so ties are broken by pk
+        Expense.objects.bulk_create(
+            Expense(
+                business_profile=self.business,
+                date=date(2025 + n % 2, n % 12 + 1, 1),
+                concept=f"Gasto {n}",
+                category=ExpenseCategory.SOFTWARE if n % 3 else ExpenseCategory.OTHER,
+                taxable_base=Decimal("10.00"),
+            )
+            for n in range(60)
+        )
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.business.pk
+        session.save()
+        self.url = reverse("fiscal:expense_list")
+
+    def walk(self, params):
+        pages = []
+        cursor = None
+        while True:
+            query = dict(params, **({"after": cursor} if cursor else {}))
+            page = self.client.get(self.url, query).context["expenses"]
+            pages.append([expense.pk for expense in page])
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    def test_keyset_pages_cover_every_expense_once(self):
+        pages = self.walk({})
+        expected = list(
+            Expense.objects.order_by("-date", "-pk").values_list("pk", flat=True)
+        )
+        self.assertEqual([len(page) for page in pages], [25, 25, 10])
+        self.assertEqual(sum(pages, []), expected)
+
+        page = self.client.get(self.url, {"after": "garbage"}).context["expenses"]
+        self.assertEqual([expense.pk for expense in page], pages[0])
+
+        last = Expense.objects.get(pk=pages[2][0])
+        response = self.client.get(
+            self.url, {"before": f"{last.date.isoformat()}_{last.pk}"}
+        )
+        self.assertEqual(
+            [expense.pk for expense in response.context["expenses"]], pages[1]
+        )
+
+    def test_filters_use_date_ranges(self):
+        first_quarters = Expense.objects.filter(date__month__in=[1, 2, 3])
+        self.assertEqual(
+            sum(self.walk({"quarter": 1}), []),
+            list(first_quarters.order_by("-date", "-pk").values_list("pk", flat=True)),
+        )
+        software_2025_q4 = Expense.objects.filter(
+            date__year=2025,
+            date__month__gte=10,
+            category=ExpenseCategory.SOFTWARE,
+        )
+        self.assertEqual(
+            sorted(
+                sum(self.walk({"year": 2025, "quarter": 4, "category": "software"}), [])
+            ),
+            sorted(software_2025_q4.values_list("pk", flat=True)),
+        )
+        response = self.client.get(self.url, {"year": "nope", "quarter": "9"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["years"], [2026, 2025])
@@ -9,9 +9,13 @@ from apps.fiscal.views import fiscal_year_create
 from apps.fiscal.views import fiscal_year_detail
 from apps.fiscal.views import fiscal_year_edit
 from apps.fiscal.views import fiscal_year_list
+from apps.fiscal.views import fiscal_year_modelo_347
 from apps.fiscal.views import quarter_close
 from apps.fiscal.views import quarter_detail
+from apps.fiscal.views import quarter_invoices_zip
+from apps.fiscal.views import quarter_reopen
 from apps.fiscal.views import quarter_save_result
+from apps.fiscal.views import quarter_simulate
 
 app_name = "fiscal"
 
@@ -23,6 +27,11 @@ urlpatterns = [
     path("anos/nuevo/", fiscal_year_create, name="fiscal_year_create"),
     path("anos/<int:year>/", fiscal_year_detail, name="fiscal_year_detail"),
     path("anos/<int:year>/editar/", fiscal_year_edit, name="fiscal_year_edit"),
+    path(
+        "anos/<int:year>/modelo-347/",
+        fiscal_year_modelo_347,
+        name="fiscal_year_modelo_347",
+    ),
     # Quarters
     path(
         "anos/<int:year>/t/<int:quarter_num>/",
@@ -39,6 +48,21 @@ urlpatterns = [
         quarter_close,
         name="quarter_close",
     ),
+    path(
+        "anos/<int:year>/t/<int:quarter_num>/reabrir/",
+        quarter_reopen,
+        name="quarter_reopen",
+    ),
+    path(
+        "anos/<int:year>/t/<int:quarter_num>/simular/",
+        quarter_simulate,
+        name="quarter_simulate",
+    ),
+    path(
+        "anos/<int:year>/t/<int:quarter_num>/facturas.zip",
+        quarter_invoices_zip,
+        name="quarter_invoices_zip",
+    ),
     # Expenses
     path("gastos/", expense_list, name="expense_list"),
     path("gastos/nuevo/", expense_create, name="expense_create"),
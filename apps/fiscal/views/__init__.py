@@ -7,9 +7,13 @@ from apps.fiscal.views.fiscal_year import fiscal_year_create
 from apps.fiscal.views.fiscal_year import fiscal_year_detail
 from apps.fiscal.views.fiscal_year import fiscal_year_edit
 from apps.fiscal.views.fiscal_year import fiscal_year_list
+from apps.fiscal.views.fiscal_year import fiscal_year_modelo_347
 from apps.fiscal.views.quarter import quarter_close
 from apps.fiscal.views.quarter import quarter_detail
+from apps.fiscal.views.quarter import quarter_invoices_zip
+from apps.fiscal.views.quarter import quarter_reopen
 from apps.fiscal.views.quarter import quarter_save_result
+from apps.fiscal.views.quarter import quarter_simulate
 
 __all__ = [
     "expense_create",
@@ -21,7 +25,11 @@ __all__ = [
     "fiscal_year_detail",
     "fiscal_year_edit",
     "fiscal_year_list",
+    "fiscal_year_modelo_347",
     "quarter_close",
     "quarter_detail",
+    "quarter_invoices_zip",
+    "quarter_reopen",
     "quarter_save_result",
+    "quarter_simulate",
 ]
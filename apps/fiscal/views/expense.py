@@ -1,6 +1,10 @@
+from datetime import date
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db.models import Max
+from django.db.models import Min
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
@@ -8,48 +12,75 @@ from django.shortcuts import render
 from apps.fiscal.forms import ExpenseForm
 from apps.fiscal.models import Expense
 from apps.fiscal.models import ExpenseCategory
+from apps.fiscal.models.quarter import QUARTER_DATE_RANGES
+from apps.invoicing.services.pagination import keyset_paginate
 from apps.invoicing.services.permissions import require_business
 
+EXPENSES_PER_PAGE = 25
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name, ""))
+    except ValueError:
+        return None
+
+
+def _date_range_filter(years, quarter):
+    """``Q`` of date ranges for the selected years and quarter.
+
+    Built from plain ranges (not ``__year``/``__month`` lookups) so the
+    ``(business_profile, date)`` index can be used; a quarter on its own
+    becomes one range per year.
+    """
+    if quarter in QUARTER_DATE_RANGES:
+        (start_month, start_day), (end_month, end_day) = QUARTER_DATE_RANGES[quarter]
+    else:
+        (start_month, start_day), (end_month, end_day) = (1, 1), (12, 31)
+
+    ranges = Q()
+    for year in years:
+        ranges |= Q(
+            date__range=(
+                date(year, start_month, start_day),
+                date(year, end_month, end_day),
+            )
+        )
+    return ranges
+
 
 @login_required
 @require_business
 def expense_list(request):
-    """List all expenses with filters."""
-    expenses = Expense.objects.filter(
-        business_profile=request.business,
-    ).order_by("-date")
-
-    # Filter by year
-    year = request.GET.get("year")
-    if year:
-        expenses = expenses.filter(date__year=year)
-
-    # Filter by quarter
-    quarter = request.GET.get("quarter")
-    if quarter:
-        quarter = int(quarter)
-        if quarter == 1:
-            expenses = expenses.filter(date__month__in=[1, 2, 3])
-        elif quarter == 2:
-            expenses = expenses.filter(date__month__in=[4, 5, 6])
-        elif quarter == 3:
-            expenses = expenses.filter(date__month__in=[7, 8, 9])
-        elif quarter == 4:
-            expenses = expenses.filter(date__month__in=[10, 11, 12])
-
-    # Filter by category
+    """List all expenses with filters, newest first, with keyset pagination."""
+    all_expenses = Expense.objects.filter(business_profile=request.business)
+
+    # Years for the filter dropdown, from the index bounds
+    bounds = all_expenses.aggregate(first=Min("date"), last=Max("date"))
+    years = []
+    if bounds["first"]:
+        years = list(range(bounds["last"].year, bounds["first"].year - 1, -1))
+
+    year = _int_param(request, "year")
+    quarter = _int_param(request, "quarter")
+    if quarter not in QUARTER_DATE_RANGES:
+        quarter = None
     category = request.GET.get("category")
+
+    expenses = all_expenses
+    if year or quarter:
+        expenses = expenses.filter(
+            _date_range_filter([year] if year else years, quarter)
+        )
     if category:
         expenses = expenses.filter(category=category)
 
-    # Pagination
-    paginator = Paginator(expenses, 25)
-    page = request.GET.get("page")
-    expenses = paginator.get_page(page)
-
-    # Get distinct years for filter dropdown
-    years = Expense.objects.filter(business_profile=request.business).dates(
-        "date", "year", order="DESC"
+    expenses = keyset_paginate(
+        expenses,
+        "date",
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        per_page=EXPENSES_PER_PAGE,
     )
 
     return render(
@@ -59,7 +90,7 @@ def expense_list(request):
             "active_section": "fiscal_expenses",
             "business": request.business,
             "expenses": expenses,
-            "years": [d.year for d in years],
+            "years": years,
             "categories": ExpenseCategory.choices,
             "current_filters": {
                 "year": year,
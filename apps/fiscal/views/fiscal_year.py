@@ -8,7 +8,8 @@ from django.shortcuts import render
 
 from apps.fiscal.forms import FiscalYearForm
 from apps.fiscal.models import FiscalYear
-from apps.fiscal.services import calculate_modelo_390
+from apps.fiscal.services import get_modelo_347
+from apps.fiscal.services import get_modelo_390
 from apps.invoicing.services.permissions import require_business
 
 
@@ -76,7 +77,7 @@ def fiscal_year_detail(request, year: int):
     )
 
     # Calculate modelo 390 (annual VAT summary)
-    modelo_390 = calculate_modelo_390(fiscal_year)
+    modelo_390 = get_modelo_390(fiscal_year)
 
     quarters = fiscal_year.quarters.order_by("number")
 
@@ -93,6 +94,30 @@ def fiscal_year_detail(request, year: int):
     )
 
 
+@login_required
+@require_business
+def fiscal_year_modelo_347(request, year: int):
+    """Annual report of operations with third parties (modelo 347)."""
+    fiscal_year = get_object_or_404(
+        FiscalYear,
+        business_profile=request.business,
+        year=year,
+    )
+
+    modelo_347 = get_modelo_347(fiscal_year)
+
+    return render(
+        request,
+        "fiscal/fiscal_year/modelo_347.html",
+        {
+            "active_section": "fiscal_years",
+            "business": request.business,
+            "fiscal_year": fiscal_year,
+            "modelo_347": modelo_347,
+        },
+    )
+
+
 @login_required
 @require_business
 def fiscal_year_edit(request, year: int):
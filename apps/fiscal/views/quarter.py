@@ -1,23 +1,63 @@
+import hashlib
+
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
-from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
 
 from apps.fiscal.forms import QuarterlyResultForm
+from apps.fiscal.forms import SimulationForm
 from apps.fiscal.models import FiscalYear
 from apps.fiscal.models import Quarter
 from apps.fiscal.models import QuarterlyResult
-from apps.fiscal.services import calculate_modelo_130
-from apps.fiscal.services import calculate_modelo_303
+from apps.fiscal.services import get_modelo_130
+from apps.fiscal.services import get_modelo_303
+from apps.fiscal.services.simulator import QuarterSimulator
+from apps.fiscal.services.snapshot import close_quarter
+from apps.fiscal.services.snapshot import reopen_quarter
+from apps.invoicing.services.cache import get_data_version
+from apps.invoicing.services.cache import get_membership_version
+from apps.invoicing.services.pdf_archive import get_archive_invoices
 from apps.invoicing.services.permissions import require_business
+from apps.invoicing.views.export import zip_stream_response
+
+
+def quarter_detail_etag(request, quarter: Quarter) -> str:
+    """ETag of the quarter page: changes with any write to the business.
+
+    Also covers the user's memberships (business switcher) and CSRF secret
+    (reopen form).
+    """
+    get_token(request)  # make sure the CSRF secret is set before reading it
+    state = ":".join(
+        str(part)
+        for part in (
+            quarter.pk,
+            get_data_version(request.business.pk),
+            request.user.pk,
+            get_membership_version(request.user.pk),
+            request.META["CSRF_COOKIE"],
+        )
+    )
+    return quote_etag(hashlib.sha256(state.encode()).hexdigest()[:32])
 
 
 @login_required
 @require_business
 def quarter_detail(request, year: int, quarter_num: int):
-    """Quarterly summary with modelos 303 and 130."""
+    """Quarterly summary with modelos 303 and 130.
+
+    Supports conditional GET: the ETag follows the business data version,
+    so an unchanged quarter is answered with 304 without computing or
+    rendering anything. Pages carrying flash messages are never validated
+    nor tagged, so a message is neither lost in a 304 nor shown again from
+    the browser's copy.
+    """
     fiscal_year = get_object_or_404(
         FiscalYear,
         business_profile=request.business,
@@ -30,14 +70,23 @@ def quarter_detail(request, year: int, quarter_num: int):
         number=quarter_num,
     )
 
-    # Calculate modelos
-    modelo_303 = calculate_modelo_303(quarter)
-    modelo_130 = calculate_modelo_130(quarter)
-
-    # Get or create result for form
+    # Get or create result for form (before the modelos and the ETag:
+    # creating it bumps the business data version)
     result, _ = QuarterlyResult.objects.get_or_create(quarter=quarter)
 
-    return render(
+    # len() does not mark the messages as read
+    etag = None
+    if not len(messages.get_messages(request)):
+        etag = quarter_detail_etag(request, quarter)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+    # Calculate modelos
+    modelo_303 = get_modelo_303(quarter)
+    modelo_130 = get_modelo_130(quarter)
+
+    response = render(
         request,
         "fiscal/quarter/detail.html",
         {
@@ -50,6 +99,10 @@ def quarter_detail(request, year: int, quarter_num: int):
             "result": result,
         },
     )
+    if etag:
+        response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
@@ -68,12 +121,16 @@ def quarter_save_result(request, year: int, quarter_num: int):
         number=quarter_num,
     )
 
-    # Calculate modelos
-    modelo_303 = calculate_modelo_303(quarter)
-    modelo_130 = calculate_modelo_130(quarter)
+    if quarter.closed:
+        messages.error(request, "El trimestre está cerrado. Reábrelo para modificarlo.")
+        return redirect("fiscal:quarter_detail", year=year, quarter_num=quarter_num)
 
     result, _ = QuarterlyResult.objects.get_or_create(quarter=quarter)
 
+    # Calculate modelos
+    modelo_303 = get_modelo_303(quarter)
+    modelo_130 = get_modelo_130(quarter)
+
     if request.method == "POST":
         form = QuarterlyResultForm(request.POST, instance=result)
         if form.is_valid():
@@ -124,9 +181,7 @@ def quarter_close(request, year: int, quarter_num: int):
             messages.error(request, "Debes guardar el resultado antes de cerrar.")
             return redirect("fiscal:quarter_detail", year=year, quarter_num=quarter_num)
 
-        quarter.closed = True
-        quarter.closing_date = timezone.now().date()
-        quarter.save()
+        close_quarter(quarter)
         messages.success(request, f"Trimestre {quarter.get_number_display()} cerrado.")
         return redirect("fiscal:fiscal_year_detail", year=year)
 
@@ -140,3 +195,75 @@ def quarter_close(request, year: int, quarter_num: int):
             "quarter": quarter,
         },
     )
+
+
+@login_required
+@require_business
+def quarter_reopen(request, year: int, quarter_num: int):
+    """Reopen a closed quarter, discarding its snapshot."""
+    quarter = get_object_or_404(
+        Quarter,
+        fiscal_year__business_profile=request.business,
+        fiscal_year__year=year,
+        number=quarter_num,
+    )
+    if request.method == "POST" and quarter.closed:
+        if quarter.fiscal_year.closed:
+            messages.error(request, "El año fiscal está cerrado.")
+        else:
+            reopen_quarter(quarter)
+            messages.success(
+                request, f"Trimestre {quarter.get_number_display()} reabierto."
+            )
+    return redirect("fiscal:quarter_detail", year=year, quarter_num=quarter_num)
+
+
+@login_required
+@require_business
+def quarter_invoices_zip(request, year: int, quarter_num: int):
+    """Download the PDFs of every invoice issued in the quarter."""
+    quarter = get_object_or_404(
+        Quarter,
+        fiscal_year__business_profile=request.business,
+        fiscal_year__year=year,
+        number=quarter_num,
+    )
+    start_date, end_date = quarter.get_date_range()
+    invoices = get_archive_invoices(request.business, start_date, end_date)
+    return zip_stream_response(f"facturas_{year}_{quarter_num}T.zip", invoices)
+
+
+@login_required
+@require_business
+def quarter_simulate(request, year: int, quarter_num: int):
+    """What-if: modelos 303 and 130 with a hypothetical invoice and expense.
+
+    htmx requests (the form's sliders) only get the results fragment.
+    """
+    quarter = get_object_or_404(
+        Quarter.objects.select_related("fiscal_year", "result"),
+        fiscal_year__business_profile=request.business,
+        fiscal_year__year=year,
+        number=quarter_num,
+    )
+    simulator = QuarterSimulator(quarter)
+
+    form = SimulationForm(request.GET or None)
+    if form.is_valid():
+        simulation = simulator.simulate(*form.scenario())
+    else:
+        simulation = simulator.simulate()
+
+    context = {
+        "active_section": "fiscal_years",
+        "business": request.business,
+        "fiscal_year": quarter.fiscal_year,
+        "quarter": quarter,
+        "form": form,
+        "current_303": simulator.modelo_303,
+        "current_130": simulator.modelo_130,
+        "simulation": simulation,
+    }
+    if request.headers.get("HX-Request"):
+        return render(request, "fiscal/quarter/_simulation_results.html", context)
+    return render(request, "fiscal/quarter/simulate.html", context)
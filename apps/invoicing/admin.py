@@ -4,6 +4,7 @@ from unfold.admin import TabularInline
 
 from apps.invoicing.models.business import BusinessMembership
 from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.business import InvoiceNumberCounter
 from apps.invoicing.models.business import InvoiceNumbering
 from apps.invoicing.models.business import InvoiceTheme
 from apps.invoicing.models.client import CatalogItem
@@ -11,6 +12,7 @@ from apps.invoicing.models.client import Client
 from apps.invoicing.models.invoice import Invoice
 from apps.invoicing.models.invoice import InvoiceLineItem
 from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.payment import refresh_invoice_statuses
 
 
 class BusinessMembershipInline(TabularInline):
@@ -33,6 +35,20 @@ class BusinessProfileAdmin(ModelAdmin):
     list_display = ("name", "tax_id", "city", "email")
     search_fields = ("name", "tax_id")
     inlines = [BusinessMembershipInline, InvoiceNumberingInline, InvoiceThemeInline]
+    actions = ["recompute_invoice_statuses"]
+
+    @admin.action(description="Recalcular estado de cobro de sus facturas")
+    def recompute_invoice_statuses(self, request, queryset):
+        updated = refresh_invoice_statuses(
+            Invoice.objects.filter(business_profile__in=queryset)
+        )
+        self.message_user(request, f"Estado actualizado en {updated} factura(s).")
+
+
+@admin.register(InvoiceNumberCounter)
+class InvoiceNumberCounterAdmin(ModelAdmin):
+    list_display = ("numbering", "year", "next_number")
+    list_filter = ("numbering__business_profile", "year")
 
 
 @admin.register(Client)
@@ -55,10 +71,32 @@ class InvoiceLineItemInline(TabularInline):
 
 @admin.register(Invoice)
 class InvoiceAdmin(ModelAdmin):
-    list_display = ("number", "client", "status", "issue_date", "currency")
+    list_display = (
+        "number",
+        "client",
+        "status",
+        "issue_date",
+        "total",
+        "balance",
+        "currency",
+    )
     list_filter = ("status", "business_profile")
     search_fields = ("number", "client__name")
+    readonly_fields = (
+        "subtotal",
+        "tax_total",
+        "withholding_total",
+        "total",
+        "paid_amount",
+        "balance",
+    )
     inlines = [InvoiceLineItemInline]
+    actions = ["recompute_statuses"]
+
+    @admin.action(description="Recalcular estado de cobro")
+    def recompute_statuses(self, request, queryset):
+        updated = refresh_invoice_statuses(queryset)
+        self.message_user(request, f"Estado actualizado en {updated} factura(s).")
 
 
 @admin.register(Payment)
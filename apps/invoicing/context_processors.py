@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
+from apps.invoicing.services.permissions import get_business_choices
+
+
+def businesses(request):
+    """Businesses of the user for the switcher, loaded only when rendered."""
+    if not request.user.is_authenticated:
+        return {}
+    return {"businesses": SimpleLazyObject(lambda: get_business_choices(request.user))}
@@ -1,9 +1,32 @@
 from django import forms
 
+from apps.invoicing.models.business import InvoiceNumberCounter
 from apps.invoicing.models.business import InvoiceNumbering
 
 
 class InvoiceNumberingForm(forms.ModelForm):
+    next_number = forms.IntegerField(label="Siguiente número", min_value=1)
+
+    field_order = ["series_prefix", "next_number", "format_pattern"]
+
     class Meta:
         model = InvoiceNumbering
-        fields = ["series_prefix", "next_number", "format_pattern"]
+        fields = ["series_prefix", "format_pattern"]
+
+    def __init__(self, *args, year, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.year = year
+        if self.instance.numbers_by_year:
+            self.fields["next_number"].help_text = f"Del año {year}."
+        if self.instance.pk:
+            self.fields["next_number"].initial = self.instance.get_next_number(year)
+
+    def save(self, commit=True):
+        numbering = super().save(commit=commit)
+        if commit:
+            InvoiceNumberCounter.objects.update_or_create(
+                numbering=numbering,
+                year=numbering.counter_year(self.year),
+                defaults={"next_number": self.cleaned_data["next_number"]},
+            )
+        return numbering
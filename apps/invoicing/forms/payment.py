@@ -16,9 +16,11 @@ class PaymentForm(forms.ModelForm):
     def __init__(self, *args, business_profile=None, **kwargs):
         super().__init__(*args, **kwargs)
         if business_profile:
-            self.fields["invoice"].queryset = Invoice.objects.filter(
-                business_profile=business_profile
-            ).exclude(status=Invoice.Status.CANCELLED)
+            self.fields["invoice"].queryset = (
+                Invoice.objects.filter(business_profile=business_profile)
+                .exclude(status=Invoice.Status.CANCELLED)
+                .select_related("client")
+            )
         self.fields["date"].input_formats = ["%Y-%m-%d"]
 
 
@@ -34,3 +36,13 @@ class QuickPaymentForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields["date"].input_formats = ["%Y-%m-%d"]
+
+
+class BankStatementForm(forms.Form):
+    statement = forms.FileField(
+        label="Extracto bancario",
+        help_text="Fichero Norma 43 (cuaderno 43) o CSV exportado del banco.",
+    )
+    dry_run = forms.BooleanField(
+        label="Solo comprobar, sin registrar pagos", required=False
+    )
@@ -0,0 +1,76 @@
+import os
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.fiscal.models import Quarter
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.services.pdf_archive import get_archive_invoices
+from apps.invoicing.services.pdf_archive import iter_invoice_pdf_zip
+from apps.invoicing.services.pdf_pool import PdfRenderPool
+
+
+class Command(BaseCommand):
+    help = "Exporta a un ZIP los PDF de las facturas de un periodo o trimestre."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Ruta del fichero ZIP a generar.")
+        parser.add_argument(
+            "--business", type=int, required=True, help="ID de la empresa."
+        )
+        parser.add_argument(
+            "--start", type=date.fromisoformat, help="Fecha inicial (AAAA-MM-DD)."
+        )
+        parser.add_argument(
+            "--end", type=date.fromisoformat, help="Fecha final (AAAA-MM-DD)."
+        )
+        parser.add_argument("--year", type=int, help="Año fiscal del trimestre.")
+        parser.add_argument(
+            "--quarter", type=int, choices=[1, 2, 3, 4], help="Trimestre (1-4)."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Procesos que generan PDF en paralelo (0: en este proceso).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            business = BusinessProfile.objects.get(pk=options["business"])
+        except BusinessProfile.DoesNotExist:
+            raise CommandError(f"No existe la empresa {options['business']}.")
+
+        if options["quarter"]:
+            quarter = Quarter.objects.filter(
+                fiscal_year__business_profile=business,
+                fiscal_year__year=options["year"],
+                number=options["quarter"],
+            ).first()
+            if quarter is None:
+                raise CommandError("No existe ese trimestre para la empresa.")
+            start_date, end_date = quarter.get_date_range()
+        elif options["start"] and options["end"]:
+            start_date, end_date = options["start"], options["end"]
+        else:
+            raise CommandError("Indica --start y --end, o --year y --quarter.")
+
+        invoices = get_archive_invoices(business, start_date, end_date)
+        count = invoices.count()
+        # Its own pool, sized for the machine rather than for web requests
+        pool = PdfRenderPool(
+            workers=options["workers"],
+            queue_size=0,
+            timeout=settings.PDF_RENDER_TIMEOUT,
+        )
+        try:
+            with open(options["output"], "wb") as f:
+                for chunk in iter_invoice_pdf_zip(invoices, pool):
+                    f.write(chunk)
+        finally:
+            pool.close()
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} facturas exportadas a {options['output']}.")
+        )
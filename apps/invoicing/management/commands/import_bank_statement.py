@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.services.bank_import import BankImportError
+from apps.invoicing.services.bank_import import import_bank_statement
+from apps.invoicing.services.bank_import import open_statement
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa un extracto bancario (Norma 43 o CSV) y registra como pagos "
+        "los cobros que coinciden con facturas pendientes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del extracto.")
+        parser.add_argument(
+            "--business", type=int, required=True, help="ID de la empresa."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Muestra las coincidencias sin registrar pagos.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            business = BusinessProfile.objects.get(pk=options["business"])
+        except BusinessProfile.DoesNotExist:
+            raise CommandError(f"No existe la empresa {options['business']}.")
+
+        try:
+            with open(options["path"], "rb") as f:
+                result = import_bank_statement(
+                    business, open_statement(f), dry_run=options["dry_run"]
+                )
+        except (OSError, BankImportError) as exc:
+            raise CommandError(str(exc))
+
+        for movement in result["unmatched"]:
+            self.stdout.write(
+                f"Sin factura: {movement['date']} {movement['amount']} "
+                f"{movement['concept']}"
+            )
+        verb = "coincidentes" if options["dry_run"] else "registrados"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(result['matched'])} cobros {verb}, "
+                f"{len(result['unmatched'])} sin factura, "
+                f"{result['duplicates']} ya registrados."
+            )
+        )
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.services.cache import bump_data_version
+
+TOTAL_FIELDS = ["subtotal", "tax_total", "withholding_total", "total"]
+STORED_FIELDS = [*TOTAL_FIELDS, "paid_amount", "balance"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los totales almacenados de las facturas a partir de sus líneas, "
+        "y lo cobrado y pendiente a partir de sus pagos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            type=int,
+            help="ID de la empresa (por defecto, todas).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Facturas procesadas por lote.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Solo informa de las facturas desincronizadas, sin modificarlas.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        invoices = Invoice.objects.order_by("pk")
+        if options["business"]:
+            invoices = invoices.filter(business_profile_id=options["business"])
+
+        if options["check"]:
+            return self.check_totals(invoices)
+
+        processed = changed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                invoices.filter(pk__gt=last_pk).prefetch_related("lines", "payments")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            dirty = []
+            for invoice in batch:
+                totals = invoice.compute_totals(invoice.lines.all())
+                totals["paid_amount"] = sum(
+                    (payment.amount for payment in invoice.payments.all()), Decimal("0")
+                )
+                totals["balance"] = totals["total"] - totals["paid_amount"]
+                if any(getattr(invoice, f) != v for f, v in totals.items()):
+                    for field, value in totals.items():
+                        setattr(invoice, field, value)
+                    dirty.append(invoice)
+            with transaction.atomic():
+                Invoice.objects.bulk_update(dirty, STORED_FIELDS)
+            # bulk_update skips signals, so invalidate cached figures here
+            for business_id in {invoice.business_profile_id for invoice in dirty}:
+                bump_data_version(business_id)
+            processed += len(batch)
+            changed += len(dirty)
+            last_pk = batch[-1].pk
+            self.stdout.write(f"{processed} facturas procesadas...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Totales recalculados: {changed} de {processed} facturas actualizadas."
+            )
+        )
+
+    def check_totals(self, invoices):
+        stale = []
+        rows = (
+            invoices.with_totals()
+            .with_paid_amount()
+            .annotate(
+                calculated_balance=F("calculated_total") - F("calculated_paid_amount")
+            )
+            .values_list(
+                "number",
+                *STORED_FIELDS,
+                *(f"calculated_{field}" for field in STORED_FIELDS),
+            )
+        )
+        count = len(STORED_FIELDS)
+        for number, *values in rows.iterator(chunk_size=2000):
+            if values[:count] != values[count:]:
+                stale.append(number)
+
+        if not stale:
+            self.stdout.write(self.style.SUCCESS("Todos los totales están al día."))
+            return
+        self.stdout.write(
+            self.style.WARNING(f"{len(stale)} factura(s) con totales desincronizados:")
+        )
+        for number in stale:
+            self.stdout.write(f"  {number}")
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.services.payment import refresh_invoice_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca como pagadas las facturas enviadas cubiertas por sus pagos, y "
+        "como enviadas las pagadas que ya no lo están."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--business",
+            type=int,
+            help="ID de la empresa (por defecto, todas).",
+        )
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options["business"]:
+            invoices = invoices.filter(business_profile_id=options["business"])
+        updated = refresh_invoice_statuses(invoices)
+        self.stdout.write(
+            self.style.SUCCESS(f"Estado actualizado en {updated} factura(s).")
+        )
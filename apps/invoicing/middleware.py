@@ -0,0 +1,23 @@
+from django.utils.functional import SimpleLazyObject
+
+from apps.invoicing.services.permissions import get_active_business
+from apps.invoicing.services.permissions import get_active_membership
+
+
+class ActiveBusinessMiddleware:
+    """Expose the active business and membership on every request.
+
+    Both are resolved lazily and memoised on the request, so views,
+    decorators and template tags share a single lookup.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_authenticated:
+            request.business = SimpleLazyObject(lambda: get_active_business(request))
+            request.membership = SimpleLazyObject(
+                lambda: get_active_membership(request)
+            )
+        return self.get_response(request)
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-18 01:44
+
+from decimal import ROUND_HALF_UP, Decimal
+from django.db import migrations, models
+
+
+def backfill_totals(apps, schema_editor):
+    Invoice = apps.get_model("invoicing", "Invoice")
+    cent = Decimal("0.01")
+    batch = []
+    for invoice in Invoice.objects.prefetch_related("lines").iterator(chunk_size=500):
+        subtotal = tax_total = withholding_total = Decimal("0")
+        for line in invoice.lines.all():
+            line_subtotal = (
+                line.quantity
+                * line.unit_price
+                * (Decimal("1") - line.discount_percent / Decimal("100"))
+            )
+            subtotal += line_subtotal
+            tax_total += line_subtotal * line.tax_rate / Decimal("100")
+            withholding_total += line_subtotal * line.withholding_rate / Decimal("100")
+        invoice.subtotal = subtotal.quantize(cent, rounding=ROUND_HALF_UP)
+        invoice.tax_total = tax_total.quantize(cent, rounding=ROUND_HALF_UP)
+        invoice.withholding_total = withholding_total.quantize(
+            cent, rounding=ROUND_HALF_UP
+        )
+        invoice.total = invoice.subtotal + invoice.tax_total - invoice.withholding_total
+        batch.append(invoice)
+        if len(batch) >= 500:
+            Invoice.objects.bulk_update(
+                batch, ["subtotal", "tax_total", "withholding_total", "total"]
+            )
+            batch = []
+    Invoice.objects.bulk_update(
+        batch, ["subtotal", "tax_total", "withholding_total", "total"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='Base imponible'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='tax_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='IVA'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='Total'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='withholding_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='Retención IRPF'),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
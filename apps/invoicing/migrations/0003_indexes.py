@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0002_invoice_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['business_profile', 'tax_id'], name='client_business_tax_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['business_profile', 'issue_date', 'status'], name='invoice_business_date_idx'),
+        ),
+    ]
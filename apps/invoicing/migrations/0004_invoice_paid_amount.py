@@ -0,0 +1,44 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:22
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_paid_amount(apps, schema_editor):
+    Invoice = apps.get_model("invoicing", "Invoice")
+    Payment = apps.get_model("invoicing", "Payment")
+    payments = (
+        Payment.objects.filter(invoice=OuterRef("pk"))
+        .order_by()
+        .values("invoice")
+        .annotate(value=Sum("amount"))
+        .values("value")
+    )
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+    Invoice.objects.update(
+        paid_amount=Coalesce(Subquery(payments), Value(Decimal("0")), output_field=money)
+    )
+    Invoice.objects.update(balance=F("total") - F("paid_amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='Pendiente'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=12, verbose_name='Cobrado'),
+        ),
+        migrations.RunPython(backfill_paid_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:35
+
+import datetime
+from string import Formatter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_counters(apps, schema_editor):
+    # The old counter ran across years. Patterns without the year keep a
+    # single counter (year 0); for the others it is carried over to every
+    # year with invoices, and to the current one, so no number can be
+    # handed out twice
+    Invoice = apps.get_model("invoicing", "Invoice")
+    InvoiceNumbering = apps.get_model("invoicing", "InvoiceNumbering")
+    InvoiceNumberCounter = apps.get_model("invoicing", "InvoiceNumberCounter")
+    counters = []
+    for numbering in InvoiceNumbering.objects.all():
+        pattern = Formatter().parse(numbering.format_pattern)
+        if "year" not in {field for _, field, _, _ in pattern}:
+            counters.append(
+                InvoiceNumberCounter(
+                    numbering=numbering, year=0, next_number=numbering.next_number
+                )
+            )
+            continue
+        years = {
+            day.year
+            for day in Invoice.objects.filter(
+                business_profile_id=numbering.business_profile_id
+            ).dates("issue_date", "year")
+        }
+        years.add(datetime.date.today().year)
+        counters.extend(
+            InvoiceNumberCounter(
+                numbering=numbering, year=year, next_number=numbering.next_number
+            )
+            for year in years
+        )
+    InvoiceNumberCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0004_invoice_paid_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceNumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(verbose_name='Año')),
+                ('next_number', models.PositiveIntegerField(default=1, verbose_name='Siguiente número')),
+                ('numbering', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counters', to='invoicing.invoicenumbering', verbose_name='Numeración')),
+            ],
+            options={
+                'verbose_name': 'Contador de facturas',
+                'verbose_name_plural': 'Contadores de facturas',
+                'unique_together': {('numbering', 'year')},
+            },
+        ),
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='invoicenumbering',
+            name='next_number',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoicing', '0005_invoice_number_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='statement_line',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='Movimiento bancario'),
+        ),
+    ]
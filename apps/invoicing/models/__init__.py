@@ -1,5 +1,6 @@
 from apps.invoicing.models.business import BusinessMembership
 from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.business import InvoiceNumberCounter
 from apps.invoicing.models.business import InvoiceNumbering
 from apps.invoicing.models.business import InvoiceTheme
 from apps.invoicing.models.client import CatalogItem
@@ -12,6 +13,7 @@ __all__ = [
     "BusinessProfile",
     "BusinessMembership",
     "InvoiceNumbering",
+    "InvoiceNumberCounter",
     "InvoiceTheme",
     "Client",
     "CatalogItem",
@@ -1,5 +1,10 @@
+from string import Formatter
+
 from django.conf import settings
+from django.db import IntegrityError
 from django.db import models
+from django.db import transaction
+from django.db.models import F
 
 
 class BusinessProfile(models.Model):
@@ -61,6 +66,10 @@ class BusinessMembership(models.Model):
         return f"{self.user} → {self.business_profile} ({self.get_role_display()})"
 
 
+# Year of the counter shared by patterns that do not include the year
+ALL_YEARS = 0
+
+
 class InvoiceNumbering(models.Model):
     business_profile = models.ForeignKey(
         BusinessProfile,
@@ -69,7 +78,6 @@ class InvoiceNumbering(models.Model):
         verbose_name="Empresa",
     )
     series_prefix = models.CharField("Prefijo de serie", max_length=10, default="F")
-    next_number = models.PositiveIntegerField("Siguiente número", default=1)
     format_pattern = models.CharField(
         "Patrón de formato",
         max_length=100,
@@ -83,15 +91,80 @@ class InvoiceNumbering(models.Model):
     def __str__(self):
         return f"{self.business_profile} – {self.series_prefix}"
 
-    def generate_number(self, year):
-        number = self.format_pattern.format(
+    def format_number(self, year, number):
+        return self.format_pattern.format(
             prefix=self.series_prefix,
             year=year,
-            number=self.next_number,
+            number=number,
         )
-        self.next_number += 1
-        self.save(update_fields=["next_number"])
-        return number
+
+    @property
+    def numbers_by_year(self):
+        """Whether numbers include the year, so each year can restart at 1."""
+        return any(
+            field == "year" for _, field, _, _ in Formatter().parse(self.format_pattern)
+        )
+
+    def counter_year(self, year):
+        # Patterns without the year share a single counter (year 0)
+        return year if self.numbers_by_year else ALL_YEARS
+
+    def get_next_number(self, year):
+        counter = self.counters.filter(year=self.counter_year(year)).first()
+        return counter.next_number if counter else 1
+
+    def reserve_numbers(self, year, count=1):
+        """Reserve ``count`` consecutive numbers of ``year``, formatted.
+
+        Numbers restart every year only when the pattern includes the
+        year; otherwise the series runs on across years. The counter is
+        moved forward in the database with a single UPDATE, whatever
+        ``count`` is. The UPDATE locks the counter until the
+        surrounding transaction ends, so concurrent callers wait instead of
+        reading the same value, and a rollback gives the numbers back: call
+        it inside the transaction that saves the invoices and the series
+        stays free of gaps and duplicates.
+        """
+        counter_year = self.counter_year(year)
+        with transaction.atomic(savepoint=False):
+            counters = InvoiceNumberCounter.objects.filter(
+                numbering=self, year=counter_year
+            )
+            if not counters.update(next_number=F("next_number") + count):
+                try:
+                    with transaction.atomic():
+                        InvoiceNumberCounter.objects.create(
+                            numbering=self, year=counter_year, next_number=1 + count
+                        )
+                except IntegrityError:
+                    # Another transaction created the counter first
+                    counters.update(next_number=F("next_number") + count)
+            end = counters.values_list("next_number", flat=True).get()
+        return [self.format_number(year, number) for number in range(end - count, end)]
+
+    def generate_number(self, year):
+        return self.reserve_numbers(year)[0]
+
+
+class InvoiceNumberCounter(models.Model):
+    """Next number of a numbering series in a given year (0: every year)."""
+
+    numbering = models.ForeignKey(
+        InvoiceNumbering,
+        on_delete=models.CASCADE,
+        related_name="counters",
+        verbose_name="Numeración",
+    )
+    year = models.PositiveIntegerField("Año")
+    next_number = models.PositiveIntegerField("Siguiente número", default=1)
+
+    class Meta:
+        verbose_name = "Contador de facturas"
+        verbose_name_plural = "Contadores de facturas"
+        unique_together = ("numbering", "year")
+
+    def __str__(self):
+        return f"{self.numbering} {self.year}: {self.next_number}"
 
 
 class InvoiceTheme(models.Model):
@@ -24,6 +24,11 @@ class Client(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ["name"]
+        indexes = [
+            models.Index(
+                fields=["business_profile", "tax_id"], name="client_business_tax_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -1,6 +1,92 @@
+from decimal import ROUND_HALF_UP
 from decimal import Decimal
 
 from django.db import models
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import Round
+
+from apps.invoicing.models.payment import Payment
+
+CENT = Decimal("0.01")
+MONEY = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def line_subtotal_expression(prefix=""):
+    """SQL equivalent of ``InvoiceLineItem.subtotal``.
+
+    ``prefix`` lets callers reach the line fields through a relation,
+    e.g. ``"lines__"`` from an invoice queryset. Percentages are scaled by
+    multiplying with 0.01 so SQLite never falls back to integer division.
+    """
+    return (
+        F(f"{prefix}quantity")
+        * F(f"{prefix}unit_price")
+        * (Value(Decimal("100")) - F(f"{prefix}discount_percent"))
+        * Value(CENT)
+    )
+
+
+def line_tax_expression(prefix=""):
+    """SQL equivalent of ``InvoiceLineItem.tax_amount``."""
+    return line_subtotal_expression(prefix) * F(f"{prefix}tax_rate") * Value(CENT)
+
+
+def line_withholding_expression(prefix=""):
+    """SQL equivalent of ``InvoiceLineItem.withholding_amount``."""
+    return (
+        line_subtotal_expression(prefix) * F(f"{prefix}withholding_rate") * Value(CENT)
+    )
+
+
+def _lines_sum(expression):
+    lines = (
+        InvoiceLineItem.objects.filter(invoice=OuterRef("pk"))
+        .order_by()
+        .values("invoice")
+        .annotate(value=Sum(expression, output_field=MONEY))
+        .values("value")
+    )
+    return Coalesce(Round(Subquery(lines), 2), Value(Decimal("0")), output_field=MONEY)
+
+
+class InvoiceQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate the totals computed from the lines inside the database.
+
+        Adds ``calculated_subtotal``, ``calculated_tax_total``,
+        ``calculated_withholding_total`` and ``calculated_total``, rounded
+        to cents like ``Invoice.compute_totals()``. The stored columns are
+        what pages read; this is the source of truth used to audit them.
+        """
+        subtotal = _lines_sum(line_subtotal_expression())
+        tax_total = _lines_sum(line_tax_expression())
+        withholding_total = _lines_sum(line_withholding_expression())
+        return self.annotate(
+            calculated_subtotal=subtotal,
+            calculated_tax_total=tax_total,
+            calculated_withholding_total=withholding_total,
+            calculated_total=subtotal + tax_total - withholding_total,
+        )
+
+    def with_paid_amount(self):
+        """Annotate ``calculated_paid_amount``, the sum of the payments."""
+        payments = (
+            Payment.objects.filter(invoice=OuterRef("pk"))
+            .order_by()
+            .values("invoice")
+            .annotate(value=Sum("amount"))
+            .values("value")
+        )
+        return self.annotate(
+            calculated_paid_amount=Coalesce(
+                Subquery(payments), Value(Decimal("0")), output_field=MONEY
+            )
+        )
 
 
 class Invoice(models.Model):
@@ -36,33 +122,103 @@ class Invoice(models.Model):
     notes = models.TextField("Notas", blank=True)
     legal_text = models.TextField("Texto legal", blank=True)
     pdf_file = models.FileField("PDF", upload_to="invoices/", blank=True)
+
+    # Totals are denormalized from the lines; see recalculate_totals()
+    subtotal = models.DecimalField(
+        "Base imponible",
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+    )
+    tax_total = models.DecimalField(
+        "IVA", max_digits=12, decimal_places=2, default=Decimal("0"), editable=False
+    )
+    withholding_total = models.DecimalField(
+        "Retención IRPF",
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+    )
+    total = models.DecimalField(
+        "Total", max_digits=12, decimal_places=2, default=Decimal("0"), editable=False
+    )
+    # Maintained from the payments; see apps.invoicing.services.payment
+    paid_amount = models.DecimalField(
+        "Cobrado",
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+    )
+    balance = models.DecimalField(
+        "Pendiente",
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0"),
+        editable=False,
+    )
+
     created_at = models.DateTimeField("Fecha de creación", auto_now_add=True)
     updated_at = models.DateTimeField("Fecha de actualización", auto_now=True)
 
+    objects = InvoiceQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Factura"
         verbose_name_plural = "Facturas"
         ordering = ["-issue_date", "-number"]
         unique_together = ("business_profile", "number")
+        indexes = [
+            models.Index(
+                fields=["business_profile", "issue_date", "status"],
+                name="invoice_business_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.number} – {self.client}"
 
-    @property
-    def subtotal(self):
-        return sum(line.subtotal for line in self.lines.all())
+    def compute_totals(self, lines=None):
+        """Return the totals of the given lines (default: the stored ones).
 
-    @property
-    def tax_total(self):
-        return sum(line.tax_amount for line in self.lines.all())
+        Each total is rounded to cents, and ``total`` is built from the
+        rounded parts so it always matches what the invoice shows.
+        """
+        if lines is None:
+            lines = self.lines.all()
+        subtotal = tax_total = withholding_total = Decimal("0")
+        for line in lines:
+            line_subtotal = line.subtotal
+            subtotal += line_subtotal
+            tax_total += line_subtotal * line.tax_rate / Decimal("100")
+            withholding_total += line_subtotal * line.withholding_rate / Decimal("100")
+        subtotal = subtotal.quantize(CENT, rounding=ROUND_HALF_UP)
+        tax_total = tax_total.quantize(CENT, rounding=ROUND_HALF_UP)
+        withholding_total = withholding_total.quantize(CENT, rounding=ROUND_HALF_UP)
+        return {
+            "subtotal": subtotal,
+            "tax_total": tax_total,
+            "withholding_total": withholding_total,
+            "total": subtotal + tax_total - withholding_total,
+        }
 
-    @property
-    def withholding_total(self):
-        return sum(line.withholding_amount for line in self.lines.all())
+    def recalculate_totals(self):
+        """Recompute the stored totals from the lines and persist them.
 
-    @property
-    def total(self):
-        return self.subtotal + self.tax_total - self.withholding_total
+        Uses a queryset update so a stale in-memory invoice can never
+        overwrite other fields, and so ``updated_at`` is left untouched.
+        The balance is derived from the stored paid amount in the same
+        statement.
+        """
+        totals = self.compute_totals()
+        for field, value in totals.items():
+            setattr(self, field, value)
+        self.balance = self.total - self.paid_amount
+        Invoice.objects.filter(pk=self.pk).update(
+            **totals, balance=Value(self.total) - F("paid_amount")
+        )
 
 
 class InvoiceLineItem(models.Model):
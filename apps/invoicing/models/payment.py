@@ -23,6 +23,10 @@ class Payment(models.Model):
         default=Method.TRANSFER,
     )
     notes = models.TextField("Notas", blank=True)
+    # Fingerprint of the bank statement line the payment was imported from
+    statement_line = models.CharField(
+        "Movimiento bancario", max_length=40, blank=True, editable=False
+    )
     created_at = models.DateTimeField("Fecha de creación", auto_now_add=True)
 
     class Meta:
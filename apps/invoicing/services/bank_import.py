@@ -0,0 +1,316 @@
+"""Reconciliation of bank statements against open invoices.
+
+Statements are read line by line, either AEB Norma 43 (cuaderno 43) or a
+bank CSV export, and only incoming movements (credits) are considered.
+Each movement is matched to an open invoice through an in-memory index
+built with a single query:
+
+1. an invoice number found among the tokens of the concept,
+2. a client NIF in the concept, with an invoice of that client whose
+   outstanding balance equals the amount,
+3. a single open invoice whose outstanding balance equals the amount.
+
+Every payment keeps a fingerprint of its statement line, so lines that
+were already imported are skipped before matching, whatever the state of
+the invoice they paid. Identical lines of one statement (two equal
+transfers on the same day) are told apart by their position among them.
+
+Matched movements become ``Payment`` rows created with ``bulk_create``.
+Since that skips the signal receivers, the paid amounts, balances and
+statuses of the affected invoices are updated afterwards in a few
+set-based statements.
+"""
+
+import csv
+import hashlib
+import re
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from decimal import InvalidOperation
+
+from django.db import transaction
+
+from apps.invoicing.models.invoice import CENT
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.cache import bump_data_version
+from apps.invoicing.services.payment import add_paid_amounts
+from apps.invoicing.services.payment import refresh_invoice_statuses
+
+BATCH_SIZE = 1000
+
+TOKEN_SPLIT = re.compile(r"[\s,;:()\[\]]+")
+NON_ALPHANUMERIC = re.compile(r"[^0-9A-Z]")
+
+CSV_COLUMNS = {
+    "date": ("fecha", "fecha operación", "fecha operacion", "fecha valor", "date"),
+    "amount": ("importe", "cantidad", "amount"),
+    "concept": ("concepto", "descripción", "descripcion", "detalle", "concept"),
+}
+CSV_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y")
+
+
+class BankImportError(Exception):
+    pass
+
+
+def _normalize(token):
+    return NON_ALPHANUMERIC.sub("", token.upper())
+
+
+def _tokens(text):
+    return {_normalize(token) for token in TOKEN_SPLIT.split(text)} - {""}
+
+
+def _fingerprint(movement, occurrence):
+    key = "|".join(
+        (
+            movement["date"].isoformat(),
+            str(movement["amount"].quantize(CENT)),
+            movement["concept"],
+            movement["reference"],
+            str(occurrence),
+        )
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _movement(day, amount, concept, reference=""):
+    return {
+        "date": day,
+        "amount": amount,
+        "concept": " ".join(concept.split()),
+        "reference": reference.strip(),
+    }
+
+
+def parse_norma43(lines):
+    """Yield the credit movements of an AEB Norma 43 statement.
+
+    Record 22 is a movement and the 23 records after it add to its concept.
+    """
+    movement = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        record = line[:2]
+        if record == "23" and movement is not None:
+            movement["concept"] = " ".join(
+                f"{movement['concept']} {line[4:42]} {line[42:80]}".split()
+            )
+            continue
+        if movement is not None:
+            yield movement
+            movement = None
+        if record != "22":
+            continue
+        if len(line) < 42:
+            raise BankImportError(f"Registro 22 incompleto: {line!r}")
+        if line[27] != "2":  # 1 = debe (cargo), 2 = haber (abono)
+            continue
+        try:
+            day = datetime.strptime(line[10:16], "%y%m%d").date()
+            amount = Decimal(line[28:42]) / 100
+        except ValueError as exc:
+            raise BankImportError(f"Registro 22 no válido: {line!r}") from exc
+        movement = _movement(day, amount, "", f"{line[42:52]} {line[52:80]}")
+    if movement is not None:
+        yield movement
+
+
+def _parse_amount(value):
+    """Amount in Spanish (1.234,56) or English (1,234.56) format.
+
+    The last separator is the decimal one. Amounts with more than two
+    decimals are rejected: "1.234" could be either.
+    """
+    value = value.strip().replace("€", "").replace(" ", "")
+    if value.rfind(",") > value.rfind("."):
+        value = value.replace(".", "").replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    amount = Decimal(value)
+    if amount.as_tuple().exponent < -2:
+        raise ValueError(value)
+    return amount
+
+
+def _parse_date(value):
+    value = value.strip()
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def parse_csv(lines):
+    """Yield the credit movements (positive amounts) of a bank CSV export.
+
+    Columns are found by their header (fecha, importe, concepto...); the
+    delimiter is guessed from the header line.
+    """
+    lines = iter(lines)
+    header = next(lines, "")
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=";,\t")
+    except csv.Error as exc:
+        raise BankImportError("No se reconoce el formato del CSV.") from exc
+    names = [name.strip().lower() for name in next(csv.reader([header], dialect))]
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[key] = names.index(alias)
+                break
+        else:
+            raise BankImportError(f"Falta la columna «{aliases[0]}» en el CSV.")
+
+    for number, row in enumerate(csv.reader(lines, dialect), start=2):
+        if not any(row):
+            continue
+        try:
+            amount = _parse_amount(row[columns["amount"]])
+            day = _parse_date(row[columns["date"]])
+        except (IndexError, ValueError, InvalidOperation) as exc:
+            raise BankImportError(f"Fila {number} no válida: {row}") from exc
+        if amount > 0:
+            yield _movement(day, amount, row[columns["concept"]])
+
+
+def parse_statement(lines):
+    """Parse Norma 43 or CSV, telling them apart by the first record."""
+    lines = iter(lines)
+    first = next(lines, "")
+    rest = _chain(first, lines)
+    if first[:2] == "11" and len(first.rstrip("\r\n")) >= 80:
+        return parse_norma43(rest)
+    return parse_csv(rest)
+
+
+def _chain(first, lines):
+    yield first
+    yield from lines
+
+
+class InvoiceIndex:
+    """Open invoices of a business keyed by number, client NIF and balance."""
+
+    def __init__(self, business_profile):
+        self.by_number = {}
+        self.by_tax_id = defaultdict(list)
+        self.by_balance = defaultdict(set)
+        self.balances = {}
+        invoices = (
+            Invoice.objects.filter(
+                business_profile=business_profile,
+                status=Invoice.Status.SENT,
+                balance__gt=0,
+            )
+            .order_by("issue_date", "pk")
+            .values_list("pk", "number", "balance", "client__tax_id")
+        )
+        for pk, number, balance, tax_id in invoices:
+            self.balances[pk] = balance
+            self.by_number[_normalize(number)] = pk
+            self.by_balance[balance].add(pk)
+            if tax_id:
+                self.by_tax_id[_normalize(tax_id)].append(pk)
+
+    def match(self, movement):
+        """Id of the open invoice a movement pays, or None."""
+        tokens = _tokens(movement["concept"])
+        amount = movement["amount"]
+
+        for token in tokens:
+            pk = self.by_number.get(token)
+            if pk in self.balances:
+                return pk
+
+        for token in tokens:
+            for pk in self.by_tax_id.get(token, ()):
+                if self.balances.get(pk) == amount:
+                    return pk
+
+        candidates = self.by_balance.get(amount, ())
+        if len(candidates) == 1:
+            return next(iter(candidates))
+        return None
+
+    def apply(self, pk, amount):
+        """Take a matched amount off the invoice's outstanding balance."""
+        balance = self.balances.pop(pk)
+        self.by_balance[balance].discard(pk)
+        balance -= amount
+        if balance > 0:
+            self.balances[pk] = balance
+            self.by_balance[balance].add(pk)
+
+
+def _write_payments(payments):
+    Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+    totals = defaultdict(Decimal)
+    for payment in payments:
+        totals[payment.invoice_id] += payment.amount
+    add_paid_amounts(totals)
+    refresh_invoice_statuses(Invoice.objects.filter(pk__in=list(totals)))
+
+
+def import_bank_statement(business_profile, lines, dry_run=False):
+    """Match the credits of a statement and record them as payments.
+
+    ``lines`` is any iterable of text lines (an open file streams). Returns
+    a dict with the ``matched`` movements (each with its ``invoice_id``),
+    the ``unmatched`` ones and the number of ``duplicates`` skipped because
+    the line was already imported.
+    """
+    index = InvoiceIndex(business_profile)
+    imported = set(
+        Payment.objects.filter(invoice__business_profile=business_profile)
+        .exclude(statement_line="")
+        .values_list("statement_line", flat=True)
+    )
+    occurrences = defaultdict(int)
+    matched, unmatched, payments = [], [], []
+    duplicates = 0
+
+    for movement in parse_statement(lines):
+        occurrence_key = _fingerprint(movement, 0)
+        fingerprint = _fingerprint(movement, occurrences[occurrence_key])
+        occurrences[occurrence_key] += 1
+        if fingerprint in imported:
+            duplicates += 1
+            continue
+        pk = index.match(movement)
+        if pk is None:
+            unmatched.append(movement)
+            continue
+        index.apply(pk, movement["amount"])
+        matched.append({**movement, "invoice_id": pk})
+        payments.append(
+            Payment(
+                invoice_id=pk,
+                amount=movement["amount"],
+                date=movement["date"],
+                method=Payment.Method.TRANSFER,
+                notes=f"Extracto bancario: {movement['concept']}",
+                statement_line=fingerprint,
+            )
+        )
+
+    if payments and not dry_run:
+        with transaction.atomic():
+            _write_payments(payments)
+        bump_data_version(business_profile.pk)
+
+    return {"matched": matched, "unmatched": unmatched, "duplicates": duplicates}
+
+
+def open_statement(uploaded_file):
+    """Text lines of an uploaded statement (UTF-8, or Latin-1 as banks use)."""
+    for raw in uploaded_file:
+        try:
+            yield raw.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            yield raw.decode("latin-1")
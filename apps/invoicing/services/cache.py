@@ -0,0 +1,90 @@
+"""Per-business cache for derived data (dashboards, modelos...).
+
+Every business has a "data version" stamp in the cache. Signal receivers
+bump it whenever an invoice, line, payment, expense or fiscal record of the
+business is written, and every cached value is stored under a key that
+includes the current stamp. Stale entries are therefore never read again
+and simply expire, so no explicit invalidation is needed.
+
+A second stamp, the "ledger version", is bumped by the same writes except
+the saved quarterly results. The modelos are keyed on it: a result is
+computed from them, so saving it must not throw them away.
+
+The stamps are nanosecond timestamps rather than counters: if a stamp
+itself is evicted, the new one can never collide with an older version.
+
+Writes usually happen inside a transaction, so the stamp is bumped twice:
+right away, so the writer never reads values cached before its changes,
+and again on commit, so whatever a concurrent request computed from the
+not yet committed data in between is never read either.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _version_key(business_id, scope="data"):
+    return f"business:{business_id}:{scope}_version"
+
+
+def _membership_version_key(user_id):
+    return f"user:{user_id}:membership_version"
+
+
+def _get_stamp(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_version(business_id):
+    return _get_stamp(_version_key(business_id))
+
+
+def _bump_stamp(key):
+    cache.set(key, time.time_ns(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), None))
+
+
+def get_ledger_version(business_id):
+    return _get_stamp(_version_key(business_id, "ledger"))
+
+
+def bump_data_version(business_id, ledger=True):
+    """Bump the data version, and the ledger version unless ``ledger`` is false."""
+    _bump_stamp(_version_key(business_id))
+    if ledger:
+        _bump_stamp(_version_key(business_id, "ledger"))
+
+
+def get_membership_version(user_id):
+    """Stamp of the user's memberships, bumped when any of them changes."""
+    return _get_stamp(_membership_version_key(user_id))
+
+
+def bump_membership_version(user_id):
+    _bump_stamp(_membership_version_key(user_id))
+
+
+def _versioned_key(business_id, key, ledger=False):
+    version = (get_ledger_version if ledger else get_data_version)(business_id)
+    return f"business:{business_id}:{version}:{key}"
+
+
+def get_or_compute(business_id, key, compute, timeout=CACHE_TIMEOUT, ledger=False):
+    """Return the cached value for ``key`` or store ``compute()``'s result.
+
+    With ``ledger`` the value is kept under the ledger version instead.
+    """
+    versioned_key = _versioned_key(business_id, key, ledger)
+    value = cache.get(versioned_key)
+    if value is None:
+        value = compute()
+        cache.set(versioned_key, value, timeout)
+    return value
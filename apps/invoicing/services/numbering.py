@@ -1,9 +1,28 @@
 from apps.invoicing.models.business import InvoiceNumbering
 
 
-def get_next_invoice_number(business_profile, year):
-    numbering, created = InvoiceNumbering.objects.get_or_create(
-        business_profile=business_profile,
-        defaults={"series_prefix": "F", "next_number": 1},
-    )
-    return numbering.generate_number(year)
+def get_invoice_numbering(business_profile, series=None):
+    """Numbering of ``series`` (the business' first one by default)."""
+    numberings = InvoiceNumbering.objects.filter(business_profile=business_profile)
+    if series is not None:
+        numberings = numberings.filter(series_prefix=series)
+    numbering = numberings.order_by("pk").first()
+    if numbering is None:
+        numbering = InvoiceNumbering.objects.create(
+            business_profile=business_profile, series_prefix=series or "F"
+        )
+    return numbering
+
+
+def get_next_invoice_number(business_profile, year, series=None):
+    return get_invoice_numbering(business_profile, series).generate_number(year)
+
+
+def reserve_invoice_numbers(business_profile, year, count, series=None):
+    """Reserve a block of ``count`` consecutive invoice numbers at once.
+
+    For batch generators: one UPDATE whatever the size of the block. Call
+    it inside the transaction that creates the invoices, so the block is
+    released if it rolls back.
+    """
+    return get_invoice_numbering(business_profile, series).reserve_numbers(year, count)
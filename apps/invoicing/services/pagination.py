@@ -0,0 +1,89 @@
+"""Keyset (cursor) pagination for long, date-ordered lists.
+
+``Paginator`` counts every row and skips pages with OFFSET, so deep
+pages get slower as the history grows. Here a page starts right after
+the ``(date, pk)`` of the last row shown, which an index on the date
+column resolves directly whatever the depth. There is no page count:
+pages only link to the next and previous ones.
+
+Cursors are ``"<ISO date>_<pk>"`` strings; invalid cursors are ignored
+and give the first page.
+"""
+
+from datetime import date
+
+from django.db.models import Q
+
+
+def _parse_cursor(cursor):
+    try:
+        day, pk = cursor.split("_")
+        return date.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, date_field, has_next, has_previous):
+        self.object_list = object_list
+        self.date_field = date_field
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _cursor(self, obj):
+        return f"{getattr(obj, self.date_field).isoformat()}_{obj.pk}"
+
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.previous_cursor)
+
+    @property
+    def next_cursor(self):
+        if not (self.has_next and self.object_list):
+            return None
+        return self._cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not (self.has_previous and self.object_list):
+            return None
+        return self._cursor(self.object_list[0])
+
+
+def keyset_paginate(queryset, date_field, after=None, before=None, per_page=25):
+    """Page of ``queryset`` ordered newest first by ``(date_field, pk)``.
+
+    ``after`` gives the page following that cursor, ``before`` the page
+    preceding it.
+    """
+    backwards = before is not None and _parse_cursor(before) is not None
+    key = _parse_cursor(before if backwards else after)
+
+    if key is not None:
+        day, pk = key
+        # The plain date bound lets the index seek; the OR breaks ties
+        if backwards:
+            queryset = queryset.filter(
+                Q(**{f"{date_field}__gte": day}),
+                Q(**{f"{date_field}__gt": day}) | Q(pk__gt=pk),
+            )
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{date_field}__lte": day}),
+                Q(**{f"{date_field}__lt": day}) | Q(pk__lt=pk),
+            )
+
+    ordering = (date_field, "pk") if backwards else (f"-{date_field}", "-pk")
+    object_list = list(queryset.order_by(*ordering)[: per_page + 1])
+    has_more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+
+    if backwards:
+        object_list.reverse()
+        return KeysetPage(object_list, date_field, True, has_more)
+    return KeysetPage(object_list, date_field, has_more, key is not None)
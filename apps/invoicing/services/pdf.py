@@ -1,7 +1,27 @@
+import hashlib
+import json
+from functools import lru_cache
+from itertools import batched
+
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.forms.models import model_to_dict
+from django.template.loader import get_template
 from django.template.loader import render_to_string
 
 from apps.invoicing.models.business import InvoiceTheme
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.services.pdf_pool import get_render_pool
+
+# Bump to invalidate every stored PDF (e.g. after a WeasyPrint upgrade)
+PDF_RENDER_VERSION = 1
+
+# Invoices read from the database and rendered per batch
+RENDER_BATCH_SIZE = 100
+
+# Fields that never show up on the rendered document
+UNRENDERED_FIELDS = ["pdf_file", "created_at", "updated_at"]
 
 
 def get_invoice_theme(invoice):
@@ -22,11 +42,14 @@ def get_invoice_theme(invoice):
     return theme
 
 
+def get_template_name(theme):
+    variant = theme.layout_variant or "classic"
+    return f"invoicing/pdf/{variant}.html"
+
+
 def render_invoice_html(invoice, theme=None):
     if theme is None:
         theme = get_invoice_theme(invoice)
-    variant = theme.layout_variant or "classic"
-    template_name = f"invoicing/pdf/{variant}.html"
     context = {
         "invoice": invoice,
         "business": invoice.business_profile,
@@ -34,13 +57,112 @@ def render_invoice_html(invoice, theme=None):
         "lines": invoice.lines.all(),
         "theme": theme,
     }
-    return render_to_string(template_name, context)
+    return render_to_string(get_template_name(theme), context)
 
 
-def generate_invoice_pdf(invoice):
-    import weasyprint
-
-    html_string = render_invoice_html(invoice)
+def generate_invoice_pdf(invoice, theme=None):
+    html_string = render_invoice_html(invoice, theme)
     base_url = str(settings.MEDIA_ROOT)
-    pdf_bytes = weasyprint.HTML(string=html_string, base_url=base_url).write_pdf()
+    return get_render_pool().render(html_string, base_url)
+
+
+@lru_cache
+def get_template_fingerprint(template_name):
+    source = get_template(template_name).template.source
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def get_invoice_pdf_key(invoice, theme):
+    """Hash of everything that ends up in the rendered PDF.
+
+    Covers the invoice, its lines, the client, the business profile, the
+    theme and the template source, so any change to them yields a new key.
+    """
+    template_name = get_template_name(theme)
+    payload = {
+        "version": PDF_RENDER_VERSION,
+        "template": get_template_fingerprint(template_name),
+        "invoice": model_to_dict(invoice, exclude=UNRENDERED_FIELDS),
+        "lines": [model_to_dict(line) for line in invoice.lines.all()],
+        "client": model_to_dict(invoice.client, exclude=["created_at", "updated_at"]),
+        "business": model_to_dict(
+            invoice.business_profile, exclude=["created_at", "updated_at"]
+        ),
+        "theme": model_to_dict(theme),
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def get_invoice_pdf_name(invoice, theme):
+    return f"invoices/{get_invoice_pdf_key(invoice, theme)}.pdf"
+
+
+def read_stored_pdf(invoice, name):
+    """Stored PDF bytes if ``Invoice.pdf_file`` is up to date, else None."""
+    if invoice.pdf_file.name == name and default_storage.exists(name):
+        with default_storage.open(name, "rb") as f:
+            return f.read()
+    return None
+
+
+def store_invoice_pdf(invoice, name, pdf_bytes):
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(pdf_bytes))
+    old_name = invoice.pdf_file.name
+    if old_name and old_name != name:
+        default_storage.delete(old_name)
+    # update() keeps this out of updated_at and the data version signals
+    Invoice.objects.filter(pk=invoice.pk).update(pdf_file=name)
+    invoice.pdf_file.name = name
+
+
+def get_invoice_pdf(invoice):
+    """Return the invoice PDF, rendering it only when its inputs changed.
+
+    PDFs are stored under ``invoices/<key>.pdf`` and referenced from
+    ``Invoice.pdf_file``. A new key replaces (and deletes) the old file.
+    """
+    theme = get_invoice_theme(invoice)
+    name = get_invoice_pdf_name(invoice, theme)
+    pdf_bytes = read_stored_pdf(invoice, name)
+    if pdf_bytes is None:
+        pdf_bytes = generate_invoice_pdf(invoice, theme)
+        store_invoice_pdf(invoice, name, pdf_bytes)
     return pdf_bytes
+
+
+def iter_invoice_pdfs(invoices, pool=None):
+    """Yield ``(invoice, pdf_bytes)`` for a queryset of invoices.
+
+    Invoices are read in batches, so a long period is never held in memory
+    at once. In each batch, up-to-date stored PDFs are yielded first; the
+    rest are rendered on ``pool`` (default: the web one) in parallel,
+    stored and yielded as each one finishes.
+    """
+    pool = pool or get_render_pool()
+    base_url = str(settings.MEDIA_ROOT)
+    themes = {}
+    rows = invoices.iterator(chunk_size=RENDER_BATCH_SIZE)
+    for batch in batched(rows, RENDER_BATCH_SIZE):
+        missing = {}
+        for invoice in batch:
+            theme = themes.get(invoice.business_profile_id)
+            if theme is None:
+                theme = get_invoice_theme(invoice)
+                themes[invoice.business_profile_id] = theme
+            name = get_invoice_pdf_name(invoice, theme)
+            pdf_bytes = read_stored_pdf(invoice, name)
+            if pdf_bytes is None:
+                missing[invoice.pk] = (invoice, theme, name)
+            else:
+                yield invoice, pdf_bytes
+
+        jobs = (
+            (pk, render_invoice_html(invoice, theme), base_url)
+            for pk, (invoice, theme, name) in list(missing.items())
+        )
+        for pk, pdf_bytes in pool.render_many(jobs):
+            invoice, _theme, name = missing.pop(pk)
+            store_invoice_pdf(invoice, name, pdf_bytes)
+            yield invoice, pdf_bytes
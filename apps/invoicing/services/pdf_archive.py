@@ -0,0 +1,74 @@
+"""ZIP archives of invoice PDFs, streamed while they are being built."""
+
+import zipfile
+
+from django.utils.text import get_valid_filename
+
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.services.pdf import iter_invoice_pdfs
+
+
+class ZipStream:
+    """Write-only buffer for ``ZipFile`` that is drained after each entry.
+
+    It has no ``seek()``, so ``ZipFile`` writes data descriptors after each
+    entry instead of going back to patch the local headers.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def get_archive_invoices(business_profile, start_date, end_date):
+    """Issued (non-draft) invoices of a period, ready for PDF rendering.
+
+    ``iter_invoice_pdfs()`` reads them in batches, lines prefetched per batch.
+    """
+    return (
+        Invoice.objects.filter(
+            business_profile=business_profile,
+            issue_date__range=(start_date, end_date),
+        )
+        .exclude(status=Invoice.Status.DRAFT)
+        .select_related("client", "business_profile")
+        .prefetch_related("lines")
+        .order_by("issue_date", "number")
+    )
+
+
+def iter_invoice_pdf_zip(invoices, pool=None):
+    """Yield the bytes of a ZIP with one PDF per invoice.
+
+    Entries are stored uncompressed (PDFs already are) and each one is
+    yielded as soon as its PDF is available, so only one document is held
+    in memory at a time. Missing PDFs are rendered on ``pool`` (default:
+    the web one).
+    """
+    stream = ZipStream()
+    names = set()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED) as archive:
+        for invoice, pdf_bytes in iter_invoice_pdfs(invoices, pool):
+            name = get_valid_filename(f"{invoice.number}.pdf")
+            if name in names:
+                name = get_valid_filename(f"{invoice.number}-{invoice.pk}.pdf")
+            names.add(name)
+            archive.writestr(name, pdf_bytes)
+            yield stream.pop()
+    yield stream.pop()
@@ -0,0 +1,280 @@
+"""Pool of warm worker processes that run WeasyPrint.
+
+Rendering a PDF is CPU-bound and the first render of a process pays for
+importing WeasyPrint and loading fontconfig. Workers are spawned once,
+warmed up with a tiny document and then reused, so web workers only
+render the HTML template and wait for the bytes.
+
+The pool accepts at most ``workers + queue_size`` jobs at a time. Web
+requests that find it full fail fast with ``PdfRenderBusy``; batch jobs
+use ``render_many()``, which waits for free slots instead. A job that
+exceeds its timeout raises ``PdfRenderTimeout`` and the pool is retired:
+new jobs go to a fresh pool, and the old one is terminated once the
+renders still running on it are over, so a stuck renderer cannot hold a
+worker forever nor take other renders down with it. A worker that fails
+to start fails its jobs with ``PdfRenderStartError`` right away.
+
+This module only imports the standard library at the top level because
+spawned workers import it before Django is set up.
+"""
+
+import multiprocessing
+import queue
+import threading
+
+weasyprint = None
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+class PdfRenderBusy(PdfRenderError):
+    pass
+
+
+class PdfRenderTimeout(PdfRenderError):
+    pass
+
+
+class PdfRenderStartError(PdfRenderError):
+    pass
+
+
+def warm_up():
+    global weasyprint
+    import weasyprint
+
+    weasyprint.HTML(string="<p>warm-up</p>").write_pdf()
+
+
+def render_pdf(html, base_url):
+    if weasyprint is None:
+        warm_up()
+    return weasyprint.HTML(string=html, base_url=base_url).write_pdf()
+
+
+# Set in a worker whose initializer failed
+_start_error = None
+
+
+def _start_worker(initializer):
+    # An initializer that raises kills the worker and the pool respawns it
+    # forever, leaving jobs to wait for their timeout. Keep the worker and
+    # fail its jobs with the error instead.
+    global _start_error
+    if initializer is None:
+        return
+    try:
+        initializer()
+    except Exception as exc:
+        _start_error = f"{type(exc).__name__}: {exc}"
+
+
+def _run_job(target, args):
+    if _start_error is not None:
+        raise PdfRenderStartError(f"PDF renderer failed to start: {_start_error}")
+    return target(*args)
+
+
+class _Generation:
+    """A process pool and the number of jobs still running on it."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.jobs = 0
+        self.retired = False
+
+
+class PdfRenderPool:
+    def __init__(
+        self,
+        workers,
+        queue_size,
+        timeout,
+        target=render_pdf,
+        initializer=warm_up,
+        max_tasks_per_child=200,
+    ):
+        self.workers = workers
+        self.timeout = timeout
+        self.target = target
+        self.initializer = initializer
+        self.max_tasks_per_child = max_tasks_per_child
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._lock = threading.Lock()
+        self._generation = None
+
+    def _start(self, args, on_done):
+        """Submit a job to the current pool, reporting to ``on_done(pdf, exc)``.
+
+        Returns a function that abandons the job (a no-op once it has
+        finished) and the generation it runs on.
+        """
+        with self._lock:
+            if self._generation is None:
+                context = multiprocessing.get_context("spawn")
+                pool = context.Pool(
+                    self.workers,
+                    initializer=_start_worker,
+                    initargs=(self.initializer,),
+                    maxtasksperchild=self.max_tasks_per_child,
+                )
+                self._generation = _Generation(pool)
+            generation = self._generation
+            generation.jobs += 1
+        ended = threading.Lock()
+
+        def end():
+            # Whichever comes first, the result or the caller giving up
+            if not ended.acquire(blocking=False):
+                return False
+            self._end_job(generation)
+            return True
+
+        def callback(pdf):
+            if end():
+                on_done(pdf, None)
+
+        def error_callback(exc):
+            if isinstance(exc, PdfRenderStartError):
+                self._retire(generation)
+            if end():
+                on_done(None, exc)
+
+        try:
+            generation.pool.apply_async(
+                _run_job,
+                (self.target, args),
+                callback=callback,
+                error_callback=error_callback,
+            )
+        except ValueError as exc:  # the pool is no longer running
+            self._retire(generation)
+            end()
+            raise PdfRenderError("PDF render pool is not running") from exc
+        return end, generation
+
+    def _end_job(self, generation):
+        with self._lock:
+            generation.jobs -= 1
+            finished = generation.retired and not generation.jobs
+        if finished:
+            generation.pool.terminate()
+
+    def _retire(self, generation):
+        """Send new jobs to a fresh pool; the old one is terminated, with any
+        stuck worker, once the jobs still running on it are over.
+        """
+        with self._lock:
+            if generation.retired:
+                return
+            generation.retired = True
+            if self._generation is generation:
+                self._generation = None
+            finished = not generation.jobs
+        if finished:
+            generation.pool.terminate()
+
+    def close(self):
+        with self._lock:
+            generation, self._generation = self._generation, None
+        if generation is not None:
+            generation.pool.terminate()
+
+    def _run(self, args, timeout):
+        if self.workers == 0:
+            return self.target(*args)
+        done = queue.SimpleQueue()
+        abandon, generation = self._start(args, lambda pdf, exc: done.put((pdf, exc)))
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            pdf, exc = done.get(timeout=timeout)
+        except queue.Empty:
+            abandon()
+            self._retire(generation)
+            raise PdfRenderTimeout(f"PDF render exceeded {timeout}s") from None
+        if exc is not None:
+            raise exc
+        return pdf
+
+    def render(self, html, base_url, timeout=None):
+        """Render one document, failing fast when the pool is saturated."""
+        if not self._slots.acquire(blocking=False):
+            raise PdfRenderBusy("PDF render queue is full")
+        try:
+            return self._run((html, base_url), timeout)
+        finally:
+            self._slots.release()
+
+    def render_many(self, jobs):
+        """Render ``(key, html, base_url)`` jobs, yielding ``(key, pdf)``.
+
+        Results are yielded as soon as each one finishes, not in input
+        order. Jobs wait for free slots, so a large batch never holds more
+        than the pool's capacity of documents in flight.
+        """
+        if self.workers == 0:
+            for key, html, base_url in jobs:
+                yield key, self.target(html, base_url)
+            return
+
+        done = queue.SimpleQueue()
+        # Submitted and not collected yet: number -> (abandon, generation)
+        pending = {}
+
+        def submit(number, key, html, base_url):
+            self._slots.acquire()
+            try:
+                pending[number] = self._start(
+                    (html, base_url),
+                    lambda pdf, exc: done.put((number, key, pdf, exc)),
+                )
+            except BaseException:
+                self._slots.release()
+                raise
+
+        def collect():
+            try:
+                number, key, pdf, exc = done.get(timeout=self.timeout)
+            except queue.Empty:
+                for _abandon, generation in pending.values():
+                    self._retire(generation)
+                raise PdfRenderTimeout(f"PDF render exceeded {self.timeout}s") from None
+            del pending[number]
+            self._slots.release()
+            if exc is not None:
+                raise PdfRenderError(f"Could not render {key}") from exc
+            return key, pdf
+
+        try:
+            for number, job in enumerate(jobs):
+                while len(pending) >= self.workers:
+                    yield collect()
+                submit(number, *job)
+            while pending:
+                yield collect()
+        finally:
+            # Jobs nobody will collect (error or early exit)
+            for abandon, _generation in pending.values():
+                abandon()
+                self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Process-wide pool configured from the ``PDF_RENDER_*`` settings."""
+    global _pool
+    from django.conf import settings
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfRenderPool(
+                workers=settings.PDF_RENDER_WORKERS,
+                queue_size=settings.PDF_RENDER_QUEUE_SIZE,
+                timeout=settings.PDF_RENDER_TIMEOUT,
+            )
+        return _pool
@@ -1,50 +1,103 @@
 from functools import wraps
 
+from django.core.cache import cache
 from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.functional import SimpleLazyObject
 
 from apps.invoicing.models.business import BusinessMembership
 from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.services.cache import CACHE_TIMEOUT
+from apps.invoicing.services.cache import get_membership_version
+
+# Session key holding {"version": ..., "roles": {business_id: role}}
+SESSION_ROLES_KEY = "business_roles"
 
 
 def get_user_businesses(user):
     return BusinessProfile.objects.filter(memberships__user=user)
 
 
+def get_business_choices(user):
+    """``[{"pk", "name"}]`` of the user's businesses for the switcher.
+
+    Cached under the user's membership version, which is bumped when a
+    membership or a member business changes.
+    """
+    key = f"user:{user.pk}:{get_membership_version(user.pk)}:businesses"
+    choices = cache.get(key)
+    if choices is None:
+        choices = list(get_user_businesses(user).order_by("name").values("pk", "name"))
+        cache.set(key, choices, CACHE_TIMEOUT)
+    return choices
+
+
 def get_membership(user, business_profile):
     return BusinessMembership.objects.filter(
         user=user, business_profile=business_profile
     ).first()
 
 
+def get_user_roles(request):
+    """Return ``{business_id: role}`` for the user, keyed by str ids.
+
+    The mapping lives in the session together with the user's membership
+    version, so it is only reloaded after a membership changes.
+    """
+    if hasattr(request, "_business_roles"):
+        return request._business_roles
+    version = get_membership_version(request.user.pk)
+    cached = request.session.get(SESSION_ROLES_KEY)
+    if cached and cached.get("version") == version:
+        roles = cached["roles"]
+    else:
+        roles = {
+            str(business_id): role
+            for business_id, role in BusinessMembership.objects.filter(
+                user=request.user
+            ).values_list("business_profile_id", "role")
+        }
+        request.session[SESSION_ROLES_KEY] = {"version": version, "roles": roles}
+    request._business_roles = roles
+    return roles
+
+
+def get_role(request, business):
+    if not business:
+        return None
+    return get_user_roles(request).get(str(business.pk))
+
+
 def get_active_business(request):
+    """Active business of the user, resolved at most once per request."""
+    if hasattr(request, "_active_business"):
+        return request._active_business
+    roles = get_user_roles(request)
+    business = None
     business_id = request.session.get("active_business_id")
-    if business_id:
-        try:
-            business = BusinessProfile.objects.get(pk=business_id)
-            if BusinessMembership.objects.filter(
-                user=request.user, business_profile=business
-            ).exists():
-                return business
-        except BusinessProfile.DoesNotExist:
-            pass
-    first = (
-        BusinessProfile.objects.filter(memberships__user=request.user)
-        .order_by("name")
-        .first()
-    )
-    if first:
-        request.session["active_business_id"] = first.pk
-    return first
+    if business_id and str(business_id) in roles:
+        business = BusinessProfile.objects.filter(pk=business_id).first()
+    if business is None and roles:
+        business = BusinessProfile.objects.filter(pk__in=roles).order_by("name").first()
+        if business:
+            request.session["active_business_id"] = business.pk
+    request._active_business = business
+    return business
+
+
+def get_active_membership(request):
+    business = get_active_business(request)
+    if not get_role(request, business):
+        return None
+    return get_membership(request.user, business)
 
 
 def set_active_business(request, business_id):
     business = get_object_or_404(BusinessProfile, pk=business_id)
-    if not BusinessMembership.objects.filter(
-        user=request.user, business_profile=business
-    ).exists():
+    if not get_role(request, business):
         raise Http404
     request.session["active_business_id"] = business.pk
+    request._active_business = business
     return business
 
 
@@ -57,11 +110,12 @@ def require_role(*roles):
                 from django.shortcuts import redirect
 
                 return redirect("invoicing:business_create")
-            membership = get_membership(request.user, business)
-            if not membership or membership.role not in roles:
+            if get_role(request, business) not in roles:
                 raise Http404
             request.business = business
-            request.membership = membership
+            request.membership = SimpleLazyObject(
+                lambda: get_active_membership(request)
+            )
             return view_func(request, *args, **kwargs)
 
         return wrapper
@@ -77,9 +131,8 @@ def require_business(view_func):
             from django.shortcuts import redirect
 
             return redirect("invoicing:business_create")
-        membership = get_membership(request.user, business)
         request.business = business
-        request.membership = membership
+        request.membership = SimpleLazyObject(lambda: get_active_membership(request))
         return view_func(request, *args, **kwargs)
 
     return wrapper
@@ -0,0 +1,88 @@
+"""Accounts-receivable aging: what each client still owes, by how overdue.
+
+The outstanding balance of every sent invoice is stored on the invoice
+(``Invoice.balance`` already nets its payments), so the whole report is a
+single query grouped by client, with one conditional sum per bucket.
+Invoices without a due date are due on their issue date.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.invoicing.models.invoice import CENT
+from apps.invoicing.models.invoice import MONEY
+from apps.invoicing.models.invoice import Invoice
+
+# (key, label, min days overdue, max days overdue); None = open-ended
+AGING_BUCKETS = (
+    ("not_due", "Sin vencer", None, 0),
+    ("days_30", "0–30 días", 1, 30),
+    ("days_60", "31–60 días", 31, 60),
+    ("days_90", "61–90 días", 61, 90),
+    ("days_over_90", "Más de 90 días", 91, None),
+)
+
+
+def _bucket_filter(today, min_days, max_days):
+    # Overdue by at least ``min_days`` = due on or before today - min_days
+    condition = Q()
+    if min_days is not None:
+        condition &= Q(due__lte=today - timedelta(days=min_days))
+    if max_days is not None:
+        condition &= Q(due__gte=today - timedelta(days=max_days))
+    return condition
+
+
+def get_receivables(business_profile, today=None):
+    """Outstanding balance per client split into aging buckets.
+
+    Returns a dict with ``rows`` (one per client with pending invoices,
+    largest debt first: ``client_id``, ``name``, ``tax_id``, ``count``,
+    ``total``, one amount per bucket key and ``aging``, those amounts as a
+    list in bucket order), ``totals`` (the same amounts for all clients),
+    ``buckets`` (``(key, label)`` pairs, in order) and
+    ``today``, the date the ages are counted from.
+    """
+    today = today or timezone.localdate()
+    zero = Decimal("0")
+    amounts = {
+        key: Coalesce(
+            Sum("balance", filter=_bucket_filter(today, min_days, max_days)),
+            zero,
+            output_field=MONEY,
+        )
+        for key, _label, min_days, max_days in AGING_BUCKETS
+    }
+    rows = list(
+        Invoice.objects.filter(
+            business_profile=business_profile,
+            status=Invoice.Status.SENT,
+            balance__gt=0,
+        )
+        .alias(due=Coalesce("due_date", "issue_date"))
+        .order_by()
+        .values("client_id", name=F("client__name"), tax_id=F("client__tax_id"))
+        .annotate(count=Count("pk"), total=Sum("balance"), **amounts)
+        .order_by("-total", "name")
+    )
+
+    keys = ["total", *(key for key, *_ in AGING_BUCKETS)]
+    for row in rows:
+        for key in keys:
+            row[key] = row[key].quantize(CENT)
+    totals = {key: sum((row[key] for row in rows), zero) for key in keys}
+    for summary in (*rows, totals):
+        summary["aging"] = [summary[key] for key, *_ in AGING_BUCKETS]
+    return {
+        "rows": rows,
+        "totals": totals,
+        "buckets": [(key, label) for key, label, *_ in AGING_BUCKETS],
+        "today": today,
+    }
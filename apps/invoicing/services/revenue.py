@@ -0,0 +1,82 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.db.models import Count
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+
+from apps.invoicing.models.invoice import Invoice
+
+REVENUE_HORIZONS = (6, 12, 24, 36)
+
+MONTH_NAMES = [
+    "Ene",
+    "Feb",
+    "Mar",
+    "Abr",
+    "May",
+    "Jun",
+    "Jul",
+    "Ago",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dic",
+]
+
+
+def get_revenue_summary(business_profile, months=6, today=None):
+    """Dashboard counters and monthly chart series from a single query.
+
+    Invoices are grouped by (year, month, status) over the whole history
+    of the business, which is at most a few hundred rows. The chart only
+    looks at the last ``months`` months, while the counters (pending,
+    drafts...) need every month, so both are derived from the same rows.
+    """
+    today = today or timezone.localdate()
+    rows = (
+        Invoice.objects.filter(business_profile=business_profile)
+        .annotate(year=ExtractYear("issue_date"), month=ExtractMonth("issue_date"))
+        .order_by()
+        .values("year", "month", "status")
+        .annotate(count=Count("pk"), amount=Sum("total"))
+    )
+
+    amounts = defaultdict(Decimal)
+    month_count = 0
+    draft_count = 0
+    pending_amount = Decimal("0")
+    for row in rows:
+        amount = row["amount"] or Decimal("0")
+        amounts[(row["year"], row["month"], row["status"])] += amount
+        if (row["year"], row["month"]) == (today.year, today.month):
+            month_count += row["count"]
+        if row["status"] == Invoice.Status.DRAFT:
+            draft_count += row["count"]
+        elif row["status"] == Invoice.Status.SENT:
+            pending_amount += amount
+
+    labels = []
+    revenue = []
+    outstanding = []
+    for i in range(months - 1, -1, -1):
+        target = today - relativedelta(months=i)
+        labels.append(f"{MONTH_NAMES[target.month - 1]} {target.year}")
+        key = (target.year, target.month)
+        revenue.append(float(amounts[(*key, Invoice.Status.PAID)]))
+        outstanding.append(float(amounts[(*key, Invoice.Status.SENT)]))
+
+    return {
+        "month_count": month_count,
+        "pending_amount": pending_amount,
+        "paid_amount": amounts[(today.year, today.month, Invoice.Status.PAID)],
+        "draft_count": draft_count,
+        "chart": {
+            "labels": labels,
+            "revenue": revenue,
+            "outstanding": outstanding,
+        },
+    }
@@ -0,0 +1,129 @@
+from decimal import Decimal
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.client import Client
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.cache import bump_data_version
+from apps.invoicing.services.cache import bump_membership_version
+from apps.invoicing.services.payment import add_paid_amount
+
+
+def is_cascade(origin, model):
+    """Whether a delete started on another model (e.g. the parent invoice)."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is not model
+
+
+@receiver(post_save, sender=InvoiceLineItem)
+def update_invoice_totals_on_save(sender, instance, **kwargs):
+    """Keep the stored invoice totals in sync when a line is saved."""
+    instance.invoice.recalculate_totals()
+    bump_data_version(instance.invoice.business_profile_id)
+
+
+@receiver(post_delete, sender=InvoiceLineItem)
+def update_invoice_totals_on_delete(sender, instance, origin=None, **kwargs):
+    """Keep the stored invoice totals in sync when a line is deleted."""
+    if is_cascade(origin, InvoiceLineItem):
+        return
+    instance.invoice.recalculate_totals()
+    bump_data_version(instance.invoice.business_profile_id)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def bump_version_on_business_save(sender, instance, **kwargs):
+    bump_data_version(instance.pk)
+    # The name shows up in the members' cached business switcher
+    for user_id in instance.memberships.values_list("user_id", flat=True):
+        bump_membership_version(user_id)
+
+
+@receiver(post_save, sender=BusinessMembership)
+@receiver(post_delete, sender=BusinessMembership)
+def bump_membership_version_on_change(sender, instance, **kwargs):
+    """Invalidate the role cache kept in the member's sessions."""
+    bump_membership_version(instance.user_id)
+
+
+@receiver(post_save, sender=Client)
+def bump_version_on_client_save(sender, instance, **kwargs):
+    """Client names and NIFs feed cached reports (e.g. Modelo 347)."""
+    bump_data_version(instance.business_profile_id)
+
+
+@receiver(post_delete, sender=Client)
+def bump_version_on_client_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, Client):
+        bump_data_version(instance.business_profile_id)
+
+
+@receiver(post_save, sender=Invoice)
+def bump_version_on_invoice_save(sender, instance, **kwargs):
+    bump_data_version(instance.business_profile_id)
+
+
+@receiver(post_delete, sender=Invoice)
+def bump_version_on_invoice_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, Invoice):
+        bump_data_version(instance.business_profile_id)
+
+
+@receiver(post_save, sender=Payment)
+def bump_version_on_payment_save(sender, instance, **kwargs):
+    bump_data_version(instance.invoice.business_profile_id)
+
+
+@receiver(post_delete, sender=Payment)
+def bump_version_on_payment_delete(sender, instance, origin=None, **kwargs):
+    if not is_cascade(origin, Payment):
+        bump_data_version(instance.invoice.business_profile_id)
+
+
+def refresh_paid_amount(payment):
+    """Reload the paid amount of the payment's invoice if it is in memory."""
+    if Payment.invoice.is_cached(payment):
+        payment.invoice.refresh_from_db(fields=["paid_amount", "balance"])
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment_state(sender, instance, **kwargs):
+    """Keep the stored invoice and amount to move the difference after saving."""
+    instance._paid_state = None
+    if instance.pk:
+        instance._paid_state = (
+            Payment.objects.filter(pk=instance.pk)
+            .values_list("invoice_id", "amount")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def update_paid_amount_on_payment_save(sender, instance, **kwargs):
+    previous = getattr(instance, "_paid_state", None)
+    if previous is None:
+        add_paid_amount(instance.invoice_id, instance.amount)
+    else:
+        old_invoice_id, old_amount = previous
+        if old_invoice_id == instance.invoice_id:
+            add_paid_amount(instance.invoice_id, Decimal(instance.amount) - old_amount)
+        else:
+            add_paid_amount(old_invoice_id, -old_amount)
+            add_paid_amount(instance.invoice_id, instance.amount)
+    refresh_paid_amount(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def update_paid_amount_on_payment_delete(sender, instance, origin=None, **kwargs):
+    if is_cascade(origin, Payment):
+        return
+    add_paid_amount(instance.invoice_id, -Decimal(instance.amount))
+    refresh_paid_amount(instance)
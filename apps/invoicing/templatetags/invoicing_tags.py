@@ -1,14 +1,19 @@
 from django import template
 
 from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.services.permissions import get_role
 
 register = template.Library()
 
 
-@register.simple_tag
-def has_role(user, business, *roles):
+@register.simple_tag(takes_context=True)
+def has_role(context, user, business, *roles):
     if not user or not business:
         return False
+    request = context.get("request")
+    if request is not None and request.user == user:
+        # Served from the request/session role cache
+        return get_role(request, business) in roles
     membership = BusinessMembership.objects.filter(
         user=user, business_profile=business
     ).first()
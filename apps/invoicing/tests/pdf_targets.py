@@ -0,0 +1,15 @@
+"""Render targets for the PDF pool tests.
+
+Spawned workers import them by name, so this module must not import Django.
+"""
+
+import time
+
+
+def render_slowly(html, seconds):
+    time.sleep(seconds)
+    return html
+
+
+def fail_to_start():
+    raise OSError("fontconfig not found")
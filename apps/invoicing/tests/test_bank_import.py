@@ -0,0 +1,282 @@
+import os
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.client import Client
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.bank_import import BankImportError
+from apps.invoicing.services.bank_import import import_bank_statement
+from apps.invoicing.services.bank_import import parse_csv
+from apps.invoicing.services.bank_import import parse_norma43
+from apps.invoicing.services.bank_import import parse_statement
+
+
+def norma43_movement(day, amount, concept="", credit=True):
+    """Record 22 (plus a 23 with the concept) of a Norma 43 statement."""
+    cents = f"{int(amount * 100):014d}"
+    line = (
+        f"22    0001{day:%y%m%d}{day:%y%m%d}02000{'2' if credit else '1'}"
+        f"{cents}{'0' * 10}{'REF':<12}{'':<16}"
+    )
+    lines = [line]
+    if concept:
+        lines.append(f"2301{concept:<38.38}{concept[38:]:<38.38}")
+    return lines
+
+
+def norma43(*movements):
+    header = f"{'11' + '2100' + '0001' + '0123456789':<80}"
+    footer = f"{'33':<80}"
+    return [header, *[line for movement in movements for line in movement], footer]
+
+
+class StatementParserTestCase(TestCase):
+    def test_norma43_credits_with_concept(self):
+        lines = norma43(
+            norma43_movement(date(2026, 3, 2), Decimal("1210.00"), "PAGO F-2026-001"),
+            norma43_movement(date(2026, 3, 3), Decimal("50.00"), "RECIBO", False),
+        )
+        movements = list(parse_norma43(lines))
+        self.assertEqual(len(movements), 1)
+        self.assertEqual(movements[0]["date"], date(2026, 3, 2))
+        self.assertEqual(movements[0]["amount"], Decimal("1210.00"))
+        self.assertEqual(movements[0]["concept"], "PAGO F-2026-001")
+
+    def test_csv_spanish_format(self):
+        lines = [
+            "Fecha;Concepto;Importe;Saldo\n",
+            "02/03/2026;TRANSFERENCIA ACME F-2026-001;1.210,00;5.000,00\n",
+            "03/03/2026;RECIBO LUZ;-50,00;4.950,00\n",
+        ]
+        movements = list(parse_csv(lines))
+        self.assertEqual(len(movements), 1)
+        self.assertEqual(movements[0]["amount"], Decimal("1210.00"))
+        self.assertEqual(movements[0]["date"], date(2026, 3, 2))
+
+    def test_csv_amount_formats(self):
+        lines = ["Fecha;Concepto;Importe\n"] + [
+            f"02/03/2026;X;{amount}\n"
+            for amount in ("1.234,56", "1,234.56", "-45,00", "1234.5")
+        ]
+        movements = list(parse_csv(lines))  # the debit is left out
+        self.assertEqual(
+            [movement["amount"] for movement in movements],
+            [Decimal("1234.56"), Decimal("1234.56"), Decimal("1234.5")],
+        )
+        for ambiguous in ("1.234", "1,234"):
+            lines = ["Fecha;Concepto;Importe\n", f"02/03/2026;X;{ambiguous}\n"]
+            with self.assertRaises(BankImportError):
+                list(parse_csv(lines))
+
+    def test_detects_format(self):
+        lines = norma43(norma43_movement(date(2026, 3, 2), Decimal("10"), "X"))
+        self.assertEqual(len(list(parse_statement(lines))), 1)
+        lines = ["date,concept,amount\n", "2026-03-02,X,10.50\n"]
+        self.assertEqual(list(parse_statement(lines))[0]["amount"], Decimal("10.50"))
+
+    def test_csv_missing_column(self):
+        with self.assertRaises(BankImportError):
+            list(parse_csv(["Fecha;Importe\n", "02/03/2026;10,00\n"]))
+
+
+class BankImportTestCase(TestCase):
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.acme = Client.objects.create(
+            business_profile=self.bp, name="Acme", tax_id="B11111111"
+        )
+        self.beta = Client.objects.create(business_profile=self.bp, name="Beta")
+        self.first = self._invoice("F-2026-001", self.acme, "1000")  # 1210
+        self.second = self._invoice("F-2026-002", self.acme, "500")  # 605
+        self.third = self._invoice("F-2026-003", self.beta, "200")  # 242
+
+    def _invoice(self, number, client, amount, status=Invoice.Status.SENT):
+        invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=client,
+            number=number,
+            issue_date="2026-01-15",
+            status=status,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            quantity=Decimal("1"),
+            unit_price=Decimal(amount),
+            tax_rate=Decimal("21"),
+        )
+        invoice.refresh_from_db()
+        return invoice
+
+    def _csv(self, *rows):
+        return ["Fecha;Concepto;Importe\n", *(f"{row}\n" for row in rows)]
+
+    def test_matches_by_number_tax_id_and_amount(self):
+        result = import_bank_statement(
+            self.bp,
+            self._csv(
+                "01/03/2026;TRANSF ACME FRA F-2026-001;1.210,00",
+                "02/03/2026;ACME B11111111;605,00",
+                "03/03/2026;BETA SL;242,00",
+                "04/03/2026;DESCONOCIDO;99,00",
+            ),
+        )
+        self.assertEqual(
+            [movement["invoice_id"] for movement in result["matched"]],
+            [self.first.pk, self.second.pk, self.third.pk],
+        )
+        self.assertEqual(len(result["unmatched"]), 1)
+        self.assertEqual(Payment.objects.count(), 3)
+        for invoice in (self.first, self.second, self.third):
+            invoice.refresh_from_db()
+            self.assertEqual(invoice.status, Invoice.Status.PAID)
+            self.assertEqual(invoice.balance, Decimal("0"))
+            self.assertEqual(invoice.paid_amount, invoice.total)
+
+    def test_partial_payment_keeps_invoice_open(self):
+        import_bank_statement(
+            self.bp, self._csv("01/03/2026;PAGO PARCIAL F-2026-001;500,00")
+        )
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, Invoice.Status.SENT)
+        self.assertEqual(self.first.paid_amount, Decimal("500"))
+        self.assertEqual(self.first.balance, Decimal("710"))
+
+    def test_ambiguous_amount_is_unmatched(self):
+        self._invoice("F-2026-004", self.beta, "200")
+        result = import_bank_statement(self.bp, self._csv("03/03/2026;BETA;242,00"))
+        self.assertEqual(result["matched"], [])
+        self.assertEqual(len(result["unmatched"]), 1)
+
+    def test_only_sent_invoices_are_matched(self):
+        draft = self._invoice("F-2026-009", self.beta, "300", Invoice.Status.DRAFT)
+        result = import_bank_statement(
+            self.bp, self._csv("03/03/2026;F-2026-009;363,00")
+        )
+        self.assertEqual(result["matched"], [])
+        self.assertFalse(Payment.objects.filter(invoice=draft).exists())
+
+    def test_reimport_skips_duplicates(self):
+        lines = self._csv("01/03/2026;F-2026-001;500,00")
+        import_bank_statement(self.bp, lines)
+        result = import_bank_statement(self.bp, lines)
+        self.assertEqual(result["duplicates"], 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_reimport_of_paid_invoice_does_not_pay_another(self):
+        other = self._invoice("F-2026-004", self.beta, "1000")  # also 1210
+        lines = self._csv("01/03/2026;TRANSF F-2026-001;1.210,00")
+        import_bank_statement(self.bp, lines)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, Invoice.Status.PAID)
+
+        result = import_bank_statement(self.bp, lines)
+        self.assertEqual(result["duplicates"], 1)
+        self.assertEqual(result["matched"], [])
+        other.refresh_from_db()
+        self.assertEqual(other.status, Invoice.Status.SENT)
+        self.assertFalse(Payment.objects.filter(invoice=other).exists())
+
+    def test_identical_lines_of_one_statement_are_kept(self):
+        row = "01/03/2026;F-2026-001;100,00"
+        result = import_bank_statement(self.bp, self._csv(row, row))
+        self.assertEqual(len(result["matched"]), 2)
+        result = import_bank_statement(self.bp, self._csv(row, row, row))
+        self.assertEqual(result["duplicates"], 2)
+        self.assertEqual(len(result["matched"]), 1)
+        self.assertEqual(Payment.objects.count(), 3)
+
+    def test_dry_run_writes_nothing(self):
+        result = import_bank_statement(
+            self.bp, self._csv("01/03/2026;F-2026-001;1.210,00"), dry_run=True
+        )
+        self.assertEqual(len(result["matched"]), 1)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_query_count_does_not_grow_with_movements(self):
+        rows = [f"0{day}/03/2026;F-2026-001;1,00" for day in range(1, 10)]
+        with self.assertNumQueries(2):
+            import_bank_statement(self.bp, self._csv(*rows), dry_run=True)
+
+    def test_command(self):
+        path = self._write_statement(
+            norma43(
+                norma43_movement(
+                    date(2026, 3, 2), Decimal("1210"), "TRANSFERENCIA F-2026-001"
+                )
+            )
+        )
+        out = StringIO()
+        call_command("import_bank_statement", path, business=self.bp.pk, stdout=out)
+        self.assertIn("1 cobros registrados", out.getvalue())
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, Invoice.Status.PAID)
+
+    def _write_statement(self, lines):
+        f = tempfile.NamedTemporaryFile("w", suffix=".n43", delete=False)
+        with f:
+            f.write("\n".join(lines) + "\n")
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+
+class BankImportViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="test")
+        self.bp = BusinessProfile.objects.create(name="Test SL", tax_id="B123")
+        BusinessMembership.objects.create(
+            user=self.user,
+            business_profile=self.bp,
+            role=BusinessMembership.Role.OWNER,
+        )
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.bp.pk
+        session.save()
+        client = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=client,
+            number="F-2026-001",
+            issue_date="2026-01-15",
+            status=Invoice.Status.SENT,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice,
+            description="Service",
+            quantity=Decimal("1"),
+            unit_price=Decimal("100"),
+            tax_rate=Decimal("21"),
+        )
+
+    def _upload(self, content):
+        return SimpleUploadedFile("extracto.csv", content)
+
+    def test_upload_creates_payments(self):
+        statement = "Fecha;Concepto;Importe\n02/03/2026;Pago F-2026-001;121,00\n"
+        response = self.client.post(
+            "/pagos/importar/",
+            {"statement": self._upload(statement.encode("latin-1"))},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "F-2026-001")
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, Invoice.Status.PAID)
+
+    def test_invalid_statement_shows_error(self):
+        response = self.client.post(
+            "/pagos/importar/", {"statement": self._upload(b"foo;bar\n1;2\n")}
+        )
+        self.assertContains(response, "Falta la columna")
+        self.assertFalse(Payment.objects.exists())
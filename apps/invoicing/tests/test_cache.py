@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.fiscal.models import Expense
+from apps.fiscal.models import FiscalYear
+from apps.fiscal.models import QuarterlyResult
+from apps.fiscal.services import get_modelo_130
+from apps.fiscal.services import get_modelo_303
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.client import Client
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.cache import get_data_version
+from apps.invoicing.services.cache import get_or_compute
+
+
+class DataVersionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.client_obj = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=self.client_obj,
+            number="F-2026-00001",
+            issue_date="2026-01-01",
+            status=Invoice.Status.SENT,
+        )
+
+    def assertBumps(self, func):
+        before = get_data_version(self.bp.pk)
+        func()
+        self.assertNotEqual(get_data_version(self.bp.pk), before)
+
+    def test_bumped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            InvoiceLineItem.objects.create(
+                invoice=self.invoice, description="Service", unit_price=Decimal("10")
+            )
+            # A concurrent reader computing before the commit
+            before_commit = get_data_version(self.bp.pk)
+            get_or_compute(self.bp.pk, "total", lambda: "stale")
+
+        self.assertNotEqual(get_data_version(self.bp.pk), before_commit)
+        self.assertEqual(get_or_compute(self.bp.pk, "total", lambda: "fresh"), "fresh")
+
+    def test_writes_bump_version(self):
+        self.assertBumps(
+            lambda: InvoiceLineItem.objects.create(
+                invoice=self.invoice, description="Service", unit_price=Decimal("10")
+            )
+        )
+        self.assertBumps(
+            lambda: Payment.objects.create(
+                invoice=self.invoice, amount=Decimal("5"), date="2026-01-02"
+            )
+        )
+        self.assertBumps(
+            lambda: Expense.objects.create(
+                business_profile=self.bp,
+                date=date(2026, 1, 3),
+                concept="Software",
+                taxable_base=Decimal("10"),
+            )
+        )
+        self.assertBumps(
+            lambda: FiscalYear.objects.create(business_profile=self.bp, year=2026)
+        )
+        self.assertBumps(self.invoice.delete)
+
+    def test_get_or_compute_is_versioned(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(get_or_compute(self.bp.pk, "answer", compute), 1)
+        self.assertEqual(get_or_compute(self.bp.pk, "answer", compute), 1)
+        self.invoice.save()
+        self.assertEqual(get_or_compute(self.bp.pk, "answer", compute), 2)
+
+    def test_cached_modelo_is_invalidated_by_edits(self):
+        fiscal_year = FiscalYear.objects.create(business_profile=self.bp, year=2026)
+        fiscal_year.create_quarters()
+        quarter = fiscal_year.quarters.get(number=1)
+        self.assertEqual(get_modelo_303(quarter)["total_output_vat"], Decimal("0"))
+
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice,
+            description="Service",
+            unit_price=Decimal("100"),
+            tax_rate=Decimal("21"),
+        )
+        self.assertEqual(get_modelo_303(quarter)["total_output_vat"], Decimal("21"))
+        with self.assertNumQueries(0):
+            get_modelo_303(quarter)
+
+    def test_saved_results_keep_modelos_but_reach_later_quarters(self):
+        fiscal_year = FiscalYear.objects.create(business_profile=self.bp, year=2026)
+        fiscal_year.create_quarters()
+        q1, q2 = fiscal_year.quarters.filter(number__lte=2).order_by("number")
+        get_modelo_303(q1)
+        self.assertEqual(get_modelo_130(q2)["previous_payments"], Decimal("0"))
+
+        QuarterlyResult.objects.create(quarter=q1, modelo_130_submitted=Decimal("50"))
+        with self.assertNumQueries(0):
+            get_modelo_303(q1)
+        self.assertEqual(get_modelo_130(q2)["previous_payments"], Decimal("50"))
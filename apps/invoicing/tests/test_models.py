@@ -1,8 +1,12 @@
 from decimal import Decimal
+from io import StringIO
 
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
 
+from apps.invoicing.forms.numbering import InvoiceNumberingForm
 from apps.invoicing.models.business import BusinessMembership
 from apps.invoicing.models.business import BusinessProfile
 from apps.invoicing.models.business import InvoiceNumbering
@@ -10,6 +14,8 @@ from apps.invoicing.models.business import InvoiceTheme
 from apps.invoicing.models.client import Client
 from apps.invoicing.models.invoice import Invoice
 from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.services.numbering import get_next_invoice_number
+from apps.invoicing.services.numbering import reserve_invoice_numbers
 
 
 class BusinessProfileTestCase(TestCase):
@@ -48,17 +54,71 @@ class BusinessMembershipTestCase(TestCase):
 
 
 class InvoiceNumberingTestCase(TestCase):
-    def test_generate_number(self):
-        bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
-        numbering = InvoiceNumbering.objects.create(
-            business_profile=bp, series_prefix="F", next_number=1
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.numbering = InvoiceNumbering.objects.create(
+            business_profile=self.bp, series_prefix="F"
         )
+
+    def test_generate_number(self):
+        numbering = self.numbering
         number = numbering.generate_number(2026)
         self.assertEqual(number, "F-2026-00001")
-        self.assertEqual(numbering.next_number, 2)
+        self.assertEqual(numbering.get_next_number(2026), 2)
         number2 = numbering.generate_number(2026)
         self.assertEqual(number2, "F-2026-00002")
 
+    def test_one_counter_per_year_and_series(self):
+        self.numbering.generate_number(2026)
+        self.assertEqual(self.numbering.generate_number(2027), "F-2027-00001")
+        self.assertEqual(self.numbering.generate_number(2026), "F-2026-00002")
+        rectifying = InvoiceNumbering.objects.create(
+            business_profile=self.bp, series_prefix="R"
+        )
+        self.assertEqual(rectifying.generate_number(2026), "R-2026-00001")
+        self.assertEqual(get_next_invoice_number(self.bp, 2026), "F-2026-00003")
+        self.assertEqual(
+            get_next_invoice_number(self.bp, 2026, series="R"), "R-2026-00002"
+        )
+
+    def test_pattern_without_year_runs_on_across_years(self):
+        self.numbering.format_pattern = "{prefix}-{number:04d}"
+        self.numbering.save()
+        self.assertEqual(self.numbering.generate_number(2026), "F-0001")
+        self.assertEqual(self.numbering.generate_number(2026), "F-0002")
+        self.assertEqual(self.numbering.generate_number(2027), "F-0003")
+        self.assertEqual(self.numbering.get_next_number(2028), 4)
+
+        form = InvoiceNumberingForm(
+            {
+                "series_prefix": "F",
+                "format_pattern": "{prefix}-{number:04d}",
+                "next_number": 10,
+            },
+            instance=self.numbering,
+            year=2027,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.assertEqual(self.numbering.generate_number(2026), "F-0010")
+        self.assertEqual(self.numbering.counters.count(), 1)
+
+    def test_reserve_block_in_one_update(self):
+        self.numbering.generate_number(2026)
+        with self.assertNumQueries(2):  # UPDATE + read back
+            numbers = self.numbering.reserve_numbers(2026, 3)
+        self.assertEqual(numbers, ["F-2026-00002", "F-2026-00003", "F-2026-00004"])
+        self.assertEqual(
+            reserve_invoice_numbers(self.bp, 2026, 2), ["F-2026-00005", "F-2026-00006"]
+        )
+
+    def test_rollback_releases_numbers(self):
+        self.numbering.generate_number(2026)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.numbering.reserve_numbers(2026, 5)
+            raise RuntimeError
+        self.assertEqual(self.numbering.generate_number(2026), "F-2026-00002")
+
 
 class InvoiceThemeTestCase(TestCase):
     def test_default_theme_exclusivity(self):
@@ -128,6 +188,96 @@ class InvoiceLineItemTestCase(TestCase):
         self.assertEqual(self.invoice.withholding_total, Decimal("150"))
         self.assertEqual(self.invoice.total, Decimal("2160"))
 
+    def test_invoice_totals_are_persisted(self):
+        line = InvoiceLineItem.objects.create(
+            invoice=self.invoice,
+            description="Service",
+            quantity=Decimal("3"),
+            unit_price=Decimal("33.33"),
+            tax_rate=Decimal("21"),
+            withholding_rate=Decimal("15"),
+        )
+        invoice = Invoice.objects.get(pk=self.invoice.pk)
+        with self.assertNumQueries(0):
+            # 99.99 + 21.00 (20.9979) - 15.00 (14.9985)
+            self.assertEqual(invoice.subtotal, Decimal("99.99"))
+            self.assertEqual(invoice.tax_total, Decimal("21.00"))
+            self.assertEqual(invoice.withholding_total, Decimal("15.00"))
+            self.assertEqual(invoice.total, Decimal("105.99"))
+
+        line.quantity = Decimal("1")
+        line.save()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total, Decimal("35.33"))
+
+        line.delete()
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total, Decimal("0"))
+
+    def test_with_totals_matches_stored_totals(self):
+        for quantity, price, tax, withholding, discount in [
+            ("3", "33.33", "21", "15", "0"),
+            ("1.5", "19.99", "10", "0", "12.5"),
+            ("7", "0.35", "4", "7", "33.33"),
+        ]:
+            InvoiceLineItem.objects.create(
+                invoice=self.invoice,
+                description="Line",
+                quantity=Decimal(quantity),
+                unit_price=Decimal(price),
+                tax_rate=Decimal(tax),
+                withholding_rate=Decimal(withholding),
+                discount_percent=Decimal(discount),
+            )
+        with self.assertNumQueries(1):
+            invoice = Invoice.objects.with_totals().get(pk=self.invoice.pk)
+        self.assertEqual(invoice.calculated_subtotal, invoice.subtotal)
+        self.assertEqual(invoice.calculated_tax_total, invoice.tax_total)
+        self.assertEqual(
+            invoice.calculated_withholding_total, invoice.withholding_total
+        )
+        self.assertEqual(invoice.calculated_total, invoice.total)
+
+    def test_with_totals_without_lines(self):
+        invoice = Invoice.objects.with_totals().get(pk=self.invoice.pk)
+        self.assertEqual(invoice.calculated_total, Decimal("0"))
+
+    def test_invoice_delete_cascades_lines(self):
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice, description="Service", unit_price=Decimal("10")
+        )
+        self.invoice.delete()
+        self.assertFalse(InvoiceLineItem.objects.exists())
+
+    def test_recalculate_invoice_totals_command(self):
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice,
+            description="Service",
+            quantity=Decimal("2"),
+            unit_price=Decimal("50"),
+            tax_rate=Decimal("21"),
+        )
+        Invoice.objects.filter(pk=self.invoice.pk).update(
+            subtotal=0, tax_total=0, total=0
+        )
+        call_command("recalculate_invoice_totals", stdout=StringIO())
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.subtotal, Decimal("100.00"))
+        self.assertEqual(self.invoice.total, Decimal("121.00"))
+
+    def test_recalculate_invoice_totals_check(self):
+        InvoiceLineItem.objects.create(
+            invoice=self.invoice, description="Service", unit_price=Decimal("10")
+        )
+        out = StringIO()
+        call_command("recalculate_invoice_totals", check=True, stdout=out)
+        self.assertIn("al día", out.getvalue())
+
+        Invoice.objects.filter(pk=self.invoice.pk).update(total=0)
+        out = StringIO()
+        call_command("recalculate_invoice_totals", check=True, stdout=out)
+        self.assertIn(self.invoice.number, out.getvalue())
+
 
 class PermissionsTestCase(TestCase):
     def setUp(self):
@@ -1,6 +1,8 @@
 from decimal import Decimal
+from io import StringIO
 
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
 
 from apps.invoicing.models.business import BusinessMembership
@@ -12,6 +14,7 @@ from apps.invoicing.models.payment import Payment
 from apps.invoicing.services.payment import check_and_update_invoice_status
 from apps.invoicing.services.payment import get_invoice_balance
 from apps.invoicing.services.payment import get_invoice_paid_amount
+from apps.invoicing.services.payment import refresh_invoice_statuses
 
 
 class PaymentServiceTestCase(TestCase):
@@ -98,6 +101,147 @@ class PaymentServiceTestCase(TestCase):
         self.assertEqual(self.invoice.status, Invoice.Status.SENT)
 
 
+class InvoicePaidAmountTestCase(TestCase):
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        client = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.first, self.second = (
+            Invoice.objects.create(
+                business_profile=self.bp,
+                client=client,
+                number=number,
+                issue_date="2026-01-01",
+                status=Invoice.Status.SENT,
+            )
+            for number in ("F-1", "F-2")
+        )
+        for invoice in (self.first, self.second):
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Service",
+                unit_price=Decimal("1000"),
+                tax_rate=Decimal("21"),
+            )
+
+    def stored(self, invoice):
+        return tuple(
+            Invoice.objects.filter(pk=invoice.pk).values_list("paid_amount", "balance")[
+                0
+            ]
+        )
+
+    def test_payments_keep_paid_amount_and_balance(self):
+        payment = Payment.objects.create(
+            invoice=self.first, amount=Decimal("200"), date="2026-01-10"
+        )
+        self.assertEqual(self.stored(self.first), (Decimal("200"), Decimal("1010")))
+        # The in-memory invoice of the payment is refreshed too
+        self.assertEqual(self.first.balance, Decimal("1010"))
+
+        payment.amount = Decimal("300")
+        payment.save()
+        self.assertEqual(self.stored(self.first), (Decimal("300"), Decimal("910")))
+
+        payment.invoice = self.second
+        payment.save()
+        self.assertEqual(self.stored(self.first), (Decimal("0"), Decimal("1210")))
+        self.assertEqual(self.stored(self.second), (Decimal("300"), Decimal("910")))
+
+        InvoiceLineItem.objects.create(
+            invoice=self.second, description="Extra", unit_price=Decimal("100")
+        )
+        # 1210 + 121 - 300
+        self.assertEqual(self.stored(self.second), (Decimal("300"), Decimal("1031")))
+
+        payment.delete()
+        self.assertEqual(self.stored(self.second), (Decimal("0"), Decimal("1331")))
+
+    def test_concurrent_payments_are_not_lost(self):
+        # Two requests holding the same stale invoice each add a payment
+        stale_copies = [Invoice.objects.get(pk=self.first.pk) for _ in range(2)]
+        for invoice in stale_copies:
+            Payment.objects.create(
+                invoice=invoice, amount=Decimal("100"), date="2026-01-10"
+            )
+        self.assertEqual(self.stored(self.first), (Decimal("200"), Decimal("1010")))
+
+    def test_reading_balance_needs_no_queries(self):
+        Payment.objects.create(
+            invoice=self.first, amount=Decimal("1210"), date="2026-01-10"
+        )
+        invoice = Invoice.objects.get(pk=self.first.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_invoice_paid_amount(invoice), Decimal("1210"))
+            self.assertEqual(get_invoice_balance(invoice), Decimal("0"))
+        check_and_update_invoice_status(invoice)
+        self.assertEqual(invoice.status, Invoice.Status.PAID)
+
+    def test_recalculate_command_repairs_paid_amount(self):
+        Payment.objects.create(
+            invoice=self.first, amount=Decimal("200"), date="2026-01-10"
+        )
+        Invoice.objects.filter(pk=self.first.pk).update(paid_amount=0, balance=0)
+        out = StringIO()
+        call_command("recalculate_invoice_totals", check=True, stdout=out)
+        self.assertIn("F-1", out.getvalue())
+
+        call_command("recalculate_invoice_totals", stdout=StringIO())
+        self.assertEqual(self.stored(self.first), (Decimal("200"), Decimal("1010")))
+
+
+class RefreshInvoiceStatusesTestCase(TestCase):
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.other_bp = BusinessProfile.objects.create(name="Other", tax_id="B456")
+        self.paid = self.invoice(self.bp, "F-1", "1210")
+        self.unpaid = self.invoice(self.bp, "F-2", "100", Invoice.Status.PAID)
+        self.draft = self.invoice(self.bp, "F-3", "1210", Invoice.Status.DRAFT)
+        self.other = self.invoice(self.other_bp, "F-1", "1210")
+        # Statuses left behind by writes that skip check_and_update
+        Invoice.objects.update(status=Invoice.Status.SENT)
+        Invoice.objects.filter(pk=self.unpaid.pk).update(status=Invoice.Status.PAID)
+        Invoice.objects.filter(pk=self.draft.pk).update(status=Invoice.Status.DRAFT)
+
+    def invoice(self, bp, number, paid, status=Invoice.Status.SENT):
+        client = Client.objects.create(business_profile=bp, name="Acme")
+        invoice = Invoice.objects.create(
+            business_profile=bp,
+            client=client,
+            number=number,
+            issue_date="2026-01-01",
+            status=status,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=Decimal("1000"),
+            tax_rate=Decimal("21"),
+        )
+        Payment.objects.create(invoice=invoice, amount=Decimal(paid), date="2026-01-15")
+        return invoice
+
+    def statuses(self):
+        return dict(Invoice.objects.values_list("pk", "status"))
+
+    def test_refresh_all(self):
+        with self.assertNumQueries(3):
+            self.assertEqual(refresh_invoice_statuses(), 3)
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.paid.pk], Invoice.Status.PAID)
+        self.assertEqual(statuses[self.unpaid.pk], Invoice.Status.SENT)
+        self.assertEqual(statuses[self.draft.pk], Invoice.Status.DRAFT)
+        self.assertEqual(statuses[self.other.pk], Invoice.Status.PAID)
+        self.assertEqual(refresh_invoice_statuses(), 0)
+
+    def test_command_scoped_to_business(self):
+        out = StringIO()
+        call_command("recompute_invoice_statuses", business=self.bp.pk, stdout=out)
+        self.assertIn("2 factura(s)", out.getvalue())
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.paid.pk], Invoice.Status.PAID)
+        self.assertEqual(statuses[self.other.pk], Invoice.Status.SENT)
+
+
 class PaymentViewTestCase(TestCase):
     def setUp(self):
         self.user = User.objects.create_user("owner", password="test")
@@ -0,0 +1,291 @@
+import io
+import operator
+import os
+import tempfile
+import threading
+import zipfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.client import Client
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.services.pdf import get_invoice_pdf
+from apps.invoicing.services.pdf_archive import get_archive_invoices
+from apps.invoicing.services.pdf_archive import iter_invoice_pdf_zip
+from apps.invoicing.services.pdf_pool import PdfRenderBusy
+from apps.invoicing.services.pdf_pool import PdfRenderError
+from apps.invoicing.services.pdf_pool import PdfRenderPool
+from apps.invoicing.services.pdf_pool import PdfRenderTimeout
+from apps.invoicing.tests import pdf_targets
+
+
+@mock.patch("apps.invoicing.services.pdf.generate_invoice_pdf")
+class InvoicePdfCacheTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.client_obj = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=self.client_obj,
+            number="F-2026-00001",
+            issue_date="2026-01-01",
+        )
+        self.line = InvoiceLineItem.objects.create(
+            invoice=self.invoice, description="Service", unit_price=Decimal("100")
+        )
+
+    def get_pdf(self):
+        invoice = Invoice.objects.select_related("client", "business_profile").get(
+            pk=self.invoice.pk
+        )
+        return get_invoice_pdf(invoice)
+
+    def test_unchanged_invoice_is_served_from_storage(self, generate):
+        generate.return_value = b"%PDF-1"
+        self.assertEqual(self.get_pdf(), b"%PDF-1")
+        self.assertEqual(self.get_pdf(), b"%PDF-1")
+        self.assertEqual(generate.call_count, 1)
+
+        self.invoice.refresh_from_db()
+        self.assertTrue(default_storage.exists(self.invoice.pdf_file.name))
+
+    def test_changes_invalidate_stored_pdf(self, generate):
+        generate.return_value = b"%PDF-1"
+        self.get_pdf()
+        self.invoice.refresh_from_db()
+        old_name = self.invoice.pdf_file.name
+
+        generate.return_value = b"%PDF-2"
+        self.line.unit_price = Decimal("200")
+        self.line.save()
+        self.assertEqual(self.get_pdf(), b"%PDF-2")
+
+        self.client_obj.name = "Acme SL"
+        self.client_obj.save()
+        self.get_pdf()
+        self.assertEqual(generate.call_count, 3)
+
+        self.invoice.refresh_from_db()
+        self.assertNotEqual(self.invoice.pdf_file.name, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+
+
+class PdfRenderPoolTestCase(TestCase):
+    def make_pool(self, workers, queue_size=0, **kwargs):
+        kwargs = {"target": operator.add, "initializer": None, **kwargs}
+        pool = PdfRenderPool(workers, queue_size, timeout=30, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_render_inline(self):
+        pool = self.make_pool(workers=0)
+        self.assertEqual(pool.render("<p>", "/media"), "<p>/media")
+
+    def test_full_pool_fails_fast(self):
+        pool = self.make_pool(workers=0)
+        pool._slots.acquire()
+        with self.assertRaises(PdfRenderBusy):
+            pool.render("<p>", "/media")
+        pool._slots.release()
+        self.assertEqual(pool.render("<p>", "/media"), "<p>/media")
+
+    def test_render_many_in_workers(self):
+        pool = self.make_pool(workers=2, queue_size=1)
+        jobs = [(n, f"doc-{n}", "/media") for n in range(5)]
+        results = dict(pool.render_many(jobs))
+        self.assertEqual(results, {n: f"doc-{n}/media" for n in range(5)})
+        self.assertEqual(pool.render("<p>", "/media"), "<p>/media")
+
+    def test_timeout_spares_other_renders(self):
+        pool = self.make_pool(workers=2, target=pdf_targets.render_slowly)
+        pool.render("warm-up", 0)
+        generation = pool._generation
+        results = []
+        other = threading.Thread(target=lambda: results.append(pool.render("other", 1)))
+        other.start()
+        with self.assertRaises(PdfRenderTimeout):
+            pool.render("stuck", 60, timeout=0.2)
+        self.assertEqual(pool.render("next", 0), "next")
+        other.join()
+
+        self.assertEqual(results, ["other"])
+        self.assertNotEqual(pool._generation, generation)
+        self.assertEqual(generation.pool._state, "TERMINATE")
+
+    def test_failing_initializer_is_reported(self):
+        pool = self.make_pool(workers=1, initializer=pdf_targets.fail_to_start)
+        with self.assertRaisesMessage(PdfRenderError, "fontconfig not found"):
+            pool.render("<p>", "/media")
+
+    def test_render_many_wraps_submit_errors(self):
+        pool = self.make_pool(workers=1)
+        pool.render("warm-up", "")
+        pool._generation.pool.terminate()
+        with self.assertRaises(PdfRenderError):
+            list(pool.render_many([(1, "<p>", "/media")]))
+        self.assertEqual(pool.render("<p>", "/media"), "<p>/media")
+
+
+class InvoicePdfViewTestCase(TestCase):
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.user = User.objects.create_user(username="owner", password="pass")
+        BusinessMembership.objects.create(
+            user=self.user, business_profile=self.bp, role=BusinessMembership.Role.OWNER
+        )
+        client_obj = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=client_obj,
+            number="F-2026-00001",
+            issue_date="2026-01-01",
+        )
+        self.client.login(username="owner", password="pass")
+        session = self.client.session
+        session["active_business_id"] = self.bp.pk
+        session.save()
+
+    @mock.patch("apps.invoicing.views.pdf.get_invoice_pdf")
+    def test_busy_renderer_returns_503(self, get_pdf):
+        get_pdf.side_effect = PdfRenderBusy
+        response = self.client.get(f"/facturas/{self.invoice.pk}/pdf/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+
+class InvoicePdfArchiveTestCase(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings_override = override_settings(MEDIA_ROOT=media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.rendered = []
+        pool = PdfRenderPool(0, 0, timeout=30, target=self.fake_render)
+        patcher = mock.patch(
+            "apps.invoicing.services.pdf.get_render_pool", return_value=pool
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.user = User.objects.create_user(username="owner", password="pass")
+        BusinessMembership.objects.create(
+            user=self.user, business_profile=self.bp, role=BusinessMembership.Role.OWNER
+        )
+        client_obj = Client.objects.create(business_profile=self.bp, name="Acme")
+        for number, issue_date, status in [
+            ("F-2026-00001", "2026-01-10", Invoice.Status.SENT),
+            ("F-2026-00002", "2026-02-10", Invoice.Status.PAID),
+            ("F-2026-00003", "2026-03-10", Invoice.Status.DRAFT),
+            ("F-2026-00004", "2026-04-10", Invoice.Status.SENT),
+        ]:
+            Invoice.objects.create(
+                business_profile=self.bp,
+                client=client_obj,
+                number=number,
+                issue_date=issue_date,
+                status=status,
+            )
+
+    def fake_render(self, html, base_url):
+        self.rendered.append(html)
+        return f"%PDF-{len(self.rendered)}".encode()
+
+    def read_zip(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def export_q1(self):
+        invoices = get_archive_invoices(self.bp, "2026-01-01", "2026-03-31")
+        return self.read_zip(b"".join(iter_invoice_pdf_zip(invoices)))
+
+    def test_zip_contains_issued_invoices_of_period(self):
+        entries = self.export_q1()
+        self.assertEqual(sorted(entries), ["F-2026-00001.pdf", "F-2026-00002.pdf"])
+        self.assertEqual(sorted(entries.values()), [b"%PDF-1", b"%PDF-2"])
+
+    def test_invoices_are_read_in_batches(self):
+        client_obj = Client.objects.get()
+        for n in range(5, 8):
+            Invoice.objects.create(
+                business_profile=self.bp,
+                client=client_obj,
+                number=f"F-2026-0000{n}",
+                issue_date="2026-01-20",
+                status=Invoice.Status.SENT,
+            )
+        with (
+            mock.patch("apps.invoicing.services.pdf.RENDER_BATCH_SIZE", 2),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            entries = self.export_q1()
+        self.assertEqual(len(entries), 5)
+        line_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if 'FROM "invoicing_invoicelineitem"' in query["sql"]
+        ]
+        self.assertEqual(len(line_queries), 3)  # lines prefetched per batch
+
+    def test_stored_pdfs_are_reused(self):
+        first = self.export_q1()
+        second = self.export_q1()
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.rendered), 2)
+
+    def test_export_view_streams_zip(self):
+        self.client.login(username="owner", password="pass")
+        session = self.client.session
+        session["active_business_id"] = self.bp.pk
+        session.save()
+
+        response = self.client.get(
+            "/exportar/facturas/pdf/", {"start": "2026-01-01", "end": "2026-06-30"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        entries = self.read_zip(response.getvalue())
+        self.assertEqual(len(entries), 3)
+
+        response = self.client.get("/exportar/facturas/pdf/", {"start": "2026-13-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        output = os.path.join(self.media_root, "export.zip")
+        pool = PdfRenderPool(0, 0, timeout=30, target=self.fake_render)
+        with mock.patch(
+            "apps.invoicing.management.commands.export_invoice_pdfs.PdfRenderPool",
+            return_value=pool,
+        ) as pool_class:
+            call_command(
+                "export_invoice_pdfs",
+                output,
+                business=self.bp.pk,
+                start="2026-04-01",
+                end="2026-06-30",
+                workers=6,
+                stdout=io.StringIO(),
+            )
+        self.assertEqual(pool_class.call_args.kwargs["workers"], 6)
+        with open(output, "rb") as f:
+            self.assertEqual(list(self.read_zip(f.read())), ["F-2026-00004.pdf"])
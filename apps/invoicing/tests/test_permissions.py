@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.models.business import BusinessProfile
+
+
+class ActiveBusinessResolutionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bp = BusinessProfile.objects.create(name="Test", tax_id="B123")
+        self.user = User.objects.create_user(username="member", password="test")
+        self.membership = BusinessMembership.objects.create(
+            user=self.user,
+            business_profile=self.bp,
+            role=BusinessMembership.Role.VIEWER,
+        )
+        self.client.login(username="member", password="test")
+
+    def membership_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [
+            q
+            for q in ctx.captured_queries
+            if 'FROM "invoicing_businessmembership"' in q["sql"]
+        ]
+
+    def test_roles_are_served_from_session(self):
+        self.membership_queries("/facturas/")
+        self.assertEqual(self.membership_queries("/facturas/"), [])
+        self.assertEqual(self.membership_queries("/clientes/"), [])
+
+    def test_role_change_invalidates_session_cache(self):
+        self.assertEqual(self.client.get("/empresa/editar/").status_code, 404)
+
+        self.membership.role = BusinessMembership.Role.OWNER
+        self.membership.save()
+        self.assertEqual(self.client.get("/empresa/editar/").status_code, 200)
+
+        self.membership.delete()
+        response = self.client.get("/facturas/")
+        self.assertRedirects(response, "/empresa/nueva/")
+
+
+class BusinessSwitcherTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="member", password="test")
+        self.bp = BusinessProfile.objects.create(name="Alpha", tax_id="B1")
+        self.other = BusinessProfile.objects.create(name="Beta", tax_id="B2")
+        for bp in (self.bp, self.other):
+            BusinessMembership.objects.create(
+                user=self.user, business_profile=bp, role=BusinessMembership.Role.OWNER
+            )
+        self.client.login(username="member", password="test")
+
+    def test_switcher_is_cached_per_user(self):
+        response = self.client.get("/clientes/")
+        self.assertContains(response, "Beta")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/clientes/")
+        self.assertFalse([q for q in ctx.captured_queries if "INNER JOIN" in q["sql"]])
+
+    def test_switcher_reflects_business_changes(self):
+        self.client.get("/clientes/")
+        self.other.name = "Gamma"
+        self.other.save()
+        self.assertContains(self.client.get("/clientes/"), "Gamma")
+
+        third = BusinessProfile.objects.create(name="Delta", tax_id="B3")
+        BusinessMembership.objects.create(
+            user=self.user, business_profile=third, role=BusinessMembership.Role.VIEWER
+        )
+        self.assertContains(self.client.get("/clientes/"), "Delta")
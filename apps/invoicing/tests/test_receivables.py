@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.invoicing.models.business import BusinessMembership
+from apps.invoicing.models.business import BusinessProfile
+from apps.invoicing.models.client import Client
+from apps.invoicing.models.invoice import Invoice
+from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.receivables import get_receivables
+
+TODAY = date(2026, 6, 30)
+
+
+class ReceivablesTestCase(TestCase):
+    def setUp(self):
+        self.bp = BusinessProfile.objects.create(name="Test SL", tax_id="B123")
+        self.acme = Client.objects.create(
+            business_profile=self.bp, name="Acme", tax_id="B11111111"
+        )
+        self.beta = Client.objects.create(business_profile=self.bp, name="Beta")
+
+    def invoice(self, client, number, due_date, amount="100", **kwargs):
+        invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=client,
+            number=number,
+            issue_date=kwargs.pop("issue_date", date(2026, 1, 1)),
+            due_date=due_date,
+            status=kwargs.pop("status", Invoice.Status.SENT),
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=Decimal(amount),
+            tax_rate=Decimal("0"),
+        )
+        return invoice
+
+    def test_buckets_by_days_past_due(self):
+        self.invoice(self.acme, "F-1", date(2026, 7, 15))  # not due
+        self.invoice(self.acme, "F-2", date(2026, 6, 30))  # due today
+        self.invoice(self.acme, "F-3", date(2026, 6, 29), "200")  # 1 day
+        self.invoice(self.acme, "F-4", date(2026, 5, 1), "300")  # 60 days
+        self.invoice(self.beta, "F-5", date(2026, 4, 1), "400")  # 90 days
+        self.invoice(self.beta, "F-6", None, issue_date=date(2026, 3, 1))  # 121
+        self.invoice(self.beta, "F-7", date(2026, 1, 1), status="draft")
+        paid = self.invoice(self.beta, "F-8", date(2026, 1, 1))
+        Payment.objects.create(invoice=paid, amount=Decimal("100"), date=TODAY)
+        partial = self.invoice(self.acme, "F-9", date(2026, 3, 1), "1000")
+        Payment.objects.create(invoice=partial, amount=Decimal("400"), date=TODAY)
+
+        with self.assertNumQueries(1):
+            report = get_receivables(self.bp, today=TODAY)
+
+        acme, beta = report["rows"]
+        self.assertEqual(acme["name"], "Acme")
+        self.assertEqual(acme["tax_id"], "B11111111")
+        self.assertEqual(acme["count"], 5)
+        self.assertEqual(
+            acme["aging"],
+            [
+                Decimal("200"),
+                Decimal("200"),
+                Decimal("300"),
+                Decimal("0"),
+                Decimal("600"),
+            ],
+        )
+        self.assertEqual(acme["total"], Decimal("1300"))
+        self.assertEqual(beta["count"], 2)
+        self.assertEqual(beta["days_90"], Decimal("400"))
+        self.assertEqual(beta["days_over_90"], Decimal("100"))
+        self.assertEqual(report["totals"]["total"], Decimal("1800"))
+        self.assertEqual(report["totals"]["days_over_90"], Decimal("700"))
+
+    def test_view_and_csv(self):
+        user = User.objects.create_user("owner", password="test")
+        BusinessMembership.objects.create(
+            user=user, business_profile=self.bp, role=BusinessMembership.Role.OWNER
+        )
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.bp.pk
+        session.save()
+        self.invoice(self.acme, "F-1", date(2026, 1, 1), "1234.5")
+
+        response = self.client.get("/pendiente-cobro/")
+        self.assertContains(response, "Acme")
+        self.assertContains(response, "1234,50")
+
+        response = self.client.get("/exportar/pendiente-cobro/")
+        content = b"".join(response.streaming_content).decode("utf-8-sig")
+        header, row = content.splitlines()
+        self.assertIn("Más de 90 días", header)
+        self.assertTrue(row.startswith("Acme;B11111111;1;"))
+        self.assertTrue(row.endswith(";1234,50"))
@@ -1,13 +1,20 @@
+from datetime import date
 from decimal import Decimal
+from unittest import mock
 
 from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
 
+from apps.invoicing.forms.invoice import InvoiceForm
 from apps.invoicing.models.business import BusinessMembership
 from apps.invoicing.models.business import BusinessProfile
 from apps.invoicing.models.client import Client
 from apps.invoicing.models.invoice import Invoice
 from apps.invoicing.models.invoice import InvoiceLineItem
+from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.numbering import get_next_invoice_number
+from apps.invoicing.services.revenue import get_revenue_summary
 
 
 class ClientViewTestCase(TestCase):
@@ -92,6 +99,22 @@ class InvoiceViewTestCase(TestCase):
         self.assertIsNotNone(invoice)
         self.assertEqual(invoice.number, "F-2026-00001")
         self.assertEqual(invoice.status, "draft")
+        self.assertEqual(invoice.total, Decimal("1060.00"))
+
+    def test_numbering_settings_edit_current_year_counter(self):
+        year = timezone.localdate().year
+        response = self.client.post(
+            "/ajustes/numeracion/",
+            {
+                "series_prefix": "FV",
+                "next_number": "42",
+                "format_pattern": "{prefix}{year}/{number:04d}",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        response = self.client.get("/ajustes/numeracion/")
+        self.assertContains(response, f"FV{year}/0042")
+        self.assertEqual(get_next_invoice_number(self.bp, year), f"FV{year}/0042")
 
     def test_invoice_detail(self):
         invoice = Invoice.objects.create(
@@ -143,6 +166,55 @@ class InvoiceViewTestCase(TestCase):
         response = self.client.get(f"/facturas/{invoice.pk}/editar/")
         self.assertEqual(response.status_code, 404)
 
+    def test_edit_keeps_payments_recorded_meanwhile(self):
+        invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=self.test_client,
+            number="F-2026-00001",
+            issue_date="2026-01-01",
+        )
+        line = InvoiceLineItem.objects.create(
+            invoice=invoice, description="Service", unit_price=Decimal("100")
+        )
+        is_valid = InvoiceForm.is_valid
+
+        def pay_then_validate(form):
+            # A payment lands after the view loaded the invoice
+            Payment.objects.create(
+                invoice=invoice, amount=Decimal("50"), date="2026-01-10"
+            )
+            return is_valid(form)
+
+        with mock.patch.object(InvoiceForm, "is_valid", pay_then_validate):
+            response = self.client.post(
+                f"/facturas/{invoice.pk}/editar/",
+                {
+                    "client": self.test_client.pk,
+                    "issue_date": "2026-01-02",
+                    "currency": "EUR",
+                    "notes": "Edited",
+                    "legal_text": "",
+                    "lines-TOTAL_FORMS": "1",
+                    "lines-INITIAL_FORMS": "1",
+                    "lines-MIN_NUM_FORMS": "0",
+                    "lines-MAX_NUM_FORMS": "1000",
+                    "lines-0-id": line.pk,
+                    "lines-0-description": "Service",
+                    "lines-0-quantity": "1",
+                    "lines-0-unit_price": "100",
+                    "lines-0-tax_rate": "21",
+                    "lines-0-withholding_rate": "0",
+                    "lines-0-discount_percent": "0",
+                    "lines-0-position": "0",
+                },
+            )
+        self.assertEqual(response.status_code, 302)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.notes, "Edited")
+        self.assertEqual(invoice.total, Decimal("121.00"))
+        self.assertEqual(invoice.paid_amount, Decimal("50.00"))
+        self.assertEqual(invoice.balance, Decimal("71.00"))
+
     def test_cross_business_isolation(self):
         other_bp = BusinessProfile.objects.create(name="Other SL", tax_id="B999")
         other_client = Client.objects.create(
@@ -192,10 +264,31 @@ class ExportViewTestCase(TestCase):
         response = self.client.get("/exportar/facturas/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         self.assertIn("F-2026-00001", content)
         self.assertIn("Acme", content)
 
+    def test_export_invoices_csv_is_streamed(self):
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                business_profile=self.bp,
+                client=self.test_client,
+                number=f"F-2026-0000{i}",
+                issue_date="2026-01-15",
+            )
+            InvoiceLineItem.objects.create(
+                invoice=invoice,
+                description="Service",
+                quantity=Decimal("1"),
+                unit_price=Decimal("1000"),
+                tax_rate=Decimal("21"),
+            )
+        response = self.client.get("/exportar/facturas/")
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            content = response.getvalue().decode("utf-8-sig")
+        self.assertEqual(content.count("1210,00"), 3)
+
     def test_export_invoices_csv_with_status_filter(self):
         Invoice.objects.create(
             business_profile=self.bp,
@@ -212,7 +305,7 @@ class ExportViewTestCase(TestCase):
             status="sent",
         )
         response = self.client.get("/exportar/facturas/?status=sent")
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         self.assertIn("F-2026-00002", content)
         self.assertNotIn("F-2026-00001", content)
 
@@ -220,7 +313,7 @@ class ExportViewTestCase(TestCase):
         response = self.client.get("/exportar/clientes/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         self.assertIn("Acme", content)
         self.assertIn("A111", content)
 
@@ -242,6 +335,65 @@ class ExportViewTestCase(TestCase):
         )
         response = self.client.get("/exportar/pagos/")
         self.assertEqual(response.status_code, 200)
-        content = response.content.decode("utf-8-sig")
+        content = response.getvalue().decode("utf-8-sig")
         self.assertIn("F-2026-00001", content)
         self.assertIn("500", content)
+
+
+class DashboardViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("owner", password="test")
+        self.bp = BusinessProfile.objects.create(name="Test SL", tax_id="B123")
+        BusinessMembership.objects.create(
+            user=self.user,
+            business_profile=self.bp,
+            role=BusinessMembership.Role.OWNER,
+        )
+        self.test_client = Client.objects.create(business_profile=self.bp, name="Acme")
+        self.client.login(username="owner", password="test")
+        session = self.client.session
+        session["active_business_id"] = self.bp.pk
+        session.save()
+
+    def create_invoice(self, number, issue_date, status, amount):
+        invoice = Invoice.objects.create(
+            business_profile=self.bp,
+            client=self.test_client,
+            number=number,
+            issue_date=issue_date,
+            status=status,
+        )
+        InvoiceLineItem.objects.create(
+            invoice=invoice,
+            description="Service",
+            unit_price=Decimal(amount),
+            tax_rate=Decimal("0"),
+        )
+        return invoice
+
+    def test_revenue_summary(self):
+        self.create_invoice("F-1", "2026-03-05", "paid", "100")
+        self.create_invoice("F-2", "2026-03-20", "sent", "40")
+        self.create_invoice("F-3", "2026-02-10", "paid", "10")
+        self.create_invoice("F-4", "2025-01-10", "sent", "5")
+        self.create_invoice("F-5", "2026-03-21", "draft", "7")
+
+        with self.assertNumQueries(1):
+            summary = get_revenue_summary(self.bp, 12, today=date(2026, 3, 31))
+
+        self.assertEqual(summary["month_count"], 3)
+        self.assertEqual(summary["paid_amount"], Decimal("100"))
+        self.assertEqual(summary["pending_amount"], Decimal("45"))
+        self.assertEqual(summary["draft_count"], 1)
+        chart = summary["chart"]
+        self.assertEqual(len(chart["labels"]), 12)
+        self.assertEqual(chart["labels"][-1], "Mar 2026")
+        self.assertEqual(chart["revenue"][-2:], [10.0, 100.0])
+        self.assertEqual(chart["outstanding"][-1], 40.0)
+
+    def test_dashboard_horizon(self):
+        response = self.client.get("/?months=24")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["months"], 24)
+        response = self.client.get("/?months=5")
+        self.assertEqual(response.context["months"], 6)
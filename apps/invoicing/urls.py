@@ -17,7 +17,9 @@ from apps.invoicing.views.client import client_list
 from apps.invoicing.views.dashboard import dashboard
 from apps.invoicing.views.export import export_clients_csv
 from apps.invoicing.views.export import export_invoices_csv
+from apps.invoicing.views.export import export_invoices_pdf_zip
 from apps.invoicing.views.export import export_payments_csv
+from apps.invoicing.views.export import export_receivables_csv
 from apps.invoicing.views.invoice import invoice_create
 from apps.invoicing.views.invoice import invoice_detail
 from apps.invoicing.views.invoice import invoice_edit
@@ -28,9 +30,11 @@ from apps.invoicing.views.payment import payment_create
 from apps.invoicing.views.payment import payment_create_for_invoice
 from apps.invoicing.views.payment import payment_delete
 from apps.invoicing.views.payment import payment_edit
+from apps.invoicing.views.payment import payment_import
 from apps.invoicing.views.payment import payment_list
 from apps.invoicing.views.pdf import invoice_pdf
 from apps.invoicing.views.pdf import invoice_preview
+from apps.invoicing.views.receivables import receivables
 from apps.invoicing.views.settings import theme_create
 from apps.invoicing.views.settings import theme_delete
 from apps.invoicing.views.settings import theme_edit
@@ -74,8 +78,11 @@ urlpatterns = [
     # Payments
     path("pagos/", payment_list, name="payment_list"),
     path("pagos/nuevo/", payment_create, name="payment_create"),
+    path("pagos/importar/", payment_import, name="payment_import"),
     path("pagos/<int:pk>/editar/", payment_edit, name="payment_edit"),
     path("pagos/<int:pk>/eliminar/", payment_delete, name="payment_delete"),
+    # Receivables
+    path("pendiente-cobro/", receivables, name="receivables"),
     # Settings - Themes
     path("ajustes/temas/", theme_list, name="theme_list"),
     path("ajustes/temas/nuevo/", theme_create, name="theme_create"),
@@ -85,6 +92,16 @@ urlpatterns = [
     path("ajustes/numeracion/", numbering_settings, name="numbering_settings"),
     # Exports
     path("exportar/facturas/", export_invoices_csv, name="export_invoices_csv"),
+    path(
+        "exportar/facturas/pdf/",
+        export_invoices_pdf_zip,
+        name="export_invoices_pdf_zip",
+    ),
     path("exportar/pagos/", export_payments_csv, name="export_payments_csv"),
+    path(
+        "exportar/pendiente-cobro/",
+        export_receivables_csv,
+        name="export_receivables_csv",
+    ),
     path("exportar/clientes/", export_clients_csv, name="export_clients_csv"),
 ]
@@ -5,7 +5,6 @@ from django.shortcuts import render
 
 from apps.invoicing.forms.business import BusinessProfileForm
 from apps.invoicing.models.business import BusinessMembership
-from apps.invoicing.services.permissions import get_user_businesses
 from apps.invoicing.services.permissions import require_role
 from apps.invoicing.services.permissions import set_active_business
 
@@ -28,7 +27,7 @@ def business_create(request):
     return render(
         request,
         "invoicing/business/create.html",
-        {"form": form, "businesses": get_user_businesses(request.user)},
+        {"form": form},
     )
 
 
@@ -49,7 +48,6 @@ def business_edit(request):
         {
             "form": form,
             "business": business,
-            "businesses": get_user_businesses(request.user),
         },
     )
 
@@ -68,7 +66,6 @@ def business_delete(request):
         "invoicing/business/delete.html",
         {
             "business": business,
-            "businesses": get_user_businesses(request.user),
         },
     )
 
@@ -126,7 +123,6 @@ def business_members(request):
         "invoicing/business/members.html",
         {
             "business": business,
-            "businesses": get_user_businesses(request.user),
             "memberships": memberships,
             "roles": BusinessMembership.Role.choices,
         },
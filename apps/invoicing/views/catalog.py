@@ -6,7 +6,6 @@ from django.shortcuts import render
 
 from apps.invoicing.forms.catalog import CatalogItemForm
 from apps.invoicing.models.client import CatalogItem
-from apps.invoicing.services.permissions import get_user_businesses
 from apps.invoicing.services.permissions import require_business
 from apps.invoicing.services.permissions import require_role
 
@@ -24,7 +23,6 @@ def catalog_list(request):
         {
             "items": items,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "catalog",
             "show_inactive": show_inactive,
         },
@@ -49,7 +47,6 @@ def catalog_create(request):
         {
             "form": form,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "catalog",
             "title": "Nuevo artículo",
         },
@@ -74,7 +71,6 @@ def catalog_edit(request, pk):
             "form": form,
             "item": item,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "catalog",
             "title": f"Editar: {item.name}",
         },
@@ -94,7 +90,6 @@ def catalog_delete(request, pk):
         {
             "item": item,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "catalog",
         },
     )
@@ -5,7 +5,6 @@ from django.shortcuts import render
 
 from apps.invoicing.forms.client import ClientForm
 from apps.invoicing.models.client import Client
-from apps.invoicing.services.permissions import get_user_businesses
 from apps.invoicing.services.permissions import require_business
 from apps.invoicing.services.permissions import require_role
 
@@ -23,7 +22,6 @@ def client_list(request):
         {
             "clients": clients,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "clients",
             "q": q,
         },
@@ -48,7 +46,6 @@ def client_create(request):
         {
             "form": form,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "clients",
         },
     )
@@ -72,7 +69,6 @@ def client_edit(request, pk):
             "form": form,
             "client": client,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "clients",
         },
     )
@@ -91,7 +87,6 @@ def client_delete(request, pk):
         {
             "client": client,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "clients",
         },
     )
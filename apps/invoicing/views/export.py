@@ -1,32 +1,125 @@
 import csv
 
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
 
+from apps.invoicing.models.client import Client
 from apps.invoicing.models.invoice import Invoice
 from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.pdf_archive import get_archive_invoices
+from apps.invoicing.services.pdf_archive import iter_invoice_pdf_zip
 from apps.invoicing.services.permissions import require_business
+from apps.invoicing.services.receivables import get_receivables
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-buffer that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream_response(filename, header, rows):
+    """Stream ``rows`` as a semicolon separated CSV download.
+
+    Rows are encoded in chunks as they come out of the database cursor, so
+    memory stays flat and the first bytes are sent before the query ends.
+    """
+    writer = csv.writer(Echo(), delimiter=";")
+
+    def content():
+        yield "\ufeff" + writer.writerow(header)  # BOM for Excel UTF-8
+        chunk = []
+        for row in rows:
+            chunk.append(writer.writerow(row))
+            if len(chunk) >= CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
+
+    response = StreamingHttpResponse(content(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def zip_stream_response(filename, invoices):
+    """Stream a ZIP with the PDFs of ``invoices`` as they are rendered."""
+    response = StreamingHttpResponse(
+        iter_invoice_pdf_zip(invoices), content_type="application/zip"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def format_amount(value):
+    return str(value).replace(".", ",")
+
+
+def format_date(value):
+    return value.strftime("%d/%m/%Y") if value else ""
 
 
 @login_required
 @require_business
 def export_invoices_csv(request):
-    invoices = (
-        Invoice.objects.filter(business_profile=request.business)
-        .select_related("client")
-        .order_by("-issue_date")
+    invoices = Invoice.objects.filter(business_profile=request.business).order_by(
+        "-issue_date"
     )
 
     status_filter = request.GET.get("status", "")
     if status_filter:
         invoices = invoices.filter(status=status_filter)
 
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = 'attachment; filename="facturas.csv"'
-    response.write("\ufeff")  # BOM for Excel UTF-8
+    statuses = dict(Invoice.Status.choices)
+    values = invoices.values_list(
+        "number",
+        "client__name",
+        "client__tax_id",
+        "issue_date",
+        "due_date",
+        "status",
+        "subtotal",
+        "tax_total",
+        "withholding_total",
+        "total",
+        "currency",
+    )
+    rows = (
+        [
+            number,
+            client_name,
+            client_tax_id or "",
+            format_date(issue_date),
+            format_date(due_date),
+            statuses.get(status, status),
+            format_amount(subtotal),
+            format_amount(tax_total),
+            format_amount(withholding_total),
+            format_amount(total),
+            currency,
+        ]
+        for (
+            number,
+            client_name,
+            client_tax_id,
+            issue_date,
+            due_date,
+            status,
+            subtotal,
+            tax_total,
+            withholding_total,
+            total,
+            currency,
+        ) in values.iterator(chunk_size=CHUNK_SIZE)
+    )
 
-    writer = csv.writer(response, delimiter=";")
-    writer.writerow(
+    return csv_stream_response(
+        "facturas.csv",
         [
             "Número",
             "Cliente",
@@ -39,44 +132,43 @@ def export_invoices_csv(request):
             "Retención IRPF",
             "Total",
             "Moneda",
-        ]
+        ],
+        rows,
     )
 
-    for inv in invoices:
-        writer.writerow(
-            [
-                inv.number,
-                inv.client.name,
-                inv.client.tax_id or "",
-                inv.issue_date.strftime("%d/%m/%Y"),
-                inv.due_date.strftime("%d/%m/%Y") if inv.due_date else "",
-                inv.get_status_display(),
-                str(inv.subtotal).replace(".", ","),
-                str(inv.tax_total).replace(".", ","),
-                str(inv.withholding_total).replace(".", ","),
-                str(inv.total).replace(".", ","),
-                inv.currency,
-            ]
-        )
-
-    return response
-
 
 @login_required
 @require_business
 def export_payments_csv(request):
-    payments = (
+    methods = dict(Payment.Method.choices)
+    values = (
         Payment.objects.filter(invoice__business_profile=request.business)
-        .select_related("invoice", "invoice__client")
         .order_by("-date")
+        .values_list(
+            "date",
+            "invoice__number",
+            "invoice__client__name",
+            "method",
+            "amount",
+            "notes",
+        )
+    )
+    rows = (
+        [
+            format_date(date),
+            number,
+            client_name,
+            methods.get(method, method),
+            format_amount(amount),
+            notes or "",
+        ]
+        for date, number, client_name, method, amount, notes in values.iterator(
+            chunk_size=CHUNK_SIZE
+        )
     )
 
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = 'attachment; filename="pagos.csv"'
-    response.write("\ufeff")
-
-    writer = csv.writer(response, delimiter=";")
-    writer.writerow(
+    return csv_stream_response(
+        "pagos.csv",
         [
             "Fecha",
             "Factura",
@@ -84,37 +176,64 @@ def export_payments_csv(request):
             "Método",
             "Importe",
             "Notas",
-        ]
+        ],
+        rows,
     )
 
-    for p in payments:
-        writer.writerow(
-            [
-                p.date.strftime("%d/%m/%Y"),
-                p.invoice.number,
-                p.invoice.client.name,
-                p.get_method_display(),
-                str(p.amount).replace(".", ","),
-                p.notes or "",
-            ]
-        )
 
-    return response
+@login_required
+@require_business
+def export_receivables_csv(request):
+    report = get_receivables(request.business)
+    rows = (
+        [
+            row["name"],
+            row["tax_id"] or "",
+            row["count"],
+            *(format_amount(amount) for amount in row["aging"]),
+            format_amount(row["total"]),
+        ]
+        for row in report["rows"]
+    )
+
+    return csv_stream_response(
+        f"pendiente-cobro-{report['today']:%Y%m%d}.csv",
+        [
+            "Cliente",
+            "NIF/CIF Cliente",
+            "Facturas",
+            *(label for _key, label in report["buckets"]),
+            "Total pendiente",
+        ],
+        rows,
+    )
 
 
 @login_required
 @require_business
 def export_clients_csv(request):
-    from apps.invoicing.models.client import Client
-
-    clients = Client.objects.filter(business_profile=request.business).order_by("name")
-
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
-    response["Content-Disposition"] = 'attachment; filename="clientes.csv"'
-    response.write("\ufeff")
+    fields = [
+        "name",
+        "tax_id",
+        "address",
+        "city",
+        "postal_code",
+        "province",
+        "email",
+        "phone",
+        "notes",
+    ]
+    values = (
+        Client.objects.filter(business_profile=request.business)
+        .order_by("name")
+        .values_list(*fields)
+    )
+    rows = (
+        [value or "" for value in row] for row in values.iterator(chunk_size=CHUNK_SIZE)
+    )
 
-    writer = csv.writer(response, delimiter=";")
-    writer.writerow(
+    return csv_stream_response(
+        "clientes.csv",
         [
             "Nombre",
             "NIF/CIF",
@@ -125,22 +244,21 @@ def export_clients_csv(request):
             "Email",
             "Teléfono",
             "Notas",
-        ]
+        ],
+        rows,
     )
 
-    for c in clients:
-        writer.writerow(
-            [
-                c.name,
-                c.tax_id or "",
-                c.address or "",
-                c.city or "",
-                c.postal_code or "",
-                c.province or "",
-                c.email or "",
-                c.phone or "",
-                c.notes or "",
-            ]
-        )
 
-    return response
+@login_required
+@require_business
+def export_invoices_pdf_zip(request):
+    try:
+        start_date = parse_date(request.GET.get("start", ""))
+        end_date = parse_date(request.GET.get("end", ""))
+    except ValueError:
+        start_date = end_date = None
+    if not start_date or not end_date or start_date > end_date:
+        return HttpResponseBadRequest("Indica un rango de fechas válido.")
+
+    invoices = get_archive_invoices(request.business, start_date, end_date)
+    return zip_stream_response(f"facturas_{start_date}_{end_date}.zip", invoices)
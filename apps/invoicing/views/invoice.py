@@ -1,4 +1,5 @@
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
@@ -7,8 +8,7 @@ from django.shortcuts import render
 from apps.invoicing.forms.invoice import InvoiceForm
 from apps.invoicing.forms.invoice import InvoiceLineItemFormSet
 from apps.invoicing.models.invoice import Invoice
-from apps.invoicing.services.numbering import get_next_invoice_number
-from apps.invoicing.services.permissions import get_user_businesses
+from apps.invoicing.services.numbering import get_invoice_numbering
 from apps.invoicing.services.permissions import require_business
 from apps.invoicing.services.permissions import require_role
 
@@ -33,7 +33,6 @@ def invoice_list(request):
         {
             "invoices": invoices,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "invoices",
             "status_filter": status_filter,
             "statuses": Invoice.Status.choices,
@@ -52,15 +51,18 @@ def invoice_create(request):
         if form.is_valid() and formset.is_valid():
             invoice = form.save(commit=False)
             invoice.business_profile = business
-            invoice.number = get_next_invoice_number(business, invoice.issue_date.year)
-            invoice.series = (
-                invoice.number.split("-")[0] if "-" in invoice.number else ""
-            )
             if not invoice.legal_text and business.legal_text:
                 invoice.legal_text = business.legal_text
-            invoice.save()
-            formset.instance = invoice
-            formset.save()
+            numbering = get_invoice_numbering(business)
+            # The number is only taken if the invoice is saved with it
+            with transaction.atomic():
+                invoice.number = numbering.generate_number(invoice.issue_date.year)
+                invoice.series = (
+                    invoice.number.split("-")[0] if "-" in invoice.number else ""
+                )
+                invoice.save()
+                formset.instance = invoice
+                formset.save()
             return redirect("invoicing:invoice_detail", pk=invoice.pk)
     else:
         form = InvoiceForm(business_profile=business)
@@ -74,7 +76,6 @@ def invoice_create(request):
             "form": form,
             "formset": formset,
             "business": business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "invoices",
         },
     )
@@ -91,7 +92,10 @@ def invoice_edit(request, pk):
         form = InvoiceForm(request.POST, instance=invoice, business_profile=business)
         formset = InvoiceLineItemFormSet(request.POST, instance=invoice)
         if form.is_valid() and formset.is_valid():
-            form.save()
+            # Totals and payment columns are kept by the line and payment
+            # receivers: a full save would write back the values loaded above
+            invoice = form.save(commit=False)
+            invoice.save(update_fields=[*form.Meta.fields, "updated_at"])
             formset.save()
             return redirect("invoicing:invoice_detail", pk=invoice.pk)
     else:
@@ -105,7 +109,6 @@ def invoice_edit(request, pk):
             "formset": formset,
             "invoice": invoice,
             "business": business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "invoices",
         },
     )
@@ -125,7 +128,6 @@ def invoice_detail(request, pk):
         {
             "invoice": invoice,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "invoices",
         },
     )
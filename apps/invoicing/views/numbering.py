@@ -1,33 +1,27 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.shortcuts import render
+from django.utils import timezone
 
 from apps.invoicing.forms.numbering import InvoiceNumberingForm
-from apps.invoicing.models.business import InvoiceNumbering
-from apps.invoicing.services.permissions import get_user_businesses
+from apps.invoicing.services.numbering import get_invoice_numbering
 from apps.invoicing.services.permissions import require_role
 
 
 @login_required
 @require_role("owner")
 def numbering_settings(request):
-    numbering, _ = InvoiceNumbering.objects.get_or_create(
-        business_profile=request.business,
-        defaults={"series_prefix": "F", "next_number": 1},
-    )
+    numbering = get_invoice_numbering(request.business)
+    year = timezone.localdate().year
     if request.method == "POST":
-        form = InvoiceNumberingForm(request.POST, instance=numbering)
+        form = InvoiceNumberingForm(request.POST, instance=numbering, year=year)
         if form.is_valid():
             form.save()
             return redirect("invoicing:numbering_settings")
     else:
-        form = InvoiceNumberingForm(instance=numbering)
+        form = InvoiceNumberingForm(instance=numbering, year=year)
     # Preview
-    preview = numbering.format_pattern.format(
-        prefix=numbering.series_prefix,
-        year=2026,
-        number=numbering.next_number,
-    )
+    preview = numbering.format_number(year, numbering.get_next_number(year))
     return render(
         request,
         "invoicing/settings/numbering.html",
@@ -36,7 +30,6 @@ def numbering_settings(request):
             "numbering": numbering,
             "preview": preview,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "settings_numbering",
         },
     )
@@ -3,14 +3,17 @@ from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.shortcuts import render
 
+from apps.invoicing.forms.payment import BankStatementForm
 from apps.invoicing.forms.payment import PaymentForm
 from apps.invoicing.forms.payment import QuickPaymentForm
 from apps.invoicing.models.invoice import Invoice
 from apps.invoicing.models.payment import Payment
+from apps.invoicing.services.bank_import import BankImportError
+from apps.invoicing.services.bank_import import import_bank_statement
+from apps.invoicing.services.bank_import import open_statement
 from apps.invoicing.services.payment import check_and_update_invoice_status
 from apps.invoicing.services.payment import get_invoice_balance
 from apps.invoicing.services.payment import get_invoice_paid_amount
-from apps.invoicing.services.permissions import get_user_businesses
 from apps.invoicing.services.permissions import require_business
 from apps.invoicing.services.permissions import require_role
 
@@ -29,7 +32,6 @@ def payment_list(request):
         {
             "payments": payments,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "payments",
         },
     )
@@ -52,7 +54,6 @@ def payment_create(request):
         {
             "form": form,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "payments",
             "title": "Nuevo pago",
         },
@@ -89,7 +90,6 @@ def payment_create_for_invoice(request, invoice_pk):
             "balance": balance,
             "paid_amount": get_invoice_paid_amount(invoice),
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "invoices",
         },
     )
@@ -108,9 +108,11 @@ def payment_edit(request, pk):
         )
         if form.is_valid():
             payment = form.save()
-            check_and_update_invoice_status(old_invoice)
-            if payment.invoice != old_invoice:
-                check_and_update_invoice_status(payment.invoice)
+            check_and_update_invoice_status(payment.invoice)
+            if payment.invoice_id != old_invoice.pk:
+                # The payment left this invoice: reload its paid amount
+                old_invoice.refresh_from_db(fields=["paid_amount", "balance"])
+                check_and_update_invoice_status(old_invoice)
             return redirect("invoicing:payment_list")
     else:
         form = PaymentForm(instance=payment, business_profile=request.business)
@@ -121,7 +123,6 @@ def payment_edit(request, pk):
             "form": form,
             "payment": payment,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "payments",
             "title": f"Editar pago #{payment.pk}",
         },
@@ -145,7 +146,42 @@ def payment_delete(request, pk):
         {
             "payment": payment,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
+            "active_section": "payments",
+        },
+    )
+
+
+@login_required
+@require_role("owner", "editor")
+def payment_import(request):
+    result = None
+    if request.method == "POST":
+        form = BankStatementForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                result = import_bank_statement(
+                    request.business,
+                    open_statement(form.cleaned_data["statement"]),
+                    dry_run=form.cleaned_data["dry_run"],
+                )
+            except BankImportError as exc:
+                form.add_error("statement", str(exc))
+            else:
+                invoices = Invoice.objects.in_bulk(
+                    {movement["invoice_id"] for movement in result["matched"]}
+                )
+                for movement in result["matched"]:
+                    movement["invoice"] = invoices[movement["invoice_id"]]
+                result["dry_run"] = form.cleaned_data["dry_run"]
+    else:
+        form = BankStatementForm()
+    return render(
+        request,
+        "invoicing/payments/import.html",
+        {
+            "form": form,
+            "result": result,
+            "business": request.business,
             "active_section": "payments",
         },
     )
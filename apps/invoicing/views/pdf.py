@@ -4,9 +4,10 @@ from django.shortcuts import get_object_or_404
 from django.shortcuts import render
 
 from apps.invoicing.models.invoice import Invoice
-from apps.invoicing.services.pdf import generate_invoice_pdf
+from apps.invoicing.services.pdf import get_invoice_pdf
 from apps.invoicing.services.pdf import get_invoice_theme
 from apps.invoicing.services.pdf import render_invoice_html
+from apps.invoicing.services.pdf_pool import PdfRenderError
 from apps.invoicing.services.permissions import require_business
 
 
@@ -39,7 +40,15 @@ def invoice_pdf(request, pk):
         pk=pk,
         business_profile=request.business,
     )
-    pdf_bytes = generate_invoice_pdf(invoice)
+    try:
+        pdf_bytes = get_invoice_pdf(invoice)
+    except PdfRenderError:
+        response = HttpResponse(
+            "El generador de PDF está ocupado, inténtalo de nuevo en unos segundos.",
+            status=503,
+        )
+        response["Retry-After"] = "5"
+        return response
     response = HttpResponse(pdf_bytes, content_type="application/pdf")
     filename = f"{invoice.number}.pdf"
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
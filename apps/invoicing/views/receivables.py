@@ -0,0 +1,19 @@
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from apps.invoicing.services.permissions import require_business
+from apps.invoicing.services.receivables import get_receivables
+
+
+@login_required
+@require_business
+def receivables(request):
+    return render(
+        request,
+        "invoicing/receivables.html",
+        {
+            "report": get_receivables(request.business),
+            "business": request.business,
+            "active_section": "receivables",
+        },
+    )
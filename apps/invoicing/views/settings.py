@@ -5,7 +5,6 @@ from django.shortcuts import render
 
 from apps.invoicing.forms.theme import InvoiceThemeForm
 from apps.invoicing.models.business import InvoiceTheme
-from apps.invoicing.services.permissions import get_user_businesses
 from apps.invoicing.services.permissions import require_role
 
 
@@ -19,7 +18,6 @@ def theme_list(request):
         {
             "themes": themes,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "settings_theme",
         },
     )
@@ -43,7 +41,6 @@ def theme_create(request):
         {
             "form": form,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "settings_theme",
             "title": "Nuevo tema",
         },
@@ -68,7 +65,6 @@ def theme_edit(request, pk):
             "form": form,
             "theme": theme,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "settings_theme",
             "title": f"Editar tema: {theme.name}",
         },
@@ -88,7 +84,6 @@ def theme_delete(request, pk):
         {
             "theme": theme,
             "business": request.business,
-            "businesses": get_user_businesses(request.user),
             "active_section": "settings_theme",
         },
     )
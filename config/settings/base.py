@@ -36,6 +36,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.invoicing.middleware.ActiveBusinessMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -56,6 +57,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "django.template.context_processors.media",
+                "apps.invoicing.context_processors.businesses",
             ],
         },
     },
@@ -116,6 +118,11 @@ CACHES = {
     }
 }
 
+# PDF rendering (pool of WeasyPrint worker processes, 0 = render in-process)
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+PDF_RENDER_QUEUE_SIZE = int(os.getenv("PDF_RENDER_QUEUE_SIZE", "8"))
+PDF_RENDER_TIMEOUT = int(os.getenv("PDF_RENDER_TIMEOUT", "60"))
+
 # Security settings
 SESSION_COOKIE_HTTPONLY = True  # Prevent JS access to session cookie
 SESSION_COOKIE_SAMESITE = "Lax"  # CSRF protection
@@ -8,3 +8,11 @@ DATABASES = {
         "NAME": ":memory:",
     }
 }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PDF_RENDER_WORKERS = 0